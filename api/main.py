@@ -1,38 +1,124 @@
-import copy
-import json
-from typing import Dict, Any, Annotated
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager, suppress
+from typing import Dict, Any, Annotated, AsyncIterator, List, Optional
 
 import redis.asyncio as redis
 import uvicorn
 from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
+from pydantic import BaseModel, Field
 from fastapi_cache import FastAPICache
 from fastapi_cache.backends.redis import RedisBackend
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
-from starlette.responses import JSONResponse
+from starlette.responses import JSONResponse, Response, StreamingResponse
 
 from config.settings import Settings
 from modules.ai_generator import AIDescriptionGenerator
-from modules.github_fetcher import GitHubProfileFetcher
+from modules.github_fetcher import GitHubProfileBatchFetcher, GitHubProfileFetcher
 from modules.github_projects import GitHubProjectRanker
 from modules.linkedin_fetcher import LinkedInProfileFetcher
-from utils.user import verify_username, verify_linkedin_username, get_user_data
+from utils.cache import CacheEntry, MemoryCache, ResponseCache
+from utils.codec import CacheCodec, JsonSerializer
+from utils.conditional_cache import response_store
+from utils.http_cache import cached_response, combine_etags
+from utils.http_clients import UpstreamClients
+from utils.job_queue import JobQueue
+from utils.metrics import REGISTRY, MetricsMiddleware
+from utils.single_flight import SingleFlight
+from utils.tracing import ServerTimingMiddleware, trace_stage
+from utils.user import (
+    INVALID_USERNAME_DETAIL,
+    cached_github_username,
+    get_user_data,
+    remember_github_username,
+    verify_linkedin_username,
+    verify_profile_username,
+    verify_username
+)
+
+# Initialize Redis client
+if Settings.CACHE_ENABLED:
+    redis_client = redis.Redis.from_url(
+        Settings.REDIS_URL,
+        socket_timeout=Settings.REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=Settings.REDIS_SOCKET_TIMEOUT,
+        max_connections=Settings.REDIS_MAX_CONNECTIONS,
+        health_check_interval=Settings.REDIS_HEALTH_CHECK_INTERVAL
+    )
+else:
+    redis_client = None
+
+# Coalesce concurrent cache misses so each key is computed once across replicas
+single_flight = SingleFlight(
+    redis_client,
+    lease_ttl=Settings.SINGLE_FLIGHT_LEASE_TTL,
+    wait_timeout=Settings.SINGLE_FLIGHT_WAIT_TIMEOUT
+)
+response_cache = ResponseCache(
+    redis_client,
+    single_flight,
+    soft_ttl=Settings.DEFAULT_CACHE_TTL,
+    hard_ttl=Settings.CACHE_HARD_TTL,
+    memory=MemoryCache(
+        max_entries=Settings.MEMORY_CACHE_MAX_ENTRIES,
+        max_bytes=Settings.MEMORY_CACHE_MAX_BYTES,
+        ttl=Settings.MEMORY_CACHE_TTL
+    ) if Settings.CACHE_ENABLED else None,
+    redis_retry_interval=Settings.REDIS_RETRY_INTERVAL,
+    codec=CacheCodec(
+        serializer=Settings.CACHE_SERIALIZER,
+        compression=Settings.CACHE_COMPRESSION,
+        compress_threshold=Settings.CACHE_COMPRESS_THRESHOLD
+    )
+)
+
+# Pooled upstream clients, opened by the lifespan. Without them (scripts, tests
+# that skip the lifespan) every fetcher call opens a client of its own.
+upstream_clients = UpstreamClients()
+fallback_batch_fetcher = GitHubProfileBatchFetcher()
+
+# Stale batch profiles are refreshed by tasks that outlive the request
+profile_writes = set()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Open the shared upstream clients, and run the cache invalidation listener
+    and the AI job workers for the lifetime of the worker
+    """
+    await upstream_clients.start(github_store=response_store(redis_client))
+    background = [
+        asyncio.create_task(response_cache.listen_for_invalidations()),
+        asyncio.create_task(ai_jobs.run(Settings.AI_WORKER_CONCURRENCY)),
+    ]
+    yield
+    for task in background:
+        task.cancel()
+    for task in background:
+        with suppress(asyncio.CancelledError):
+            await task
+    await upstream_clients.close()
+    if redis_client is not None:
+        await redis_client.aclose()
+
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Devb Profile API",
     version="2.0.0",
+    lifespan=lifespan,
 )
-
-# Initialize Redis client
-if Settings.CACHE_ENABLED:
-    redis_client = redis.Redis(host='redis', port=6379, db=0)
+app.state.response_cache = response_cache
+app.state.upstream_clients = upstream_clients
 
 
 class APIKeyMiddleware(BaseHTTPMiddleware):
     """Middleware for API key authentication"""
-    EXCLUDED_PATHS = {"/docs", "/redoc", "/openapi.json"}
+    EXCLUDED_PATHS = {"/docs", "/redoc", "/openapi.json", "/metrics"}
 
     async def dispatch(self, request: Request, call_next):
         if request.url.path in self.EXCLUDED_PATHS or Settings.DEBUG:
@@ -53,114 +139,633 @@ class APIKeyMiddleware(BaseHTTPMiddleware):
 
         return await call_next(request)
 
-async def get_cached_github_profile(username: str) -> Dict[str, Any]:
+async def get_cached_github_profile(
+    username: str,
+    background_tasks: Optional[BackgroundTasks] = None
+) -> Dict[str, Any]:
     """Fetch and cache GitHub profile data"""
+    return (await get_cached_github_profile_entry(username, background_tasks)).value
+
 
+async def get_cached_github_profile_entry(
+    username: str,
+    background_tasks: Optional[BackgroundTasks] = None
+) -> CacheEntry:
+    """Fetch and cache GitHub profile data, returning the cache entry"""
     cache_key = f"github_profile_basic:{username}"
-    if  Settings.CACHE_ENABLED:
-        cached_response = await redis_client.get(cache_key)
-        if cached_response:
-            return json.loads(cached_response)
+    entry = await response_cache.get(cache_key)
+    return await response_cache.resolve_entry(
+        cache_key,
+        entry,
+        github_profile_compute(username, cache_key, entry),
+        background_tasks
+    )
+
+
+def github_profile_compute(username: str, cache_key: str, entry: Optional[CacheEntry]):
+    """
+    Computation of a cached profile: stale pending profiles were fetched
+    moments ago, so their refresh only queues the AI job again
+    """
+    if entry is not None and entry.value.get('about_status') == 'pending':
+        return lambda: requeue_ai_job(username, cache_key)
+    return lambda: generate_github_profile(username, cache_key)
+
+
+async def generate_github_profile(
+    username: str,
+    cache_key: str,
+    basic_profile: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Fetch GitHub profile data and write it to the cache right away with its
+    AI sections pending; the `ai_jobs` workers generate them. A refreshed
+    profile keeps its previous AI sections until then. `basic_profile` skips
+    the fetch for profiles fetched in a batch, see `fetch_basic_github_profiles`.
+    """
+    if basic_profile is None:
+        basic_profile = await fetch_basic_github_profile(username)
+    previous = await response_cache.get(cache_key)
+    for section in AI_SECTIONS:
+        basic_profile[section] = previous.value.get(section) if previous is not None else None
+    basic_profile['about_status'] = 'pending'
+    # Queued before the profile is pending, see `wait_for_ai_job`
+    await ai_jobs.mark_queued(username)
+    # Refreshed soon, so the job is queued again if it is lost
+    await response_cache.set(cache_key, {**basic_profile, 'cached': True}, soft_ttl=Settings.AI_PENDING_PROFILE_TTL)
+    await ai_jobs.enqueue(username)
+    return basic_profile
+
+
+async def requeue_ai_job(username: str, cache_key: str) -> Dict[str, Any]:
+    """
+    Queue the AI job of a pending profile again in case it was lost, keeping
+    the profile's GitHub data. The profile stays pending for another
+    `AI_PENDING_PROFILE_TTL`, which bounds how often a failing job is retried.
+    """
+    entry = await response_cache.get(cache_key)
+    if entry is None:
+        return await generate_github_profile(username, cache_key)
+    if entry.value.get('about_status') != 'pending':
+        return entry.value  # The job finished meanwhile
+    await ai_jobs.mark_queued(username)
+    await response_cache.set(cache_key, entry.value, soft_ttl=Settings.AI_PENDING_PROFILE_TTL)
+    await ai_jobs.enqueue(username)
+    return entry.value
+
+
+async def fetch_basic_github_profile(username: str) -> Dict[str, Any]:
+    """
+    Fetch GitHub profile data without the AI generated sections. The profile
+    query also tells whether the username belongs to a user, which is cached
+    for `verify_username` and `verify_profile_username`.
+
+    Raises:
+        HTTPException: 400 for missing accounts and organizations
+        ValueError: The profile could not be fetched
+    """
+    # The username pattern was checked by the endpoint's dependency
+    with trace_stage("github_profile"):
+        basic_profile = await GitHubProfileFetcher.fetch_user_profile_async(
+            username, validate=False, client=upstream_clients.github
+        )
+    return await checked_basic_profile(username, basic_profile)
+
+
+def profile_batch_fetcher() -> GitHubProfileBatchFetcher:
+    """Batch fetcher of the shared GitHub client, so batch sizes adapt across requests"""
+    return upstream_clients.profile_batch_fetcher or fallback_batch_fetcher
+
+
+async def fetch_basic_github_profiles(
+    usernames: List[str],
+    fetcher: Optional[GitHubProfileBatchFetcher] = None
+) -> Dict[str, Any]:
+    """
+    Fetch the GitHub profile data of many users with one GraphQL request per
+    batch, for bulk refreshes.
+
+    Returns:
+        dict: Per username, the profile, or the exception
+            `fetch_basic_github_profile` would have raised
+    """
+    fetcher = fetcher or profile_batch_fetcher()
+    with trace_stage("github_profiles"):
+        results = await fetcher.fetch_profiles_async(usernames)
+    checked = {}
+    for username, basic_profile in results.items():
+        try:
+            checked[username] = await checked_basic_profile(username, basic_profile)
+        except (HTTPException, ValueError) as e:
+            checked[username] = e
+    return checked
+
 
-    basic_profile = GitHubProfileFetcher.fetch_user_profile(username)
+async def checked_basic_profile(username: str, basic_profile: Dict[str, Any]) -> Dict[str, Any]:
+    """Remember whether the username exists and raise for fetch errors, see `fetch_basic_github_profile`"""
+    if basic_profile.get("error_type") == "not_found":
+        await remember_github_username(response_cache, username, False)
+        raise HTTPException(status_code=400, detail=INVALID_USERNAME_DETAIL)
+    if "error" in basic_profile:
+        raise ValueError(basic_profile["error"])
+    await remember_github_username(response_cache, username, True)
     basic_profile['cached'] = False
+    return basic_profile
+
+
+def profile_error(username: str, error: Exception) -> HTTPException:
+    """HTTP error for a profile that could not be fetched"""
+    if isinstance(error, HTTPException):
+        return error
+    return HTTPException(status_code=404, detail=f"User {username} not found: {str(error)}")
+
+
+# Profile fields generated by the AI model, and how
+AI_SECTIONS = {
+    'about': AIDescriptionGenerator.generate_profile_summary_async,
+    'seo': AIDescriptionGenerator.generate_seo_contents_async,
+}
+
+
+async def enrich_github_profile(username: str):
+    """
+    AI job: generate the AI sections of a cached profile and store it as
+    ready. Raises when a section fails; the profile then stays pending and
+    the job is queued again when the profile is refreshed.
+
+    The sections are merged into the profile cached once they are generated,
+    so a GitHub refresh stored meanwhile is kept.
+    """
+    cache_key = f"github_profile_basic:{username}"
+    # Past the memory tier, which lags behind refreshes other processes store
+    entry = await response_cache.get(cache_key, use_memory=False)
+    profile = entry.value if entry is not None else await fetch_basic_github_profile(username)
+
+    ai_generator = upstream_clients.ai_generator or AIDescriptionGenerator()
+    results = await asyncio.gather(*(generate(ai_generator, profile) for generate in AI_SECTIONS.values()))
+    sections = dict(zip(AI_SECTIONS, results), about_status='ready')
+
+    current = await response_cache.get(cache_key, use_memory=False)
+    await response_cache.set(cache_key, {**(current.value if current is not None else profile), **sections, 'cached': True})
+    await response_cache.set(f"github_profile_about:{username}", {"about": sections['about'], "about_status": 'ready'})
+
+
+# AI sections are generated off the request path by workers draining this queue,
+# in the API process and in any `api.worker` processes
+ai_jobs = JobQueue(
+    redis_client,
+    "ai_jobs",
+    enrich_github_profile,
+    job_timeout=Settings.AI_JOB_TIMEOUT,
+    status_ttl=Settings.AI_JOB_STATUS_TTL,
+    redis_retry_interval=Settings.REDIS_RETRY_INTERVAL
+)
+
+
+async def wait_for_ai_job(username: str, cache_key: str) -> Dict[str, Any]:
+    """
+    Wait until the AI job of a pending profile finishes, returning the profile
+    it left. Jobs are marked queued before their profile is stored as pending,
+    so a finished status is never the previous run's.
+    """
+    deadline = time.monotonic() + Settings.AI_JOB_TIMEOUT
+    while time.monotonic() < deadline:
+        status = await ai_jobs.status(username)
+        if status is None or status['status'] in ('done', 'failed'):
+            break
+        await asyncio.sleep(Settings.AI_JOB_POLL_INTERVAL)
+    entry = await response_cache.get(cache_key)
+    return entry.value if entry is not None else {}
 
+
+def ai_sections_from_job(username: str, cache_key: str) -> Dict[str, asyncio.Task]:
+    """
+    One task per AI section, resolving to the section generated by the
+    profile's AI job. The job stops being polled once every task is done
+    or cancelled.
+    """
+    job = asyncio.ensure_future(wait_for_ai_job(username, cache_key))
+
+    async def section_of(section):
+        return (await job).get(section)
+
+    sections = {section: asyncio.create_task(section_of(section)) for section in AI_SECTIONS}
+
+    def release(_):
+        if all(task.done() for task in sections.values()):
+            job.cancel()
+
+    for task in sections.values():
+        task.add_done_callback(release)
+    return sections
+
+
+def ndjson_line(data: Any) -> bytes:
+    """Encode one line of an NDJSON stream"""
+    return JsonSerializer.dumps(data) + b"\n"
+
+
+def ndjson_event(event: str, data: Any) -> bytes:
+    """Encode one event of a streamed profile"""
+    return ndjson_line({"event": event, "data": data})
+
+
+async def stream_profile_sections(
+    profile: Dict[str, Any],
+    sections: Dict[str, asyncio.Task]
+) -> AsyncIterator[bytes]:
+    """
+    Yield the profile as NDJSON events: the basic profile, the social
+    accounts, then each AI section as soon as its task completes, and
+    finally `done`. Sections without a task are taken from the profile.
+    """
+    yield ndjson_event('profile', {
+        field: value for field, value in profile.items()
+        if field not in AI_SECTIONS and field != 'social_accounts'
+    })
+    yield ndjson_event('social_accounts', profile.get('social_accounts'))
+
+    for section in AI_SECTIONS:
+        if section not in sections:
+            yield ndjson_event(section, profile.get(section))
+    pending = {task: section for section, task in sections.items()}
     try:
-        ai_generator = AIDescriptionGenerator()
-        about_data = ai_generator.generate_profile_summary(basic_profile)
-        seo_data = ai_generator.generate_seo_contents(basic_profile)
-        basic_profile['about'] = about_data
-        basic_profile['seo'] = seo_data
-    except Exception as e:
-        print(f"Failed to generate AI description: {str(e)}")
-        basic_profile['about'] = None
-        basic_profile['seo'] = None
-    if Settings.CACHE_ENABLED:
-        # deep copy the object to avoid modifying the original object
-        tobe_cached = copy.deepcopy(basic_profile)
-        tobe_cached['cached'] = True
-        await redis_client.setex(name=cache_key, value=json.dumps(tobe_cached), time=Settings.DEFAULT_CACHE_TTL)
-    return basic_profile
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield ndjson_event(pending.pop(task), task.result())
+    finally:
+        # The client went away; the AI job still completes the cached profile
+        for task in pending:
+            task.cancel()
+    yield ndjson_event('done', None)
+
+
+class ProfileBatchRequest(BaseModel):
+    usernames: List[str] = Field(min_length=1, max_length=Settings.PROFILE_BATCH_MAX_USERNAMES)
+
+
+async def stream_profiles_batch(usernames: List[str]) -> AsyncIterator[bytes]:
+    """
+    Yield one NDJSON line per username, `{"username", "profile"}` or
+    `{"username", "error"}`, in the order the profiles become available.
+
+    Cached profiles are read with a single MGET and sent first. Misses are
+    fetched a GraphQL batch at a time (see `fetch_basic_github_profiles`),
+    at most `PROFILE_BATCH_CONCURRENCY` batches at once. Stale profiles are
+    sent as they are and refreshed in batches from the same bounded pool,
+    after the stream ends if needed; pending ones only queue their AI job
+    again, see `github_profile_compute`.
+    """
+    valid = []
+    for username in usernames:
+        if username in Settings.BLACKLISTED_USERS:
+            yield ndjson_line({"username": username, "error": f"User {username} is not available."})
+        elif not GitHubProfileFetcher._validate_username_pattern(username):
+            yield ndjson_line({"username": username, "error": "Invalid GitHub username."})
+        else:
+            valid.append(username)
+
+    keys = [f"github_profile_basic:{username}" for username in valid]
+    entries = await response_cache.get_many(keys)
+    semaphore = asyncio.Semaphore(Settings.PROFILE_BATCH_CONCURRENCY)
+    fetcher = profile_batch_fetcher()
+    results = asyncio.Queue()
+
+    def generate(username, cache_key, fetched):
+        async def compute():
+            if isinstance(fetched, Exception):
+                raise fetched
+            return await generate_github_profile(username, cache_key, fetched)
+        return compute
+
+    async def compute(username, cache_key, fetched):
+        try:
+            profile = await response_cache.resolve(cache_key, None, generate(username, cache_key, fetched))
+        except HTTPException as e:
+            await results.put({"username": username, "error": e.detail})
+        except Exception as e:
+            await results.put({"username": username, "error": f"User {username} not found: {str(e)}"})
+        else:
+            await results.put({"username": username, "profile": profile})
+
+    async def refresh(username, cache_key, fetched):
+        await response_cache.refresh(cache_key, generate(username, cache_key, fetched))
+
+    async def work(pending, store):
+        # Batches are taken once a slot is free, at the size the fetcher last adapted to
+        while pending:
+            async with semaphore:
+                batch = [pending.popleft() for _ in range(min(len(pending), fetcher.batch_size))]
+                if not batch:
+                    return
+                batch_usernames = [username for username, _ in batch]
+                try:
+                    fetched = await fetch_basic_github_profiles(batch_usernames, fetcher)
+                except Exception as e:
+                    fetched = dict.fromkeys(batch_usernames, e)
+                await asyncio.gather(*(
+                    store(username, cache_key, fetched[username]) for username, cache_key in batch
+                ))
+
+    misses = deque()
+    stale = deque()
+    for username, cache_key, entry in zip(valid, keys, entries):
+        if entry is None:
+            misses.append((username, cache_key))
+            continue
+        yield ndjson_line({"username": username, "profile": entry.value})
+        if entry.is_stale and entry.value.get('about_status') == 'pending':
+            # Schedules the refresh, which only queues the AI job again
+            await response_cache.resolve(cache_key, entry, github_profile_compute(username, cache_key, entry))
+        elif entry.is_stale:
+            stale.append((username, cache_key))
+
+    for _ in range(min(len(stale), Settings.PROFILE_BATCH_CONCURRENCY)):
+        refresh_task = asyncio.create_task(work(stale, refresh))
+        profile_writes.add(refresh_task)
+        refresh_task.add_done_callback(profile_writes.discard)
+
+    workers = [
+        asyncio.create_task(work(misses, compute))
+        for _ in range(min(len(misses), Settings.PROFILE_BATCH_CONCURRENCY))
+    ]
+    try:
+        for _ in range(sum(entry is None for entry in entries)):
+            yield ndjson_line(await results.get())
+    finally:
+        # The client went away; computations already running finish through
+        # the single-flight and land in the cache
+        for task in workers:
+            task.cancel()
+
+
+async def generate_projects(username: str, cache_key: str) -> Dict[str, Any]:
+    """Rank the user's featured projects and write them to the cache"""
+    with trace_stage("github_projects"):
+        project_data = await (upstream_clients.project_ranker or GitHubProjectRanker()).get_featured_async(username)
+    await response_cache.set(cache_key, project_data)
+    return project_data
+
+
+async def generate_about(
+    username: str,
+    cache_key: str,
+    background_tasks: Optional[BackgroundTasks] = None
+) -> Dict[str, Any]:
+    """Extract the AI about section from the profile and write it to the cache"""
+    user_data = await get_cached_github_profile(username, background_tasks)
+    about_status = user_data.get('about_status', 'ready')
+    data = {
+        "about": user_data.get('about'),
+        "about_status": about_status
+    }
+    await response_cache.set(
+        cache_key,
+        data,
+        # The AI job overwrites it once done; this only bounds a lost job
+        soft_ttl=Settings.AI_PENDING_PROFILE_TTL if about_status == 'pending' else None
+    )
+    return data
+
+
+async def generate_linkedin_profile(username: str, cache_key: str) -> Dict[str, Any]:
+    """Fetch LinkedIn profile data and write it to the cache"""
+    fetcher = upstream_clients.linkedin_fetcher or LinkedInProfileFetcher()
+    with trace_stage("linkedin"):
+        profile_data = await fetcher.fetch_profile_async(username)
+
+    if "error" in profile_data:
+        raise HTTPException(status_code=400, detail=profile_data["error"])
+    await response_cache.set(cache_key, profile_data)
+    return profile_data
+
 
 # API Endpoints
 @app.get("/user/{username}/profile", response_model=Dict[str, Any])
 async def fetch_basic_profile(
-    username: Annotated[str, Depends(verify_username)], 
+    username: Annotated[str, Depends(verify_profile_username)], 
+    request: Request,
     background_tasks: BackgroundTasks
 ):
     """Fetch basic GitHub user profile information"""
+    try:
+        username = username.strip().lower()
+        entry = await get_cached_github_profile_entry(username, background_tasks)
+
+    except Exception as e:
+        raise profile_error(username, e)
+    return cached_response(request, entry)
+
+@app.get("/user/{username}/profile/stream")
+async def stream_basic_profile(
+    username: Annotated[str, Depends(verify_profile_username)],
+    background_tasks: BackgroundTasks
+):
+    """
+    Stream the profile as NDJSON, sending the GitHub data before the AI
+    generated sections so clients can render it without waiting for them.
+    See `stream_profile_sections` for the events.
+    """
+    username = username.strip().lower()
+    try:
+        # Misses join the single-flight for the key like /profile requests,
+        # and the AI sections of a new profile come from its AI job
+        entry = await get_cached_github_profile_entry(username, background_tasks)
+    except Exception as e:
+        raise profile_error(username, e)
+
+    if entry.value.get('about_status') == 'pending':
+        sections = ai_sections_from_job(username, f"github_profile_basic:{username}")
+    else:
+        sections = {}
+    return StreamingResponse(stream_profile_sections(entry.value, sections), media_type="application/x-ndjson")
+
+@app.get("/user/{username}/profile/status")
+async def fetch_profile_status(username: Annotated[str, Depends(verify_username)]):
+    """
+    Poll the AI sections of a profile: `about_status` is pending or ready,
+    None before the profile was first requested, and `job` is the status
+    of its AI job (see `JobQueue.status`), None if there is none.
+    """
     username = username.strip().lower()
-    return await get_cached_github_profile(username)
+    entry = await response_cache.get(f"github_profile_basic:{username}")
+    return JSONResponse(
+        {
+            "username": username,
+            # Profiles cached before the AI job queue always have their sections
+            "about_status": entry.value.get('about_status', 'ready') if entry is not None else None,
+            "job": await ai_jobs.status(username)
+        },
+        headers={"Cache-Control": "no-store"}
+    )
+
+@app.post("/users/profiles")
+async def fetch_profiles_batch(batch: ProfileBatchRequest):
+    """
+    Fetch the profiles of many users, streamed back as NDJSON lines as they
+    are ready. Usernames are deduplicated case-insensitively.
+    See `stream_profiles_batch` for the lines.
+    """
+    usernames = list(dict.fromkeys(username.strip().lower() for username in batch.usernames))
+    return StreamingResponse(stream_profiles_batch(usernames), media_type="application/x-ndjson")
 
 @app.get("/user/{username}/projects", response_model=Dict[str, Any])
-async def fetch_projects_data(username: Annotated[str, Depends(verify_username)]):
+async def fetch_projects_data(
+    username: Annotated[str, Depends(verify_username)],
+    request: Request,
+    background_tasks: BackgroundTasks
+):
     """Fetch GitHub user's projects and languages data"""
     try:
         username = username.strip().lower()
         cache_key = f"github_profile_projects:{username}"
-        if Settings.CACHE_ENABLED:
-            cached_response = await redis_client.get(cache_key)
-
-            if cached_response and not Settings.DEBUG:
-                return json.loads(cached_response)
-
-        project_data = GitHubProjectRanker().get_featured(username)
-        if Settings.CACHE_ENABLED:
-            await redis_client.setex(name=cache_key, value=json.dumps(project_data), time=Settings.DEFAULT_CACHE_TTL)
-        return project_data
+        entry = await response_cache.get_or_compute_entry(
+            cache_key,
+            lambda: generate_projects(username, cache_key),
+            background_tasks,
+            use_cached=not Settings.DEBUG
+        )
 
     except Exception as e:
         raise HTTPException(status_code=404, detail=f"User {username} not found: {str(e)}")
+    return cached_response(request, entry)
 
 @app.get("/user/{username}/about", response_model=Dict[str, Any])
-async def fetch_about_data(username: Annotated[str, Depends(verify_username)]):
+async def fetch_about_data(
+    username: Annotated[str, Depends(verify_profile_username)],
+    request: Request,
+    background_tasks: BackgroundTasks
+):
     """Fetch GitHub user's README content"""
     try:
         username = username.strip().lower()
         cache_key = f"github_profile_about:{username}"
-        if Settings.CACHE_ENABLED:
-            cached_response = await redis_client.get(cache_key)
-
-            if cached_response and not Settings.DEBUG:
-                return json.loads(cached_response)
-
-        user_data = await get_cached_github_profile(username)
-        data = {
-            "about": user_data['about']
-        }
-        if Settings.CACHE_ENABLED:
-            await redis_client.setex(name=cache_key, value=json.dumps(data), time=Settings.DEFAULT_CACHE_TTL)
-        return data
+        entry = await response_cache.get_or_compute_entry(
+            cache_key,
+            lambda: generate_about(username, cache_key, background_tasks),
+            background_tasks,
+            use_cached=not Settings.DEBUG
+        )
 
     except Exception as e:
-        raise HTTPException(status_code=404, detail=f"User {username} not found: {str(e)}")
+        raise profile_error(username, e)
+    return cached_response(request, entry)
 
 @app.get("/user/{username}/linkedin", response_model=Dict[str, Any])
-async def fetch_linkedin_profile(username: Annotated[str, Depends(verify_linkedin_username)]):
+async def fetch_linkedin_profile(
+    username: Annotated[str, Depends(verify_linkedin_username)],
+    request: Request,
+    background_tasks: BackgroundTasks
+):
     """Fetch LinkedIn profile data"""
     try:
         cache_key = f"linkedin_profile:{username}"
-        if Settings.CACHE_ENABLED:
-            cached_response = await redis_client.get(cache_key)
-        
-            if cached_response and not Settings.DEBUG:
-                return json.loads(cached_response)
-
-        fetcher = LinkedInProfileFetcher()
-        profile_data = await fetcher.fetch_profile_async(username)
-        
-        if "error" in profile_data:
-            raise HTTPException(status_code=400, detail=profile_data["error"])
-        if Settings.CACHE_ENABLED:
-            await redis_client.setex(name=cache_key, value=json.dumps(profile_data), time=Settings.DEFAULT_CACHE_TTL)
-        return profile_data
+        entry = await response_cache.get_or_compute_entry(
+            cache_key,
+            lambda: generate_linkedin_profile(username, cache_key),
+            background_tasks,
+            use_cached=not Settings.DEBUG
+        )
 
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch LinkedIn profile: {str(e)}")
+    return cached_response(request, entry)
+
+@app.get("/user/{username}/bundle", response_model=Dict[str, Any])
+async def fetch_profile_bundle(
+    username: Annotated[str, Depends(verify_profile_username)],
+    request: Request,
+    background_tasks: BackgroundTasks
+):
+    """
+    Fetch the profile, projects, about and LinkedIn data in one request.
+
+    Cached parts are read with a single MGET and only the missing ones are
+    computed, concurrently. The LinkedIn profile depends on the GitHub
+    profile's social accounts and is chained after it, so the response takes
+    as long as the slowest chain instead of the sum of all sub-fetches.
+    Projects are chained after the profile too unless the username is known
+    to be a user, so missing accounts never reach the project fetchers.
+    Projects and LinkedIn data are None when they cannot be fetched.
+    """
+    username = username.strip().lower()
+    profile_key = f"github_profile_basic:{username}"
+    projects_key = f"github_profile_projects:{username}"
+    profile_entry, projects_entry = await response_cache.get_many([profile_key, projects_key])
+    profile_task = asyncio.ensure_future(response_cache.resolve_entry(
+        profile_key,
+        profile_entry,
+        github_profile_compute(username, profile_key, profile_entry),
+        background_tasks
+    ))
+    known_user = profile_entry is not None or await cached_github_username(response_cache, username) is True
+
+    async def resolve_linkedin():
+        profile = await profile_task
+        linkedin_username = LinkedInProfileFetcher.username_from_social_accounts(
+            profile.value.get('social_accounts')
+        )
+        if linkedin_username is None:
+            return None
+
+        linkedin_key = f"linkedin_profile:{linkedin_username}"
+        try:
+            return await response_cache.get_or_compute_entry(
+                linkedin_key,
+                lambda: generate_linkedin_profile(linkedin_username, linkedin_key),
+                background_tasks,
+                use_cached=not Settings.DEBUG
+            )
+        except Exception as e:
+            print(f"Failed to fetch LinkedIn profile {linkedin_username}: {str(e)}")
+            return None
+
+    async def resolve_projects():
+        if not known_user:
+            await profile_task
+        return await response_cache.resolve_entry(
+            projects_key,
+            projects_entry if not Settings.DEBUG else None,
+            lambda: generate_projects(username, projects_key),
+            background_tasks
+        )
+
+    profile, linkedin, projects = await asyncio.gather(
+        profile_task,
+        resolve_linkedin(),
+        resolve_projects(),
+        return_exceptions=True
+    )
+    if isinstance(profile, Exception):
+        raise profile_error(username, profile)
+    if isinstance(projects, Exception):
+        print(f"Failed to fetch projects for {username}: {str(projects)}")
+        projects = None
+
+    parts = [profile, projects, linkedin]
+    # Missing parts still contribute, so the ETag changes once they appear
+    etag = combine_etags(part.etag if part is not None else "none" for part in parts)
+    bundle = CacheEntry(
+        fresh_until=min(part.fresh_until for part in parts if part is not None),
+        etag=etag,
+        load=lambda: {
+            "profile": profile.value,
+            "projects": projects.value if projects is not None else None,
+            "about": profile.value.get('about'),
+            "linkedin": linkedin.value if linkedin is not None else None
+        }
+    )
+    return cached_response(request, bundle)
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return Response(REGISTRY.render(), media_type=REGISTRY.CONTENT_TYPE)
+
 
 ALLOWED_ORIGINS = [
     "https://devb.io",
@@ -175,11 +780,15 @@ app.add_middleware(
     allow_origins=ALLOWED_ORIGINS,  # Use the whitelist instead of "*"
     allow_credentials=True,
     allow_methods=["GET", "OPTIONS"],  # Specify allowed methods
-    allow_headers=["Authorization", "Content-Type", "X-API-Key"],  # Specify allowed headers
-    expose_headers=[],  # Headers that can be exposed to the browser
+    allow_headers=["Authorization", "Content-Type", "X-API-Key", "If-None-Match"],  # Specify allowed headers
+    expose_headers=["ETag", "Server-Timing"],  # Headers that can be exposed to the browser
     max_age=600,  # How long the results of a preflight request can be cached (in seconds)
 
 )
 
+app.add_middleware(ServerTimingMiddleware, slow_threshold=Settings.SLOW_REQUEST_THRESHOLD)
+# Outermost, so the recorded latency covers every other middleware
+app.add_middleware(MetricsMiddleware)
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
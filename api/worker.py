@@ -0,0 +1,28 @@
+"""
+AI job worker, to scale AI generation independently of the web tier:
+
+    AI_WORKER_CONCURRENCY=0 uvicorn api.main:app --host 0.0.0.0 --port 8000
+    AI_WORKER_CONCURRENCY=8 python -m api.worker
+
+Needs the same Redis as the API processes.
+"""
+import asyncio
+
+from api.main import ai_jobs, response_cache, upstream_clients
+from config.settings import Settings
+
+
+async def main():
+    await upstream_clients.start()
+    try:
+        # Keeps the memory tier coherent with the API processes, like their lifespan
+        await asyncio.gather(
+            response_cache.listen_for_invalidations(),
+            ai_jobs.run(max(Settings.AI_WORKER_CONCURRENCY, 1))
+        )
+    finally:
+        await upstream_clients.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
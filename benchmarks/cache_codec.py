@@ -0,0 +1,108 @@
+"""
+Compare cache codecs on synthetic profile and projects payloads.
+
+Reports encoded size, projected Redis memory per 10k profiles and
+encode/decode time per payload for every serializer/compression pair.
+With --redis-url the memory figure is measured with `MEMORY USAGE` on
+sample keys instead of being estimated from payload sizes.
+
+    python -m benchmarks.cache_codec --samples 500
+    python -m benchmarks.cache_codec --redis-url redis://localhost:6378/0
+"""
+import argparse
+import random
+import statistics
+import time
+import uuid
+
+from benchmarks.data import make_profile, make_projects
+from utils.base_command import BaseCommand
+from utils.codec import COMPRESSIONS, SERIALIZERS, CacheCodec
+
+PROFILES_PER_REPORT = 10_000
+# Approximate per-key bookkeeping of a Redis string with an expiry
+REDIS_KEY_OVERHEAD = 80
+
+
+class CacheCodecBenchmark(BaseCommand):
+    def add_arguments(self, parser):
+        parser.add_argument("--samples", type=int, default=300, help="Number of synthetic profiles")
+        parser.add_argument("--repeat", type=int, default=3, help="Timing repetitions per codec")
+        parser.add_argument("--threshold", type=int, default=1024, help="Compression threshold in bytes")
+        parser.add_argument("--redis-url", help="Measure memory on this Redis instead of estimating it")
+        parser.add_argument("--seed", type=int, default=42)
+
+    def run(self, args):
+        rng = random.Random(args.seed)
+        payloads = []
+        for i in range(args.samples):
+            payloads.append(make_profile(rng, i))
+            payloads.append(make_projects(rng))
+        fresh_until = time.time()
+        profiles = payloads[::2]
+
+        redis_client = None
+        if args.redis_url:
+            import redis
+            redis_client = redis.Redis.from_url(args.redis_url)
+
+        print(f"{len(profiles)} profiles, {len(payloads) - len(profiles)} projects payloads\n")
+        header = f"{'codec':<18}{'avg profile B':>14}{'MB / 10k':>10}{'encode us':>11}{'decode us':>11}"
+        print(header)
+        print("-" * len(header))
+
+        for serializer in SERIALIZERS:
+            for compression in COMPRESSIONS:
+                codec = CacheCodec(serializer, compression, args.threshold)
+                encoded = [codec.encode(payload, fresh_until) for payload in payloads]
+                encoded_profiles = encoded[::2]
+
+                encode_us = self._time_per_item(lambda: [codec.encode(p, fresh_until) for p in payloads], len(payloads), args.repeat)
+                decode_us = self._time_per_item(lambda: [codec.decode(e) for e in encoded], len(encoded), args.repeat)
+
+                avg_profile = statistics.mean(len(e) for e in encoded_profiles)
+                if redis_client is not None:
+                    per_key = self._measure_redis(redis_client, encoded_profiles)
+                else:
+                    per_key = avg_profile + REDIS_KEY_OVERHEAD
+                memory_mb = per_key * PROFILES_PER_REPORT / 1024 / 1024
+
+                print(f"{codec.name:<18}{avg_profile:>14,.0f}{memory_mb:>10.1f}{encode_us:>11.1f}{decode_us:>11.1f}")
+
+        if redis_client is None:
+            print(f"\nMemory is estimated as payload + {REDIS_KEY_OVERHEAD} B per key; pass --redis-url to measure it.")
+
+    @staticmethod
+    def _time_per_item(fn, count, repeat):
+        best = min(CacheCodecBenchmark._timed(fn) for _ in range(repeat))
+        return best / count * 1_000_000
+
+    @staticmethod
+    def _timed(fn):
+        start = time.perf_counter()
+        fn()
+        return time.perf_counter() - start
+
+    @staticmethod
+    def _measure_redis(redis_client, encoded_profiles):
+        """Average `MEMORY USAGE` of the payloads stored under throwaway keys"""
+        prefix = f"benchmark:codec:{uuid.uuid4().hex}"
+        keys = [f"{prefix}:{i}" for i in range(len(encoded_profiles))]
+        pipeline = redis_client.pipeline()
+        for key, value in zip(keys, encoded_profiles):
+            pipeline.setex(key, 300, value)
+        pipeline.execute()
+        try:
+            pipeline = redis_client.pipeline()
+            for key in keys:
+                pipeline.memory_usage(key, samples=0)
+            return statistics.mean(pipeline.execute())
+        finally:
+            redis_client.delete(*keys)
+
+
+if __name__ == "__main__":
+    command = CacheCodecBenchmark()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    command.add_arguments(parser)
+    command.run(parser.parse_args())
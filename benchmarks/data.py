@@ -0,0 +1,199 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+WORDS = (
+    "python rust typescript react nextjs fastapi django kubernetes docker redis postgres "
+    "machine learning open source developer backend frontend fullstack cloud devops api "
+    "building shipping community contributor maintainer projects tools library framework"
+).split()
+
+
+def lorem(rng: random.Random, size: int) -> str:
+    """Markdown-ish filler text of roughly `size` characters"""
+    parts = []
+    length = 0
+    while length < size:
+        if rng.random() < 0.08:
+            chunk = f"\n## {rng.choice(WORDS).title()}\n"
+        elif rng.random() < 0.05:
+            chunk = f"[{rng.choice(WORDS)}](https://github.com/{rng.choice(WORDS)}/{rng.choice(WORDS)}) "
+        else:
+            chunk = rng.choice(WORDS) + " "
+        parts.append(chunk)
+        length += len(chunk)
+    return "".join(parts)[:size]
+
+
+def readme_size(rng: random.Random) -> int:
+    """README sizes skewed like real profiles: many empty, a long tail of large ones"""
+    roll = rng.random()
+    if roll < 0.35:
+        return 0
+    if roll < 0.85:
+        return rng.randint(500, 6_000)
+    if roll < 0.98:
+        return rng.randint(6_000, 30_000)
+    return rng.randint(30_000, 200_000)
+
+
+def make_profile(rng: random.Random, index: int) -> dict:
+    """A cached profile payload as written by the profile endpoint"""
+    username = f"user{index}"
+    return {
+        "username": username,
+        "name": f"User {index}",
+        "bio": lorem(rng, rng.randint(0, 160)),
+        "location": "Kerala, India",
+        "avatar_url": f"https://avatars.githubusercontent.com/u/{index}?v=4",
+        "profile_url": f"https://github.com/{username}",
+        "followers": rng.randint(0, 5_000),
+        "following": rng.randint(0, 500),
+        "public_repos": rng.randint(0, 300),
+        "pull_requests_merged": rng.randint(0, 99),
+        "issues_closed": rng.randint(0, 99),
+        "achievements": {
+            "total_contributions": rng.randint(0, 4_000),
+            "repositories_contributed_to": rng.randint(0, 100),
+        },
+        "social_accounts": [
+            {"provider": "linkedin", "url": f"https://www.linkedin.com/in/{username}"},
+            {"provider": "twitter", "url": f"https://twitter.com/{username}"},
+        ],
+        "readme_content": lorem(rng, readme_size(rng)),
+        "cached": True,
+        "about": lorem(rng, 400),
+        "seo": {
+            "title": f"User {index} (@{username}). Developer passionate about {rng.choice(WORDS)}",
+            "description": lorem(rng, 150),
+            "keywords": ", ".join(rng.sample(WORDS, 10)),
+        },
+    }
+
+
+def make_projects(rng: random.Random, count: int = 8) -> dict:
+    """A cached projects payload as written by the projects endpoint"""
+    return {
+        "top_projects": [
+            {
+                "name": f"repo-{i}",
+                "description": lorem(rng, rng.randint(20, 120)),
+                "score": rng.random() * 20,
+                "stars": rng.randint(0, 2_000),
+                "forks": rng.randint(0, 300),
+                "language": rng.choice(["Python", "Rust", "TypeScript"]),
+                "url": f"https://github.com/user/repo-{i}",
+                "updatedAt": "2024-06-01T10:00:00Z",
+                "isPinned": i < 3,
+                "homepage": "",
+            }
+            for i in range(count)
+        ],
+        "top_languages": [["Python", 12], ["Rust", 4], ["TypeScript", 3]],
+    }
+
+
+def make_repo(rng: random.Random, owner: str, index: int) -> dict:
+    """A repository as listed by the GitHub REST API"""
+    return {
+        "name": f"repo-{index}",
+        "full_name": f"{owner}/repo-{index}",
+        "description": lorem(rng, rng.randint(0, 120)) or None,
+        "stargazers_count": rng.randint(0, 2_000),
+        "forks_count": rng.randint(0, 300),
+        "language": rng.choice(["Python", "Rust", "TypeScript", None]),
+        "html_url": f"https://github.com/{owner}/repo-{index}",
+        "homepage": rng.choice(["", None, f"https://{owner}.github.io/repo-{index}"]),
+        "created_at": f"20{rng.randint(15, 23)}-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}T10:00:00Z",
+        "updated_at": f"2024-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}T10:00:00Z",
+        "fork": rng.random() < 0.2,
+        "archived": rng.random() < 0.05,
+    }
+
+
+def make_readme(rng: random.Random, username: str, size: int) -> str:
+    """A profile README of `size` characters with social links, near misses among them"""
+    text = lorem(rng, size)
+    links = [
+        f"https://www.linkedin.com/in/{username}",
+        f"https://linkedin.com/in/{rng.choice(WORDS)}-{rng.choice(WORDS)}",
+        f"https://medium.com/@{username[:-1]}",
+        f"https://{rng.choice(WORDS)}.medium.com/",
+    ]
+    # Roughly one link every 2KB, like badge-heavy READMEs
+    for _ in range(size // 2048):
+        position = rng.randint(0, len(text))
+        text = f"{text[:position]} {rng.choice(links)} {text[position:]}"
+    return text
+
+
+def make_graphql_user(rng: random.Random, username: str, nodes: int = 100) -> dict:
+    """The `user` object of the profile GraphQL query with its counts, with up to `nodes` items per connection"""
+    profile = make_profile(rng, 0)
+
+    def timestamp(days_ago):
+        return (datetime.now(timezone.utc) - timedelta(days=days_ago)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    return {
+        "__typename": "User",
+        "name": profile["name"],
+        "bio": profile["bio"],
+        "location": profile["location"],
+        "avatarUrl": profile["avatar_url"],
+        "url": f"https://github.com/{username}",
+        "followers": {"totalCount": profile["followers"]},
+        "following": {"totalCount": profile["following"]},
+        "socialAccounts": {"nodes": [
+            {"provider": "TWITTER", "url": f"https://twitter.com/{username}"},
+        ] + ([{"provider": "LINKEDIN", "url": f"https://www.linkedin.com/in/{username}"}] if rng.random() < 0.6 else [])},
+        "repository": {
+            "object": {"text": make_readme(rng, username, readme_size(rng))},
+            "defaultBranchRef": {"name": "main"},
+        },
+        "repositories": {
+            "totalCount": max(profile["public_repos"], nodes),
+            "nodes": [
+                {
+                    "name": f"repo-{i}",
+                    "description": lorem(rng, 60),
+                    "stargazerCount": rng.randint(0, 500),
+                    "primaryLanguage": {"name": rng.choice(["Python", "Rust", "TypeScript"])},
+                    "url": f"https://github.com/{username}/repo-{i}",
+                    "updatedAt": timestamp(rng.randint(0, 900)),
+                }
+                for i in range(nodes)
+            ],
+        },
+        "contributionsCollection": {
+            "contributionCalendar": {"totalContributions": profile["achievements"]["total_contributions"]},
+            "pullRequestContributionsByRepository": [],
+            "issueContributionsByRepository": [],
+        },
+        # Root fields of the query, merged into the user by `_profile_owner`
+        "mergedPullRequests": {"issueCount": profile["pull_requests_merged"]},
+        "closedIssues": {"issueCount": profile["issues_closed"]},
+        "repositoriesContributedTo": {
+            "totalCount": profile["achievements"]["repositories_contributed_to"],
+            "nodes": [],
+        },
+    }
+
+
+def make_events(rng: random.Random, username: str, count: int) -> list:
+    """Events as listed by the GitHub API, most recent first"""
+    kinds = ["PushEvent", "PullRequestEvent", "WatchEvent", "IssueCommentEvent", "CreateEvent"]
+    events = []
+    for i in range(count):
+        kind = rng.choice(kinds)
+        payload = {}
+        if kind == "PushEvent":
+            payload = {"commits": [{"message": lorem(rng, rng.randint(10, 200))} for _ in range(rng.randint(1, 5))]}
+        elif kind == "PullRequestEvent":
+            payload = {"pull_request": {"title": lorem(rng, 50), "body": lorem(rng, rng.randint(0, 2000))}}
+        created_at = datetime.now(timezone.utc) - timedelta(hours=i * 6)
+        events.append({
+            "type": kind,
+            "repo": {"name": f"{username}/repo-{rng.randint(0, 20)}"},
+            "created_at": created_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "payload": payload,
+        })
+    return events
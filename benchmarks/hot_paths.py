@@ -0,0 +1,155 @@
+"""
+Microbenchmarks of the CPU-bound paths that grow with the size of a user.
+
+Times each function on synthetic inputs, from a small account up to one
+with 5,000 repositories and a 200KB README, records its peak traced
+memory, and compares both with the stored baselines: cases slower or
+bigger than the baseline by more than the tolerance are flagged and the
+command exits with status 1.
+
+Baselines depend on the machine; save them once before a change and
+compare after it:
+
+    python -m benchmarks.hot_paths --save-baseline
+    python -m benchmarks.hot_paths
+    python -m benchmarks.hot_paths --only readme --repeat 10
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+from benchmarks.data import make_events, make_graphql_user, make_readme, make_repo
+from utils.base_command import BaseCommand
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "hot_paths.json")
+USERNAME = "octocat"
+# Input sizes per user tier. GraphQL connections are capped at 100 nodes and
+# the events API at 300 events.
+SIZES = {
+    "small": {"repos": 10, "readme": 2_000, "nodes": 10, "events": 30},
+    "medium": {"repos": 300, "readme": 30_000, "nodes": 100, "events": 100},
+    "large": {"repos": 5_000, "readme": 200_000, "nodes": 100, "events": 300},
+}
+
+
+def build_cases(seed):
+    """(name, zero-argument callable) of every benchmarked function and size"""
+    from modules.contributions_fetcher import GitHubContributionsFetcher
+    from modules.github_fetcher import GitHubProfileFetcher
+    from modules.github_projects import GitHubProjectRanker
+
+    ranker = GitHubProjectRanker()
+    cases = []
+    for tier, size in SIZES.items():
+        rng = random.Random(seed)
+        repos = [make_repo(rng, USERNAME, i) for i in range(size["repos"])]
+        pinned = [repo["name"] for repo in repos[:6]]
+        readme = make_readme(rng, USERNAME, size["readme"])
+        graphql_user = make_graphql_user(rng, USERNAME, size["nodes"])
+        events = make_events(rng, USERNAME, size["events"])
+
+        cases += [
+            (f"project_score/{tier}", lambda repos=repos, pinned=pinned: [
+                ranker.calculate_project_score(repo, pinned) for repo in repos
+            ]),
+            (f"top_languages/{tier}", lambda repos=repos: ranker.get_top_languages(repos)),
+            (f"rank_featured/{tier}", lambda repos=repos, pinned=pinned: ranker._rank_featured(repos, pinned, 8)),
+            (f"readme_links/{tier}", lambda readme=readme: GitHubProfileFetcher.extract_social_links(readme, USERNAME)),
+            (f"build_profile/{tier}", lambda user=graphql_user: GitHubProfileFetcher._build_profile(USERNAME, user)),
+            (f"events/{tier}", lambda events=events: GitHubContributionsFetcher._process_events(events)),
+        ]
+    return cases
+
+
+class HotPathsBenchmark(BaseCommand):
+    def add_arguments(self, parser):
+        parser.add_argument("--only", help="Run the cases whose name contains this text")
+        parser.add_argument("--repeat", type=int, default=5, help="Timing repetitions, the best one is reported")
+        parser.add_argument("--min-time", type=float, default=0.2, help="Seconds each repetition runs for")
+        parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline file")
+        parser.add_argument("--save-baseline", action="store_true", help="Store these results as the baseline")
+        parser.add_argument("--time-tolerance", type=float, default=0.5, help="Allowed slowdown, 0.5 = 50%%")
+        parser.add_argument("--memory-tolerance", type=float, default=0.1, help="Allowed peak memory growth")
+        parser.add_argument("--seed", type=int, default=42)
+
+    def run(self, args):
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+
+        header = f"{'case':<24}{'time ms':>11}{'peak KB':>10}{'vs baseline':>22}"
+        print(header)
+        print("-" * len(header))
+
+        results = {}
+        regressions = []
+        for name, fn in build_cases(args.seed):
+            if args.only and args.only not in name:
+                continue
+            result = {"ms": self._time(fn, args.repeat, args.min_time) * 1000, "peak_kb": self._peak(fn) / 1024}
+            results[name] = result
+
+            comparison = ""
+            if name in baseline and not args.save_baseline:
+                time_change = result["ms"] / baseline[name]["ms"] - 1
+                memory_change = result["peak_kb"] / max(baseline[name]["peak_kb"], 1) - 1
+                comparison = f"{time_change:+.0%} time {memory_change:+.0%} mem"
+                if time_change > args.time_tolerance or memory_change > args.memory_tolerance:
+                    regressions.append(name)
+                    comparison += "  !"
+            print(f"{name:<24}{result['ms']:>11.3f}{result['peak_kb']:>10.1f}{comparison:>22}")
+
+        if args.save_baseline:
+            os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+            # Cases left out with --only keep their previous baseline
+            with open(args.baseline, "w") as f:
+                json.dump({**baseline, **results}, f, indent=2, sort_keys=True)
+                f.write("\n")
+            print(f"\nBaseline saved to {args.baseline}")
+        elif not baseline:
+            print(f"\nNo baseline at {args.baseline}; run with --save-baseline to store one.")
+        elif regressions:
+            print(f"\n{len(regressions)} regressions: {', '.join(regressions)}")
+            sys.exit(1)
+
+    @staticmethod
+    def _time(fn, repeat, min_time):
+        """Best seconds per call over `repeat` runs of at least `min_time` seconds"""
+        fn()  # warm up caches, e.g. compiled regular expressions
+        number = 1
+        while True:
+            elapsed = HotPathsBenchmark._timed(fn, number)
+            if elapsed >= min_time / 10:
+                break
+            number *= 10
+        number = max(1, int(number * min_time / elapsed))
+        return min(HotPathsBenchmark._timed(fn, number) for _ in range(repeat)) / number
+
+    @staticmethod
+    def _timed(fn, number):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        return time.perf_counter() - start
+
+    @staticmethod
+    def _peak(fn):
+        """Peak traced bytes allocated by one call"""
+        tracemalloc.start()
+        try:
+            fn()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+
+if __name__ == "__main__":
+    command = HotPathsBenchmark()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    command.add_arguments(parser)
+    command.run(parser.parse_args())
@@ -0,0 +1,177 @@
+"""
+Load test the API against local stand-ins of GitHub, Groq and LinkedIn.
+
+Starts the stand-ins (benchmarks/stand_ins.py), points the API at them and
+serves it with uvicorn in this process, then drives four scenarios:
+
+    cold      every request is for a user the API has not seen
+    warm      the cold requests again, answered from the cache
+    stampede  many concurrent requests for one new user, released together
+    bulk      one batch request for many new users, fetched from GitHub in
+              aliased GraphQL batches
+
+and reports throughput, latency percentiles and the calls each request
+cost upstream. Without --redis-url the API runs on its memory cache tier.
+
+    python -m benchmarks.load_test --users 50 --concurrency 20
+    python -m benchmarks.load_test --latency 0.2 --error-rate 0.05 --redis-url redis://localhost:6378/0
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+import uuid
+from collections import Counter
+
+import httpx
+
+from benchmarks.stand_ins import Behaviour, GitHubStandIn, GroqStandIn, LinkedInStandIn, LocalServer
+from utils.base_command import BaseCommand
+
+API_KEY = "load-test"
+ENDPOINTS = ("profile", "projects", "about", "bundle")
+# Nothing listens here, so the API falls back to its memory cache tier
+UNREACHABLE_REDIS_URL = "redis://127.0.0.1:1/0"
+
+
+class LoadTest(BaseCommand):
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=30, help="New users in the cold and warm scenarios")
+        parser.add_argument("--concurrency", type=int, default=10, help="Requests in flight at once")
+        parser.add_argument("--stampede", type=int, default=50, help="Concurrent requests for one user")
+        parser.add_argument("--bulk", type=int, default=100, help="New users in the batch request")
+        parser.add_argument("--latency", type=float, default=0.05, help="Median upstream latency in seconds")
+        parser.add_argument("--jitter", type=float, default=0.5, help="Sigma of the lognormal latency spread")
+        parser.add_argument("--error-rate", type=float, default=0.0, help="Share of upstream requests failing")
+        parser.add_argument("--rate-limit", type=int, default=5000, help="Upstream requests per credential")
+        parser.add_argument("--redis-url", help="Redis for the API cache and job queue")
+        parser.add_argument("--seed", type=int, default=42)
+
+    def run(self, args):
+        asyncio.run(self._run(args))
+
+    async def _run(self, args):
+        behaviour = Behaviour(args.latency, args.jitter, args.error_rate, args.rate_limit)
+        stand_ins = {
+            "github": GitHubStandIn(behaviour, args.seed),
+            "groq": GroqStandIn(behaviour, args.seed),
+            "linkedin": LinkedInStandIn(behaviour, args.seed),
+        }
+        async with LocalServer(stand_ins["github"]) as github, \
+                LocalServer(stand_ins["groq"]) as groq, \
+                LocalServer(stand_ins["linkedin"]) as linkedin:
+            self._configure(args, github.url, groq.url, f"{linkedin.url}{LinkedInStandIn.PATH}")
+            # Settings are read on import, so the API is imported once they point at the stand-ins
+            from api.main import app
+
+            async with LocalServer(app, lifespan="on") as api:
+                async with httpx.AsyncClient(
+                    base_url=api.url,
+                    headers={"X-API-Key": API_KEY},
+                    timeout=120,
+                    limits=httpx.Limits(max_connections=max(args.concurrency, args.stampede))
+                ) as client:
+                    run_id = uuid.uuid4().hex[:6]
+                    paths = [
+                        f"/user/lt{run_id}-{i}/{ENDPOINTS[i % len(ENDPOINTS)]}"
+                        for i in range(args.users)
+                    ]
+                    print(f"Upstream median latency {args.latency * 1000:.0f} ms, error rate {args.error_rate:.0%}, "
+                          f"Redis {'on' if args.redis_url else 'off'}\n")
+                    header = (f"{'scenario':<10}{'requests':>9}{'errors':>8}{'rps':>8}"
+                              f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}  upstream calls")
+                    print(header)
+                    print("-" * len(header))
+
+                    await self._scenario("cold", client, paths, args.concurrency, stand_ins)
+                    await self._scenario("warm", client, paths, args.concurrency, stand_ins)
+                    stampede = [f"/user/lt{run_id}-stampede/profile"] * args.stampede
+                    await self._scenario("stampede", client, stampede, args.stampede, stand_ins)
+                    await self._bulk(client, [f"lt{run_id}-bulk-{i}" for i in range(args.bulk)], stand_ins)
+
+    @staticmethod
+    def _configure(args, github_url, groq_url, linkedin_url):
+        os.environ.update({
+            "GITHUB_API_URL": github_url,
+            "GROQ_BASE_URL": groq_url,
+            "LINKEDIN_API_URL": linkedin_url,
+            "API_TOKEN_GITHUB": "stand-in-token-1,stand-in-token-2",
+            "GROQ_API_KEY": "stand-in-key-1,stand-in-key-2",
+            "REDIS_URL": args.redis_url or UNREACHABLE_REDIS_URL,
+            "GITHUB_HTTP2": "false",
+            "SLOW_REQUEST_THRESHOLD": "0",
+        })
+        os.environ.setdefault("API_KEYS", API_KEY)
+        if API_KEY not in os.environ["API_KEYS"].split(","):
+            os.environ["API_KEYS"] += f",{API_KEY}"
+
+    async def _scenario(self, name, client, paths, concurrency, stand_ins):
+        """Request every path with at most `concurrency` in flight, then report"""
+        calls_before = {upstream: sum(stand_in.calls.values()) for upstream, stand_in in stand_ins.items()}
+        semaphore = asyncio.Semaphore(concurrency)
+        release = asyncio.Event()
+        latencies = []
+        statuses = Counter()
+        ai_statuses = Counter()
+
+        async def request(path):
+            await release.wait()
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                except httpx.HTTPError as e:
+                    statuses[e.__class__.__name__] += 1
+                    return
+                finally:
+                    latencies.append(time.perf_counter() - start)
+                statuses[response.status_code] += 1
+                if path.endswith("/profile") and response.status_code == 200:
+                    ai_statuses[response.json().get("about_status", "ready")] += 1
+
+        tasks = [asyncio.create_task(request(path)) for path in paths]
+        # Let every task reach the gate, so stampede requests arrive together
+        await asyncio.sleep(0)
+        start = time.perf_counter()
+        release.set()
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+
+        errors = sum(count for status, count in statuses.items() if status != 200)
+        percentiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+        calls = ", ".join(
+            f"{upstream} {sum(stand_in.calls.values()) - calls_before[upstream]}"
+            for upstream, stand_in in stand_ins.items()
+        )
+        print(f"{name:<10}{len(paths):>9}{errors:>8}{len(paths) / elapsed:>8.1f}"
+              f"{percentiles[49] * 1000:>9.0f}{percentiles[94] * 1000:>9.0f}{percentiles[98] * 1000:>9.0f}  {calls}")
+        if errors:
+            print(f"{'':<10}statuses: {dict(statuses)}")
+        if ai_statuses:
+            print(f"{'':<10}profiles with AI sections: {dict(ai_statuses)}")
+
+    @staticmethod
+    async def _bulk(client, usernames, stand_ins):
+        """Request the profiles of every username in one batch request, then report"""
+        calls_before = {upstream: sum(stand_in.calls.values()) for upstream, stand_in in stand_ins.items()}
+        start = time.perf_counter()
+        response = await client.post("/users/profiles", json={"usernames": usernames})
+        lines = [json.loads(line) for line in response.text.splitlines() if line]
+        elapsed = time.perf_counter() - start
+
+        errors = sum("error" in line for line in lines) + len(usernames) - len(lines)
+        calls = ", ".join(
+            f"{upstream} {sum(stand_in.calls.values()) - calls_before[upstream]}"
+            for upstream, stand_in in stand_ins.items()
+        )
+        print(f"{'bulk':<10}{len(usernames):>9}{errors:>8}{len(usernames) / elapsed:>8.1f}"
+              f"{elapsed * 1000:>9.0f}{elapsed * 1000:>9.0f}{elapsed * 1000:>9.0f}  {calls}")
+
+
+if __name__ == "__main__":
+    command = LoadTest()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    command.add_arguments(parser)
+    command.run(parser.parse_args())
@@ -0,0 +1,153 @@
+"""
+Benchmark the profile, projects and AI pipelines offline, on recorded upstream traffic.
+
+Replays a fixture of GitHub, Groq and LinkedIn exchanges (utils/replay.py)
+under the fetchers and reports the latency and Python allocations of
+`fetch_user_profile_async`, `get_featured_async` and the AI sections per
+user. By default responses are answered immediately, which isolates the
+API's own CPU time; --original-timing delays them as they were recorded.
+
+Record a fixture first, from the real APIs (needs API_TOKEN_GITHUB and
+GROQ_API_KEY) or from the local stand-ins of benchmarks/stand_ins.py:
+
+    python -m benchmarks.replay --record --users octocat,torvalds --fixture /tmp/real.jsonl.gz
+    python -m benchmarks.replay --record --stand-ins
+    python -m benchmarks.replay --iterations 50
+    python -m benchmarks.replay --fixture /tmp/real.jsonl.gz --original-timing
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+import tracemalloc
+from collections import defaultdict
+
+from benchmarks.stand_ins import Behaviour, GitHubStandIn, GroqStandIn, LinkedInStandIn, LocalServer
+from utils.base_command import BaseCommand
+
+DEFAULT_FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "profiles.jsonl.gz")
+DEFAULT_USERS = "replay-user-1,replay-user-2,replay-user-3"
+
+
+class ReplayBenchmark(BaseCommand):
+    def add_arguments(self, parser):
+        parser.add_argument("--fixture", default=DEFAULT_FIXTURE, help="Fixture file to record or replay")
+        parser.add_argument("--users", default=DEFAULT_USERS, help="Comma separated GitHub usernames")
+        parser.add_argument("--record", action="store_true", help="Record a fixture instead of replaying one")
+        parser.add_argument("--stand-ins", action="store_true", help="Record from the local stand-ins")
+        parser.add_argument("--iterations", type=int, default=20, help="Replays of each pipeline per user")
+        parser.add_argument("--original-timing", action="store_true", help="Delay responses as recorded")
+
+    def run(self, args):
+        asyncio.run(self._record(args) if args.record else self._replay(args))
+
+    async def _record(self, args):
+        if not args.stand_ins:
+            await self._record_users(args)
+            return
+        behaviour = Behaviour(latency=0.05)
+        async with LocalServer(GitHubStandIn(behaviour)) as github, \
+                LocalServer(GroqStandIn(behaviour)) as groq, \
+                LocalServer(LinkedInStandIn(behaviour)) as linkedin:
+            os.environ.update({
+                "GITHUB_API_URL": github.url,
+                "GROQ_BASE_URL": groq.url,
+                "LINKEDIN_API_URL": f"{linkedin.url}{LinkedInStandIn.PATH}",
+                "API_TOKEN_GITHUB": "stand-in-token",
+                "GROQ_API_KEY": "stand-in-key",
+            })
+            await self._record_users(args)
+
+    async def _record_users(self, args):
+        from utils.http_clients import upstream_transport
+        from utils.replay import RecordingTransport, save_exchanges
+
+        recorder = RecordingTransport()
+        try:
+            with upstream_transport(recorder):
+                for username in args.users.split(","):
+                    await self._pipelines(username)
+        finally:
+            await recorder.close()
+        os.makedirs(os.path.dirname(os.path.abspath(args.fixture)), exist_ok=True)
+        save_exchanges(args.fixture, recorder.exchanges)
+        print(f"Recorded {len(recorder.exchanges)} exchanges to {args.fixture}")
+
+    async def _replay(self, args):
+        # Credentials are never sent anywhere, the pools only need some to lease
+        os.environ.setdefault("API_TOKEN_GITHUB", "replay-token")
+        os.environ.setdefault("GROQ_API_KEY", "replay-key")
+        os.environ.setdefault("GROQ_RPM_LIMIT", "1000000")
+        os.environ.setdefault("GROQ_TPM_LIMIT", "1000000000")
+        from utils.http_clients import upstream_transport
+        from utils.replay import ReplayTransport, load_exchanges
+
+        exchanges = load_exchanges(args.fixture)
+        timings = defaultdict(list)
+        allocations = defaultdict(list)
+        misses = 0
+        for _ in range(args.iterations):
+            # A fresh transport per iteration replays every recorded response in order
+            transport = ReplayTransport(exchanges, original_timing=args.original_timing)
+            with upstream_transport(transport):
+                for username in args.users.split(","):
+                    for name, seconds, peak in await self._pipelines(username, measure=True):
+                        timings[name].append(seconds)
+                        allocations[name].append(peak)
+            misses += transport.misses
+
+        print(f"{len(exchanges)} recorded exchanges, {args.iterations} iterations, "
+              f"{'original' if args.original_timing else 'no'} upstream delay\n")
+        header = f"{'pipeline':<10}{'mean ms':>9}{'p50 ms':>9}{'max ms':>9}{'peak alloc KB':>15}"
+        print(header)
+        print("-" * len(header))
+        for name, samples in timings.items():
+            print(f"{name:<10}{statistics.mean(samples) * 1000:>9.2f}{statistics.median(samples) * 1000:>9.2f}"
+                  f"{max(samples) * 1000:>9.2f}{statistics.mean(allocations[name]) / 1024:>15.1f}")
+        if misses:
+            print(f"\n{misses} requests had no recorded exchange; re-record the fixture for these users.")
+
+    @staticmethod
+    async def _pipelines(username, measure=False):
+        """
+        Run the profile, projects and AI pipelines for a user
+
+        Returns:
+            list: (pipeline, seconds, peak traced bytes) when measuring
+        """
+        from modules.ai_generator import AIDescriptionGenerator
+        from modules.github_fetcher import GitHubProfileFetcher
+        from modules.github_projects import GitHubProjectRanker
+
+        async def timed(name, coroutine_function):
+            if measure:
+                tracemalloc.start()
+            start = time.perf_counter()
+            try:
+                result = await coroutine_function()
+            finally:
+                elapsed = time.perf_counter() - start
+                if measure:
+                    _, peak = tracemalloc.get_traced_memory()
+                    tracemalloc.stop()
+            results.append((name, elapsed, peak if measure else None))
+            return result
+
+        results = []
+        profile = await timed("profile", lambda: GitHubProfileFetcher.fetch_user_profile_async(username))
+        await timed("projects", lambda: GitHubProjectRanker().get_featured_async(username))
+        if "error" not in profile:
+            ai_generator = AIDescriptionGenerator()
+            await timed("ai", lambda: asyncio.gather(
+                ai_generator.generate_profile_summary_async(profile),
+                ai_generator.generate_seo_contents_async(profile)
+            ))
+        return results
+
+
+if __name__ == "__main__":
+    command = ReplayBenchmark()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    command.add_arguments(parser)
+    command.run(parser.parse_args())
@@ -0,0 +1,364 @@
+"""
+Local stand-ins for the upstream APIs, so load tests spend neither rate
+limits nor tokens: GitHub REST and GraphQL, Groq chat completions and the
+LinkedIn profile API. They answer for any username with synthetic data
+that is stable per username, after a simulated latency, and fail or rate
+limit requests as configured.
+
+Everything here is plain Starlette/uvicorn; the API's own modules are
+not imported, so their settings can still be pointed at the stand-ins.
+"""
+import asyncio
+import base64
+import json
+import random
+import re
+import time
+import zlib
+from collections import Counter
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from benchmarks.data import WORDS, lorem, make_graphql_user, make_repo, readme_size
+
+# Profile fields of the GraphQL profile queries: (alias, login variable)
+PROFILE_FIELD = re.compile(r"(?:(\w+):\s*)?repositoryOwner\(login:\s*\$(\w+)\)")
+# Issue search counts selected next to each profile, prefixed with the profile's alias in batches
+PROFILE_COUNTS = ("mergedPullRequests", "closedIssues")
+
+
+class Behaviour(NamedTuple):
+    """How a stand-in responds"""
+    latency: float = 0.05  # median seconds per response
+    jitter: float = 0.5  # sigma of the lognormal spread around the median
+    error_rate: float = 0.0  # share of requests answered with a 5xx
+    rate_limit: int = 5000  # requests per credential and window
+    window: float = 3600  # seconds until a credential's budget resets
+
+
+def user_rng(username: str) -> random.Random:
+    """Random generator seeded by the username, so every stand-in agrees on a user"""
+    return random.Random(zlib.crc32(username.encode()))
+
+
+class StandIn:
+    """ASGI app simulating latency, errors and per-credential rate limits"""
+
+    def __init__(self, behaviour: Behaviour, seed: int = 0):
+        self.behaviour = behaviour
+        self.rng = random.Random(seed)
+        self.calls = Counter()
+        # credential -> (remaining, reset_at)
+        self._budgets: Dict[str, Tuple[int, float]] = {}
+        self.app = Starlette(routes=self.routes())
+
+    async def __call__(self, scope, receive, send):
+        await self.app(scope, receive, send)
+
+    def routes(self):
+        raise NotImplementedError
+
+    def _spend(self, credential: str) -> Tuple[int, float]:
+        """Take one request from a credential's budget, returning (remaining, reset_at)"""
+        now = time.time()
+        remaining, reset_at = self._budgets.get(credential, (self.behaviour.rate_limit, now + self.behaviour.window))
+        if now >= reset_at:
+            remaining, reset_at = self.behaviour.rate_limit, now + self.behaviour.window
+        remaining = max(remaining - 1, -1)
+        self._budgets[credential] = (remaining, reset_at)
+        return remaining, reset_at
+
+    async def simulate(self, name: str, request: Request) -> Tuple[Optional[Response], int, float]:
+        """
+        Count and delay a request, then decide its fate
+
+        Returns:
+            tuple: (error response or None, remaining budget, budget reset time)
+        """
+        self.calls[name] += 1
+        behaviour = self.behaviour
+        await asyncio.sleep(behaviour.latency * self.rng.lognormvariate(0, behaviour.jitter))
+        remaining, reset_at = self._spend(request.headers.get("authorization", "anonymous"))
+        if remaining < 0:
+            return self.rate_limited(request, reset_at), remaining, reset_at
+        if self.rng.random() < behaviour.error_rate:
+            return JSONResponse({"message": "stand-in failure"}, status_code=502), remaining, reset_at
+        return None, remaining, reset_at
+
+    def rate_limited(self, request: Request, reset_at: float) -> Response:
+        return JSONResponse(
+            {"message": "rate limited"},
+            status_code=429,
+            headers={"retry-after": str(max(1, int(reset_at - time.time())))}
+        )
+
+
+class GitHubStandIn(StandIn):
+    """
+    api.github.com: the REST endpoints and GraphQL queries the API uses. Unlike
+    GitHub it also accepts automatic persisted queries, for GITHUB_PERSISTED_QUERIES.
+    """
+
+    def __init__(self, behaviour: Behaviour, seed: int = 0):
+        super().__init__(behaviour, seed)
+        self.documents: Dict[str, str] = {}  # persisted queries by SHA-256
+
+    def routes(self):
+        return [
+            Route("/users/{username}", self.user),
+            Route("/users/{username}/social_accounts", self.social_accounts),
+            Route("/users/{username}/repos", self.repos),
+            Route("/repos/{owner}/{repo}/readme", self.readme),
+            Route("/repos/{owner}/{repo}/contents/README.md", self.readme),
+            Route("/graphql", self.graphql, methods=["POST"]),
+        ]
+
+    def headers(self, resource: str, remaining: int, reset_at: float) -> dict:
+        return {
+            "x-ratelimit-limit": str(self.behaviour.rate_limit),
+            "x-ratelimit-remaining": str(max(remaining, 0)),
+            "x-ratelimit-reset": str(int(reset_at)),
+            "x-ratelimit-resource": resource,
+        }
+
+    def rate_limited(self, request: Request, reset_at: float) -> Response:
+        resource = "graphql" if request.url.path.endswith("/graphql") else "core"
+        return JSONResponse(
+            {"message": "API rate limit exceeded"},
+            status_code=403,
+            headers=self.headers(resource, 0, reset_at)
+        )
+
+    async def _respond(self, name: str, request: Request, resource: str, body) -> Response:
+        content = json.dumps(body, separators=(",", ":")).encode()
+        etag = f'"{zlib.crc32(content):08x}"'
+        if resource == "core" and request.headers.get("if-none-match") == etag:
+            # Revalidations are free: GitHub does not count a 304 against the rate limit
+            self.calls[f"{name}_not_modified"] += 1
+            await asyncio.sleep(self.behaviour.latency * self.rng.lognormvariate(0, self.behaviour.jitter))
+            remaining, reset_at = self._budgets.get(
+                request.headers.get("authorization", "anonymous"),
+                (self.behaviour.rate_limit, time.time() + self.behaviour.window)
+            )
+            return Response(status_code=304, headers={**self.headers(resource, remaining, reset_at), "etag": etag})
+        error, remaining, reset_at = await self.simulate(name, request)
+        if error is not None:
+            return error
+        headers = {**self.headers(resource, remaining, reset_at), "etag": etag}
+        return Response(content, media_type="application/json", headers=headers)
+
+    async def user(self, request: Request):
+        username = request.path_params["username"]
+        account_type = account_type_of(username)
+        if account_type is None:
+            error, _, _ = await self.simulate("rest_user", request)
+            return error or JSONResponse({"message": "Not Found"}, status_code=404)
+        return await self._respond("rest_user", request, "core", {"login": username, "type": account_type})
+
+    async def social_accounts(self, request: Request):
+        username = request.path_params["username"]
+        accounts = [{"provider": "twitter", "url": f"https://twitter.com/{username}"}]
+        if user_rng(username).random() < 0.6:
+            accounts.append({"provider": "linkedin", "url": f"https://www.linkedin.com/in/{username}"})
+        return await self._respond("rest_social_accounts", request, "core", accounts)
+
+    async def readme(self, request: Request):
+        rng = user_rng(request.path_params["owner"])
+        content = lorem(rng, readme_size(rng)) + f"\n[Medium](https://medium.com/@{request.path_params['owner']})\n"
+        return await self._respond(
+            "rest_readme", request, "core", {"content": base64.b64encode(content.encode()).decode()}
+        )
+
+    async def repos(self, request: Request):
+        username = request.path_params["username"]
+        rng = user_rng(username)
+        total = rng.randint(0, 150)
+        per_page = int(request.query_params.get("per_page", 30))
+        page = int(request.query_params.get("page", 1))
+        count = max(0, min(per_page, total - (page - 1) * per_page))
+        repos = [make_repo(rng, username, (page - 1) * per_page + i) for i in range(count)]
+        return await self._respond("rest_repos", request, "core", repos)
+
+    async def graphql(self, request: Request):
+        payload = await request.json()
+        query = payload.get("query", "")
+        variables = payload.get("variables") or {}
+        persisted = (payload.get("extensions") or {}).get("persistedQuery")
+        if persisted and query:
+            self.documents[persisted["sha256Hash"]] = query
+        elif persisted:
+            query = self.documents.get(persisted["sha256Hash"], "")
+            if not query:
+                body = {"errors": [{"message": "PersistedQueryNotFound",
+                                    "extensions": {"code": "PERSISTED_QUERY_NOT_FOUND"}}]}
+                return await self._respond("graphql_persisted_miss", request, "graphql", body)
+        if "pinnedItems" in query:
+            username = variables.get("login", "")
+            rng = user_rng(username)
+            nodes = [{"name": f"repo-{i}"} for i in rng.sample(range(10), 6)]
+            body = {"data": {"user": {"pinnedItems": {"nodes": nodes}}}}
+            return await self._respond("graphql_pinned", request, "graphql", body)
+
+        # A single profile query, or a batch with one aliased field per user
+        data, errors = {}, []
+        for alias, variable in PROFILE_FIELD.findall(query):
+            field = alias or "repositoryOwner"
+            username = variables.get(variable, "")
+            account_type = account_type_of(username)
+            if account_type is None:
+                data[field] = None
+                errors.append({
+                    "type": "NOT_FOUND",
+                    "path": [field],
+                    "message": f"Could not resolve to a User with the login of '{username}'.",
+                })
+            elif account_type == "Organization":
+                data[field] = {"__typename": "Organization"}
+            else:
+                user = graphql_user(username)
+                for count in PROFILE_COUNTS:
+                    data[(alias and f"{alias}_") + count] = user.pop(count)
+                data[field] = user
+        if "rateLimit" in query:
+            data["rateLimit"] = {"cost": max(1, len(data) // 2), "remaining": 4999, "resetAt": "2030-01-01T00:00:00Z"}
+        body = {"data": data, "errors": errors} if errors else {"data": data}
+        return await self._respond("graphql_profile", request, "graphql", body)
+
+
+def account_type_of(username: str) -> Optional[str]:
+    """Account type of a username: `missing-*` users do not exist and `org-*` are organizations"""
+    if username.startswith("missing-"):
+        return None
+    return "Organization" if username.startswith("org-") else "User"
+
+
+def graphql_user(username: str) -> dict:
+    """The `user` object of the profile GraphQL query"""
+    return make_graphql_user(user_rng(username), username, nodes=20)
+
+
+class GroqStandIn(StandIn):
+    """Groq's OpenAI compatible chat completions, with its rate limit headers"""
+
+    def routes(self):
+        return [Route("/openai/v1/chat/completions", self.completions, methods=["POST"])]
+
+    async def completions(self, request: Request):
+        payload = await request.json()
+        error, remaining, reset_at = await self.simulate("chat_completions", request)
+        if error is not None:
+            return error
+
+        rng = random.Random(self.rng.random())
+        if (payload.get("response_format") or {}).get("type") == "json_object":
+            content = json.dumps({
+                "title": f"Developer passionate about {rng.choice(WORDS)}",
+                "description": lorem(rng, 150),
+                "keywords": ", ".join(rng.sample(WORDS, 8)),
+            })
+        else:
+            content = lorem(rng, 400)
+        prompt_tokens = sum(len(message.get("content", "")) for message in payload.get("messages", [])) // 4
+        completion_tokens = len(content) // 4
+        reset_in = max(0.0, reset_at - time.time())
+        return JSONResponse(
+            {
+                "id": "chatcmpl-stand-in",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": payload.get("model", ""),
+                "choices": [{
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": content},
+                }],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+            },
+            headers={
+                "x-ratelimit-limit-requests": str(self.behaviour.rate_limit),
+                "x-ratelimit-remaining-requests": str(max(remaining, 0)),
+                "x-ratelimit-reset-requests": f"{reset_in:.2f}s",
+            }
+        )
+
+
+class LinkedInStandIn(StandIn):
+    """The LinkedIn profile API behind `LinkedInProfileFetcher`"""
+
+    PATH = "/api/linkedin-unwrapped"
+
+    def routes(self):
+        return [Route(self.PATH, self.profile, methods=["POST"])]
+
+    async def profile(self, request: Request):
+        payload = await request.json()
+        error, _, _ = await self.simulate("profile", request)
+        if error is not None:
+            return error
+
+        username = payload.get("linkedinUrl", "").rstrip("/").rsplit("/", 1)[-1]
+        rng = user_rng(username)
+        return JSONResponse({"data": {"profile": {
+            "full_name": username.title(),
+            "headline": lorem(rng, 60),
+            "city": "Kochi",
+            "state": "Kerala",
+            "country": "IN",
+            "summary": lorem(rng, 300),
+            "public_identifier": username,
+            "connections": rng.randint(0, 500),
+            "experiences": [
+                {
+                    "title": rng.choice(WORDS).title(),
+                    "company": rng.choice(WORDS).title(),
+                    "location": "Remote",
+                    "description": lorem(rng, 120),
+                    "starts_at": {"month": 1, "year": 2020 + i},
+                    "ends_at": None,
+                }
+                for i in range(rng.randint(1, 4))
+            ],
+            "education": [{
+                "school": "College of Engineering",
+                "degree_name": "B.Tech",
+                "field_of_study": "Computer Science",
+                "starts_at": {"year": 2015},
+                "ends_at": {"year": 2019},
+            }],
+        }}})
+
+
+class LocalServer:
+    """Serve an ASGI app with uvicorn on a free local port inside the running event loop"""
+
+    def __init__(self, app, lifespan: str = "off"):
+        self.server = uvicorn.Server(uvicorn.Config(
+            app, host="127.0.0.1", port=0, lifespan=lifespan, log_level="warning", access_log=False
+        ))
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def url(self) -> str:
+        port = self.server.servers[0].sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}"
+
+    async def __aenter__(self) -> "LocalServer":
+        self._task = asyncio.create_task(self.server.serve())
+        while not self.server.started:
+            if self._task.done():
+                self._task.result()
+            await asyncio.sleep(0.01)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.server.should_exit = True
+        await self._task
@@ -1,6 +1,5 @@
 import json
 import os
-import threading
 
 from dotenv import load_dotenv
 
@@ -38,51 +37,100 @@ class Settings:
 
     BLACKLISTED_USERS = {user.lower() for user in BLACKLISTED_USERS}
     REDIS_HOST = "redis://redis:6379/0"
+    REDIS_URL = os.getenv("REDIS_URL", REDIS_HOST)
+    REDIS_SOCKET_TIMEOUT = 1.0  # seconds, keeps requests fast when Redis is unreachable
+    REDIS_RETRY_INTERVAL = 5.0  # seconds to serve from memory before retrying Redis
     API_URL = "https://user.devb.io"
-    DEFAULT_CACHE_TTL = 3600 * 24 * 7  # 1 week
+    DEFAULT_CACHE_TTL = 3600 * 24 * 7  # 1 week, after which entries are refreshed in the background
+    CACHE_HARD_TTL = 3600 * 24 * 30  # 30 days, stale entries are served until then
     CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").lower() == "true"
+    VALID_USERNAME_CACHE_TTL = 3600 * 24  # 1 day
+    INVALID_USERNAME_CACHE_TTL = 3600  # 1 hour, so new accounts are picked up quickly
+    # Cache payload encoding, see utils/codec.py
+    CACHE_SERIALIZER = os.getenv("CACHE_SERIALIZER", "msgpack")
+    CACHE_COMPRESSION = os.getenv("CACHE_COMPRESSION", "zstd")
+    CACHE_COMPRESS_THRESHOLD = 1024  # bytes
+    PROFILE_BATCH_MAX_USERNAMES = 1000
+    PROFILE_BATCH_CONCURRENCY = int(os.getenv("PROFILE_BATCH_CONCURRENCY", "4"))  # profiles computed at once per batch
+    HTTP_CACHE_MAX_AGE = 3600  # seconds clients may reuse a response before revalidating with its ETag
+    # In-process cache tier in front of Redis
+    MEMORY_CACHE_MAX_ENTRIES = int(os.getenv("MEMORY_CACHE_MAX_ENTRIES", "2048"))
+    MEMORY_CACHE_MAX_BYTES = int(os.getenv("MEMORY_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    MEMORY_CACHE_TTL = 300  # seconds
+    SINGLE_FLIGHT_LEASE_TTL = 60  # seconds before an abandoned lease expires
+    SINGLE_FLIGHT_WAIT_TIMEOUT = 30  # seconds to wait on another replica's computation
+    GITHUB_TOKEN_MAX_WAIT = 60  # seconds a request waits for a rate limit reset once all tokens are drained
+    # Profiles fetched per GraphQL request by bulk refreshes, see GitHubProfileBatchFetcher
+    GITHUB_BATCH_SIZE = 10  # initial size, adapted to the reported query cost
+    GITHUB_BATCH_MAX_SIZE = int(os.getenv("GITHUB_BATCH_MAX_SIZE", "25"))
+    GITHUB_BATCH_MAX_COST = 10  # rate limit points a batch request aims for
+    GROQ_RPM_LIMIT = int(os.getenv("GROQ_RPM_LIMIT", "30"))  # requests per minute per key
+    GROQ_TPM_LIMIT = int(os.getenv("GROQ_TPM_LIMIT", "6000"))  # tokens per minute per key
+    GROQ_KEY_MAX_WAIT = 30  # seconds a completion waits for a key with enough headroom
+    GROQ_COMPLETION_TOKEN_ESTIMATE = 400  # tokens reserved for a completion before its usage is known
+    # Upstream API endpoints, pointed at local stand-ins by benchmarks/load_test.py
+    GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip('/')
+    GROQ_BASE_URL = os.getenv("GROQ_BASE_URL") or None  # Groq's own default when unset
+    LINKEDIN_API_URL = os.getenv("LINKEDIN_API_URL", "https://notes.cleve.ai/api/linkedin-unwrapped")
+    # Shared upstream HTTP clients, see utils/http_clients.py
+    UPSTREAM_MAX_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", "100"))  # per upstream API
+    UPSTREAM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    UPSTREAM_KEEPALIVE_EXPIRY = 60  # seconds an idle connection is kept open
+    GITHUB_HTTP2 = os.getenv("GITHUB_HTTP2", "true").lower() == "true"  # needs the h2 package
+    # Send GraphQL queries by hash (automatic persisted queries), for gateways in
+    # front of GitHub that support it; GitHub itself only accepts documents
+    GITHUB_PERSISTED_QUERIES = os.getenv("GITHUB_PERSISTED_QUERIES", "false").lower() == "true"
+    # GitHub REST responses revalidated with their ETag, see utils/conditional_cache.py:
+    # "redis" (API only), "disk" (API and blocking requests) or "off"
+    GITHUB_REST_CACHE = os.getenv("GITHUB_REST_CACHE", "redis").lower()
+    GITHUB_REST_CACHE_DIR = os.getenv("GITHUB_REST_CACHE_DIR", os.path.join(".cache", "github-rest"))
+    GITHUB_REST_CACHE_TTL = 3600 * 24 * 14  # 2 weeks, so a weekly refresh still finds its validators
+    REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+    REDIS_HEALTH_CHECK_INTERVAL = 30  # seconds, idle pooled connections are checked before reuse
+    # AI sections are generated by job queue workers, see utils/job_queue.py
+    AI_WORKER_CONCURRENCY = int(os.getenv("AI_WORKER_CONCURRENCY", "2"))  # workers per process, 0 leaves the queue to api.worker
+    AI_JOB_TIMEOUT = 300  # seconds
+    AI_JOB_STATUS_TTL = 3600  # seconds the status of a finished job is kept
+    AI_JOB_POLL_INTERVAL = 0.5  # seconds between status checks of a streamed pending profile
+    AI_PENDING_PROFILE_TTL = 30  # seconds a profile with pending AI sections is served before a refresh
+    SLOW_REQUEST_THRESHOLD = float(os.getenv("SLOW_REQUEST_THRESHOLD", "5"))  # seconds, slower requests log their timeline; 0 disables
 
     _GITHUB_API_TOKENS = os.getenv("API_TOKEN_GITHUB", "").split(',')
     _GROQ_API_KEYS = os.getenv("GROQ_API_KEY", "").split(',')
 
-    _github_token_index = 0
-    _groq_key_index = 0
-    _lock = threading.Lock()
 
 
 
 
     @classmethod
-    def get_github_token(cls):
+    def get_github_token(cls, resource="core"):
         """
-        Retrieve and rotate GitHub API tokens in a thread-safe manner.
+        Lease the GitHub API token with the most rate limit headroom.
+        Never waits; async code authenticates with `utils.rate_limit.github_auth`,
+        which also parks requests while all tokens are drained. Blocking
+        requests record their responses' rate limit headers through
+        `utils.conditional_cache.get` and `modules.github_queries.post_github_query`.
+
+        Args:
+            resource (str): GitHub rate limit resource, 'core', 'graphql' or 'search'
 
         Returns:
             str: A GitHub API token
         """
-        with cls._lock:
-            if not cls._GITHUB_API_TOKENS:
-                raise ValueError("No GitHub API tokens configured")
-
-            token = cls._GITHUB_API_TOKENS[cls._github_token_index]
-            cls._github_token_index = (cls._github_token_index + 1) % len(cls._GITHUB_API_TOKENS)
-            return token
+        from utils.rate_limit import github_tokens
+        return github_tokens.lease_nowait(resource)
 
     @classmethod
     def get_groq_key(cls):
         """
-        Retrieve and rotate Groq API keys in a thread-safe manner.
+        Retrieve the Groq API key with the most quota left.
+        Completions lease a key per request from `utils.rate_limit.groq_keys`.
 
         Returns:
             str: A Groq API key
         """
-        with cls._lock:
-            if not cls._GROQ_API_KEYS:
-                raise ValueError("No Groq API keys configured")
-
-            key = cls._GROQ_API_KEYS[cls._groq_key_index]
-            cls._groq_key_index = (cls._groq_key_index + 1) % len(cls._GROQ_API_KEYS)
-            return key
+        from utils.rate_limit import groq_keys
+        return groq_keys.best_key()
 
 if __name__ == "__main__":
     Settings()
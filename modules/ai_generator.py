@@ -1,27 +1,102 @@
 import json
 
-from groq import Groq
+from groq import APIConnectionError, AsyncGroq, DefaultAsyncHttpxClient, Groq, InternalServerError, RateLimitError
 
 from config.settings import Settings
+from utils.http_clients import transport_kwargs
+from utils.metrics import UPSTREAM_EVENT_HOOKS
+from utils.rate_limit import groq_keys
 
 
 class AIDescriptionGenerator:
     """Generate AI-powered profile and activity descriptions"""
 
-    def __init__(self):
-        """Initialize Groq client"""
-        self.client = Groq(api_key=Settings.get_groq_key())
+    MODEL = "llama-3.1-8b-instant"
+    MAX_ATTEMPTS = 3
+    # Failures worth another attempt, on another key for rate limits
+    RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, InternalServerError)
 
-    def generate_seo_contents(self, profile_data: dict):
+    def __init__(self, http_client=None):
         """
-        Generate a professional SEO-optimized profile content like title, description, keywords
+        Initialize Groq clients
 
         Args:
-            profile_data (dict): GitHub user profile data
+            http_client (httpx.AsyncClient): Shared connection pool for the async
+                client, a pool of its own is created without it
+        """
+        api_key = Settings.get_groq_key()
+        # Retries are done by `_complete` so a rate limited key is not retried
+        self.client = Groq(api_key=api_key, base_url=Settings.GROQ_BASE_URL, max_retries=0)
+        self.async_client = AsyncGroq(
+            api_key=api_key,
+            base_url=Settings.GROQ_BASE_URL,
+            max_retries=0,
+            http_client=http_client or DefaultAsyncHttpxClient(event_hooks=UPSTREAM_EVENT_HOOKS, **transport_kwargs())
+        )
+
+    @staticmethod
+    def _finish(lease, error):
+        """Return a failed attempt's lease to the key pool"""
+        if isinstance(error, RateLimitError):
+            groq_keys.cooldown(lease, error.response.headers)
+        else:
+            groq_keys.release(lease)
+
+    def _complete(self, messages, **kwargs):
+        """
+        Run a chat completion on a key from the pool that can absorb its
+        estimated tokens, moving to another key after a 429
+
+        Args:
+            messages (list): Chat messages
+            **kwargs: Extra completion parameters
 
         Returns:
-            dict: AI-generated SEO-optimized profile content
+            ChatCompletion: The completion
         """
+        cost = groq_keys.estimate_tokens(messages, Settings.GROQ_COMPLETION_TOKEN_ESTIMATE)
+        for attempt in range(self.MAX_ATTEMPTS):
+            lease = groq_keys.lease_nowait(cost)
+            try:
+                raw_response = self.client.with_options(api_key=lease.key).chat.completions.with_raw_response.create(
+                    messages=messages, model=self.MODEL, **kwargs
+                )
+            except self.RETRYABLE_ERRORS as e:
+                self._finish(lease, e)
+                if attempt == self.MAX_ATTEMPTS - 1:
+                    raise
+                continue
+            except Exception:
+                groq_keys.release(lease)
+                raise
+            response = raw_response.parse()
+            groq_keys.record(lease, raw_response.headers, response.usage.total_tokens if response.usage else None)
+            return response
+
+    async def _complete_async(self, messages, **kwargs):
+        """Async variant of `_complete`, waiting for a key with enough headroom"""
+        cost = groq_keys.estimate_tokens(messages, Settings.GROQ_COMPLETION_TOKEN_ESTIMATE)
+        for attempt in range(self.MAX_ATTEMPTS):
+            lease = await groq_keys.lease(cost)
+            try:
+                raw_response = await self.async_client.with_options(
+                    api_key=lease.key
+                ).chat.completions.with_raw_response.create(messages=messages, model=self.MODEL, **kwargs)
+            except self.RETRYABLE_ERRORS as e:
+                self._finish(lease, e)
+                if attempt == self.MAX_ATTEMPTS - 1:
+                    raise
+                continue
+            except Exception:
+                groq_keys.release(lease)
+                raise
+            response = await raw_response.parse()
+            groq_keys.record(lease, raw_response.headers, response.usage.total_tokens if response.usage else None)
+            return response
+
+    @staticmethod
+    def _seo_messages(profile_data: dict):
+        """Build the chat messages for SEO content generation"""
         prompt = (
             "Generate a concise, professional, and SEO-optimized profile snippet for a developer profile page."
             "\n\nReturn the output strictly in the following JSON format (without any additional commentary):"
@@ -38,17 +113,17 @@ class AIDescriptionGenerator:
             "\n\nIf data is sparse, infer likely skills or focus areas. Avoid filler or generic phrases. Prioritize precision and clarity."
         )
 
-        response = self.client.chat.completions.create(
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an SEO-optimized profile content generator for developer portfolios and GitHub profiles. Create search engine friendly, professional profile summaries that enhance discoverability and professional presence. Generate content in natural paragraph format without headings, lists, or bullet points. Focus on keyword integration, meta-friendly descriptions, and compelling copy that drives engagement and showcases technical expertise effectively. Your output should be properly formatted JSON when requested, with each field containing well-crafted, SEO-optimized content.",
-                },
-                {"role": "user", "content": prompt},
-            ],
-            model="llama-3.1-8b-instant",
-            response_format={"type": "json_object"},
-        )
+        return [
+            {
+                "role": "system",
+                "content": "You are an SEO-optimized profile content generator for developer portfolios and GitHub profiles. Create search engine friendly, professional profile summaries that enhance discoverability and professional presence. Generate content in natural paragraph format without headings, lists, or bullet points. Focus on keyword integration, meta-friendly descriptions, and compelling copy that drives engagement and showcases technical expertise effectively. Your output should be properly formatted JSON when requested, with each field containing well-crafted, SEO-optimized content.",
+            },
+            {"role": "user", "content": prompt},
+        ]
+
+    @staticmethod
+    def _parse_seo_response(response):
+        """Validate the SEO completion and extract its fields"""
         if not response.choices or response.choices[0].message.content == "":
             raise Exception("No response from AI model")
         try:
@@ -77,16 +152,33 @@ class AIDescriptionGenerator:
             "keywords": keywords,
         }
 
-    def generate_profile_summary(self, profile_data):
+    def generate_seo_contents(self, profile_data: dict):
         """
-        Generate a professional profile summary
+        Generate a professional SEO-optimized profile content like title, description, keywords
 
         Args:
             profile_data (dict): GitHub user profile data
 
         Returns:
-            str: AI-generated profile summary
+            dict: AI-generated SEO-optimized profile content
         """
+        response = self._complete(
+            messages=self._seo_messages(profile_data),
+            response_format={"type": "json_object"},
+        )
+        return self._parse_seo_response(response)
+
+    async def generate_seo_contents_async(self, profile_data: dict):
+        """Async variant of `generate_seo_contents`"""
+        response = await self._complete_async(
+            messages=self._seo_messages(profile_data),
+            response_format={"type": "json_object"},
+        )
+        return self._parse_seo_response(response)
+
+    @staticmethod
+    def _profile_summary_messages(profile_data):
+        """Build the chat messages for the profile summary"""
         prompt = (
             "Write only the final profile summary text — no introductions, no explanations, and no meta sentences."
             "\nCraft a Concise, SEO-optimized first-person profile description that:"
@@ -104,40 +196,53 @@ class AIDescriptionGenerator:
             f"\n- README: {profile_data['readme_content']}"
         )
 
-        response = self.client.chat.completions.create(
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a professional profile summarizer for GitHub developers. create a professional profile summary without any heading ,list or bullet points.",
-                },
-                {"role": "user", "content": prompt},
-            ],
-            model="llama-3.1-8b-instant",
-        )
+        return [
+            {
+                "role": "system",
+                "content": "You are a professional profile summarizer for GitHub developers. create a professional profile summary without any heading ,list or bullet points.",
+            },
+            {"role": "user", "content": prompt},
+        ]
+
+    @staticmethod
+    def _parse_profile_summary_response(response):
+        """Validate the profile summary completion and extract its text"""
         if not response.choices or response.choices[0].message.content == "":
             raise Exception("No response from AI model")
 
         return response.choices[0].message.content
 
-    def generate_activity_summary(self, contributions):
+    def generate_profile_summary(self, profile_data):
         """
-        Generate AI summary of recent contributions as JSON
+        Generate a professional profile summary
 
         Args:
-            contributions (dict): User contributions data
+            profile_data (dict): GitHub user profile data
 
         Returns:
-            dict: JSON with repository summaries or empty list if unsuccessful
+            str: AI-generated profile summary
         """
+        response = self._complete(
+            messages=self._profile_summary_messages(profile_data),
+        )
+        return self._parse_profile_summary_response(response)
 
-        def construct_prompt(contributions):
-            """Construct a clear prompt for JSON response"""
-            return f"""Generate a JSON summary of GitHub activities. 
+    async def generate_profile_summary_async(self, profile_data):
+        """Async variant of `generate_profile_summary`"""
+        response = await self._complete_async(
+            messages=self._profile_summary_messages(profile_data),
+        )
+        return self._parse_profile_summary_response(response)
+
+    @staticmethod
+    def _activity_messages(contributions):
+        """Construct a clear prompt for JSON response"""
+        prompt = f"""Generate a JSON summary of GitHub activities.
     Rules:
-    - Use this exact JSON format: 
+    - Use this exact JSON format:
       {{
         "repo_name": {{
-          "link": "GitHub repository URL", 
+          "link": "GitHub repository URL",
           "summary": "Professional description of recent activities with 1 paragraph only for each repository"
         }}
       }}
@@ -148,37 +253,48 @@ class AIDescriptionGenerator:
     Contributions data:
     {json.dumps(contributions, indent=2)}
     """
+        return [
+            {
+                "role": "system",
+                "content": "You are a GitHub activity summarizer. Provide a precise JSON summary of repository activities.",
+            },
+            {"role": "user", "content": prompt},
+        ]
 
-        def validate_json_response(response):
-            """Validate the JSON response meets requirements"""
-            try:
-                parsed = json.loads(response)
-                # Check if it matches expected structure
-                if not isinstance(parsed, dict):
+    @staticmethod
+    def _validate_activity_response(response):
+        """Validate the JSON response meets requirements"""
+        try:
+            parsed = json.loads(response)
+            # Check if it matches expected structure
+            if not isinstance(parsed, dict):
+                return False
+
+            for repo, details in parsed.items():
+                if not isinstance(details, dict):
+                    return False
+                if "link" not in details or "summary" not in details:
                     return False
 
-                for repo, details in parsed.items():
-                    if not isinstance(details, dict):
-                        return False
-                    if "link" not in details or "summary" not in details:
-                        return False
+            return parsed
+        except json.JSONDecodeError:
+            return False
 
-                return parsed
-            except json.JSONDecodeError:
-                return False
+    def generate_activity_summary(self, contributions):
+        """
+        Generate AI summary of recent contributions as JSON
+
+        Args:
+            contributions (dict): User contributions data
 
+        Returns:
+            dict: JSON with repository summaries or empty list if unsuccessful
+        """
         max_retries = 3
         for attempt in range(max_retries):
             try:
-                response = self.client.chat.completions.create(
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": "You are a GitHub activity summarizer. Provide a precise JSON summary of repository activities.",
-                        },
-                        {"role": "user", "content": construct_prompt(contributions)},
-                    ],
-                    model="llama-3.1-8b-instant",
+                response = self._complete(
+                    messages=self._activity_messages(contributions),
                     response_format={"type": "json_object"},
                 )
 
@@ -186,7 +302,7 @@ class AIDescriptionGenerator:
                 response_text = response.choices[0].message.content
 
                 # Validate JSON response
-                validated_response = validate_json_response(response_text)
+                validated_response = self._validate_activity_response(response_text)
                 if validated_response:
                     return validated_response
 
@@ -195,3 +311,22 @@ class AIDescriptionGenerator:
 
         # Return empty list if all attempts fail
         return []
+
+    async def generate_activity_summary_async(self, contributions):
+        """Async variant of `generate_activity_summary`"""
+        max_retries = 3
+        for attempt in range(max_retries):
+            try:
+                response = await self._complete_async(
+                    messages=self._activity_messages(contributions),
+                    response_format={"type": "json_object"},
+                )
+
+                validated_response = self._validate_activity_response(response.choices[0].message.content)
+                if validated_response:
+                    return validated_response
+
+            except Exception as e:
+                print(f"Attempt {attempt + 1} failed: {e}")
+
+        return []
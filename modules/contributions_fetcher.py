@@ -1,8 +1,7 @@
 from datetime import datetime, timedelta
 
-import requests
-
 from config.settings import Settings
+from utils import conditional_cache
 
 
 class GitHubContributionsFetcher:
@@ -21,9 +20,9 @@ class GitHubContributionsFetcher:
             dict: Recent contributions
         """
         try:
-            events_url = f"https://api.github.com/users/{username}/events"
+            events_url = f"{Settings.GITHUB_API_URL}/users/{username}/events"
 
-            response = requests.get(
+            response = conditional_cache.get(
                 events_url,
                 headers={
                     "Accept": "application/vnd.github.v3+json",
@@ -33,53 +32,67 @@ class GitHubContributionsFetcher:
             response.raise_for_status()
             events = response.json()
 
-            # Filter and process events
-            cutoff_date = datetime.now() - timedelta(days=days)
-            contributions = {}
+            return GitHubContributionsFetcher._process_events(events, days)
+        except Exception as e:
+            raise Exception(f"Error fetching contributions for {username}: {e}")
 
-            for event in events:
-                event_date = datetime.strptime(event['created_at'], "%Y-%m-%dT%H:%M:%SZ")
-                if event_date < cutoff_date:
-                    continue
+    @staticmethod
+    def _process_events(events, days=120):
+        """
+        Group recent push and pull request events by repository
 
-                repo = event['repo']['name']
-                if repo not in contributions:
-                    contributions[repo] = []
+        Args:
+            events (list): Events returned by the GitHub API
+            days (int, optional): Days to look back. Defaults to 120.
 
-                contribution = {
-                    'type': event['type'],
-                    'date': event_date.isoformat(),
-                    'messages': []
-                }
-                if event['type'] == 'PushEvent':
-                    # Extract commit messages
-                    commits = event.get('payload', {}).get('commits', [])
-                    contribution['messages'] = [
-                        commit.get('message', '')[:100]
-                        for commit in commits
-                    ]
-                    contributions[repo].append(contribution)
-
-                elif event['type'] == 'PullRequestEvent':
-                    # Extract pull request details
-                    pr = event['payload'].get('pull_request', {})
-                    title = pr.get('title', '')
-                    body = pr.get('body', '') or 'No description'
-                    contribution['messages'] = [
-                        f"Title: {title}\nBody: {body}"
-                    ]
-
-                    contributions[repo].append(contribution)
-            # clean up empty repositories
-            contributions = {k: v for k, v in contributions.items() if v}
-            # get last 5 contributions if more than 5
-            # sort by most contributions
-            contributions = dict(sorted(contributions.items(), key=lambda x: len(x[1]), reverse=True))
-            # get last 5 contributions
-            contributions = {k: v for k, v in list(contributions.items())[:5]}
-            # get last 10 contributions
-            contributions = {k: v for k, v in list(contributions.items())[:10]}
-
-            return contributions
-        except Exception as e:
-            raise Exception(f"Error fetching contributions for {username}: {e}")
+        Returns:
+            dict: Contributions of the most active repositories
+        """
+        # Filter and process events
+        cutoff_date = datetime.now() - timedelta(days=days)
+        contributions = {}
+
+        for event in events:
+            event_date = datetime.strptime(event['created_at'], "%Y-%m-%dT%H:%M:%SZ")
+            if event_date < cutoff_date:
+                continue
+
+            repo = event['repo']['name']
+            if repo not in contributions:
+                contributions[repo] = []
+
+            contribution = {
+                'type': event['type'],
+                'date': event_date.isoformat(),
+                'messages': []
+            }
+            if event['type'] == 'PushEvent':
+                # Extract commit messages
+                commits = event.get('payload', {}).get('commits', [])
+                contribution['messages'] = [
+                    commit.get('message', '')[:100]
+                    for commit in commits
+                ]
+                contributions[repo].append(contribution)
+
+            elif event['type'] == 'PullRequestEvent':
+                # Extract pull request details
+                pr = event['payload'].get('pull_request', {})
+                title = pr.get('title', '')
+                body = pr.get('body', '') or 'No description'
+                contribution['messages'] = [
+                    f"Title: {title}\nBody: {body}"
+                ]
+
+                contributions[repo].append(contribution)
+        # clean up empty repositories
+        contributions = {k: v for k, v in contributions.items() if v}
+        # get last 5 contributions if more than 5
+        # sort by most contributions
+        contributions = dict(sorted(contributions.items(), key=lambda x: len(x[1]), reverse=True))
+        # get last 5 contributions
+        contributions = {k: v for k, v in list(contributions.items())[:5]}
+        # get last 10 contributions
+        contributions = {k: v for k, v in list(contributions.items())[:10]}
+
+        return contributions
@@ -1,17 +1,48 @@
-import base64
 import difflib
 import re
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
 import httpx
 import requests
 
 from config.settings import Settings
+from modules.github_queries import (
+    PROFILE_COUNTS,
+    PROFILE_QUERY,
+    batch_profile_query,
+    counts_values,
+    post_github_query,
+    post_github_query_async
+)
+from utils.http_clients import use_client
+from utils.metrics import UPSTREAM_EVENT_HOOKS
+from utils.rate_limit import github_auth
 
 
 class GitHubProfileFetcher:
     """Fetch comprehensive GitHub user profile data"""
 
+    # Async requests are authenticated by `github_auth`, which picks the token
+    API_HEADERS = {"Accept": "application/vnd.github.v3+json"}
+    TIMEOUT_SETTINGS = httpx.Timeout(
+        connect=10.0,
+        read=30.0,
+        write=10.0,
+        pool=10.0
+    )
+
+    SOCIAL_PATTERNS = {
+        'linkedin': [
+            r'https?://(?:www\.)?linkedin\.com/in/([a-zA-Z0-9_-]+)/?',
+            r'linkedin\.com/in/([a-zA-Z0-9_-]+)/?'
+        ],
+        'medium': [
+            r'https?://(?:www\.)?medium\.com/@?([a-zA-Z0-9_-]+)/?',
+            r'medium\.com/@?([a-zA-Z0-9_-]+)/?',
+            r'https?://([a-zA-Z0-9_-]+)\.medium\.com/?'  # Pattern for username.medium.com
+        ]
+    }
+
     @staticmethod
     def _validate_username_pattern(username: str) -> bool:
         """
@@ -36,7 +67,33 @@ class GitHubProfileFetcher:
         }
 
     @staticmethod
-    async def validate_github_username(username: str) -> bool:
+    async def fetch_account_type(username: str, client=None):
+        """
+        Look up the account type of a GitHub username
+
+        Args:
+            username (str): GitHub username
+            client (httpx.AsyncClient): Shared GitHub API client, a new one is opened without it
+
+        Returns:
+            str: 'User' or 'Organization', None if the account does not exist
+
+        Raises:
+            httpx.HTTPError: The GitHub API could not be reached or answered with an error
+        """
+        async with use_client(client, auth=github_auth, event_hooks=UPSTREAM_EVENT_HOOKS) as client:
+            response = await client.get(
+                f'{Settings.GITHUB_API_URL}/users/{username}',
+                headers=GitHubProfileFetcher.API_HEADERS
+            )
+        if response.status_code == 404:
+            return None
+        if response.status_code != 200:
+            response.raise_for_status()
+        return response.json().get('type')
+
+    @staticmethod
+    async def validate_github_username(username: str, client=None) -> bool:
         """
         Async validate GitHub username including API check:
         - Validates username pattern
@@ -46,41 +103,141 @@ class GitHubProfileFetcher:
         if not GitHubProfileFetcher._validate_username_pattern(username):
             return False
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(
-                    f'https://api.github.com/users/{username}',
-                    headers=GitHubProfileFetcher._get_github_headers()
-                )
-                if response.status_code != 200:
-                    return False
-                data = response.json()
-                return data.get('type') == 'User'
-            except httpx.HTTPError:
-                return True  # Fall back to pattern validation on API error
+        try:
+            return await GitHubProfileFetcher.fetch_account_type(username, client) == 'User'
+        except httpx.HTTPError:
+            # Missing accounts are not errors, see `fetch_account_type`: GitHub is
+            # unreachable, rate limiting or failing, so fall back to pattern validation
+            return True
+
+    @staticmethod
+    def _contributions_from():
+        """Start of the contributions window of the profile query, one year ago"""
+        return (datetime.now(timezone.utc) - timedelta(days=365)).strftime('%Y-%m-%dT%H:%M:%SZ')
 
     @staticmethod
-    def validate_github_username_sync(username: str) -> bool:
+    def _counts_since():
+        """Start of the pull request and issue counts, one year ago, in search syntax"""
+        return (datetime.now(timezone.utc) - timedelta(days=365)).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    @staticmethod
+    def _profile_variables(username):
+        """Variables of `PROFILE_QUERY` for a user"""
+        return {
+            "login": username,
+            "from": GitHubProfileFetcher._contributions_from(),
+            **counts_values(username, GitHubProfileFetcher._counts_since())
+        }
+
+    @staticmethod
+    def _batch_profile_variables(usernames):
+        """Variables of `batch_profile_query` for several users, the user at index `i` in `l{i}`"""
+        since = GitHubProfileFetcher._counts_since()
+        variables = {"from": GitHubProfileFetcher._contributions_from()}
+        for i, username in enumerate(usernames):
+            variables[f"l{i}"] = username
+            variables.update(counts_values(username, since, f"u{i}_"))
+        return variables
+
+    @staticmethod
+    def _profile_owner(response_data, field='repositoryOwner'):
         """
-        Sync validate GitHub username including API check:
-        - Validates username pattern
-        - Verifies user exists on GitHub
-        - Confirms account is of type 'User' (not Organization)
+        Extract the user from the profile GraphQL response
+
+        Args:
+            response_data (dict): Decoded GraphQL response
+            field (str): Response field of the user, its alias in batch queries
+
+        Returns:
+            dict: `repositoryOwner` object of the user with its
+                `PROFILE_COUNTS`, None when the account does not exist or is
+                not a user
+
+        Raises:
+            ValueError: The query failed for another reason
         """
-        if not GitHubProfileFetcher._validate_username_pattern(username):
-            return False
+        owner = (response_data.get('data') or {}).get(field)
+        errors = [
+            error for error in response_data.get('errors') or []
+            if error.get('type') != 'NOT_FOUND' and (error.get('path') or [field])[0] == field
+        ]
+        if owner is None and errors:
+            raise ValueError(f"GraphQL error: {errors[0].get('message')}")
+        if owner is None or owner.get('__typename') != 'User':
+            return None
+        # The counts are root fields of the query, next to the user
+        prefix = '' if field == 'repositoryOwner' else f'{field}_'
+        data = response_data['data']
+        return {**owner, **{name: data.get(prefix + name) for name in PROFILE_COUNTS}}
 
+    @staticmethod
+    def _profile_result(username, response_data, field='repositoryOwner'):
+        """
+        Profile of a user from the profile GraphQL response, or its error result
+
+        Args:
+            username (str): GitHub username
+            response_data (dict): Decoded GraphQL response
+            field (str): Response field of the user, its alias in batch queries
+
+        Returns:
+            dict: Profile data, or an error as returned by `fetch_user_profile_async`
+        """
         try:
-            response = requests.get(
-                f'https://api.github.com/users/{username}',
-                headers=GitHubProfileFetcher._get_github_headers()
-            )
-            if response.status_code != 200:
-                return False
-            data = response.json()
-            return data.get('type') == 'User'
-        except requests.RequestException:
-            return True  # Fall back to pattern validation on API error
+            graphql_data = GitHubProfileFetcher._profile_owner(response_data, field)
+            if graphql_data is None:
+                return GitHubProfileFetcher._not_found(username)
+            return GitHubProfileFetcher._build_profile(username, graphql_data)
+        except Exception as e:
+            return {"error": f"An unexpected error occurred: {str(e)}"}
+
+    @staticmethod
+    def _not_found(username):
+        """Error result of a profile fetch for a missing account or an organization"""
+        return {"error": f"User '{username}' not found or not a user account", "error_type": "not_found"}
+
+    @staticmethod
+    def _build_profile(username, graphql_data):
+        """
+        Shape the GraphQL user data into the profile returned by the API
+
+        Args:
+            username (str): GitHub username
+            graphql_data (dict): `user` object from the GraphQL response, with
+                its counts, see `_profile_owner`
+
+        Returns:
+            dict: Comprehensive user profile data
+        """
+        readme_content = (graphql_data.get('repository', {}).get('object', {}).get('text', '')
+                          if (graphql_data.get('repository') and graphql_data.get('repository', {}).get(
+            'object')) else '')  # empty string if falsy values
+        # featured = GitHubProjectRanker().get_featured(username)
+        return {
+            'username': username,
+            'name': graphql_data.get('name') or username,
+            'bio': graphql_data.get('bio', ''),
+            'location': graphql_data.get('location', ''),
+            'avatar_url': graphql_data.get('avatarUrl', ''),
+            'profile_url': graphql_data.get('url', ''),
+            # 'top_languages': featured['top_languages'],
+            # 'top_projects': featured['top_projects'],
+            'followers': graphql_data['followers']['totalCount'],
+            'following': graphql_data['following']['totalCount'],
+            'public_repos': graphql_data['repositories']['totalCount'],
+            # Created in the last year, counted by GitHub's search
+            'pull_requests_merged': (graphql_data.get('mergedPullRequests') or {}).get('issueCount', 0),
+            'issues_closed': (graphql_data.get('closedIssues') or {}).get('issueCount', 0),
+            'achievements': {
+                'total_contributions': graphql_data['contributionsCollection']['contributionCalendar'][
+                    'totalContributions'],
+                'repositories_contributed_to': graphql_data['repositoriesContributedTo']['totalCount'],
+            },
+            'social_accounts': GitHubProfileFetcher._social_accounts_from_profile(
+                username, graphql_data.get('socialAccounts'), readme_content
+            ),
+            'readme_content': readme_content
+        }
 
     @staticmethod
     def fetch_user_profile(username):
@@ -94,141 +251,25 @@ class GitHubProfileFetcher:
             dict: Comprehensive user profile data
         """
         try:
-            if not GitHubProfileFetcher.validate_github_username_sync(username):
+            # Existence and account type are checked by the profile query itself
+            if not GitHubProfileFetcher._validate_username_pattern(username):
                 raise ValueError(f"Invalid GitHub username: '{username}'")
 
-            one_year_ago = (datetime.now() - timedelta(days=365)).isoformat() + 'Z'
-
-            graphql_query = {
-                "query": f"""
-                    query {{
-                      user(login: "{username}") {{
-                        name
-                        bio
-                        location
-                        avatarUrl
-                        url
-                        followers {{
-                          totalCount
-                        }}
-                        following {{
-                          totalCount
-                        }}
-                        repository(name: "{username}") {{
-                          object(expression: "HEAD:README.md") {{
-                            ... on Blob {{
-                              text
-                            }}
-                          }}
-                          defaultBranchRef {{
-                            name
-                          }}
-                        }}
-                        repositories(first: 100, orderBy: {{field: UPDATED_AT, direction: DESC}}) {{
-                          totalCount
-                          nodes {{
-                            name
-                            description
-                            stargazerCount
-                            primaryLanguage {{
-                              name
-                            }}
-                            url
-                            updatedAt
-                          }}
-                        }}
-                        contributionsCollection(from: "{one_year_ago}") {{
-                          contributionCalendar {{
-                            totalContributions
-                          }}
-                          pullRequestContributionsByRepository {{
-                            repository {{
-                              name
-                            }}
-                            contributions(first: 100) {{
-                              totalCount
-                            }}
-                          }}
-                          issueContributionsByRepository {{
-                            repository {{
-                              name
-                            }}
-                            contributions(first: 100) {{
-                              totalCount
-                            }}
-                          }}
-                        }}
-                        pullRequests(first: 100, states: MERGED, orderBy: {{field: UPDATED_AT, direction: DESC}}) {{
-                           nodes {{
-                          createdAt
-                          }}
-                          totalCount
-                        }}
-                        issues(last: 100, states: CLOSED) {{
-                          totalCount
-                          nodes {{
-                            createdAt
-                            }}
-                        }}
-                        repositoriesContributedTo(first: 100, contributionTypes: [COMMIT, ISSUE, PULL_REQUEST, REPOSITORY]) {{
-                          totalCount
-                          nodes {{
-                            name
-                          }}
-                        }}
-                      }}
-                    }}
-                """
-            }
-
-            graphql_url = "https://api.github.com/graphql"
-            graphql_response = requests.post(
-                graphql_url,
+            graphql_response = post_github_query(
+                PROFILE_QUERY,
+                GitHubProfileFetcher._profile_variables(username),
                 headers={
-                    "Authorization": f"Bearer {Settings.get_github_token()}",
+                    "Authorization": f"Bearer {Settings.get_github_token('graphql')}",
                     "Content-Type": "application/json"
-                },
-                json=graphql_query
+                }
             )
             graphql_response.raise_for_status()
 
-            graphql_data = graphql_response.json().get('data', {}).get('user', {})
-            if not graphql_data:
-                raise ValueError(f"User '{username}' not found or query returned no data.")
-            pr_merged_last_year = sum(
-                1 for pr in graphql_data['pullRequests']['nodes'] if
-                pr and datetime.strptime(pr['createdAt'], '%Y-%m-%dT%H:%M:%SZ') > datetime.now() - timedelta(days=365)
-            )
-            issues_closed_last_year = sum(
-                1 for issue in graphql_data['issues']['nodes'] if
-                issue and datetime.strptime(issue['createdAt'], '%Y-%m-%dT%H:%M:%SZ') > datetime.now() - timedelta(
-                    days=365)
-            )
-            # featured = GitHubProjectRanker().get_featured(username)
-            return {
-                'username': username,
-                'name': graphql_data.get('name') or username,
-                'bio': graphql_data.get('bio', ''),
-                'location': graphql_data.get('location', ''),
-                'avatar_url': graphql_data.get('avatarUrl', ''),
-                'profile_url': graphql_data.get('url', ''),
-                # 'top_languages': featured['top_languages'],
-                # 'top_projects': featured['top_projects'],
-                'followers': graphql_data['followers']['totalCount'],
-                'following': graphql_data['following']['totalCount'],
-                'public_repos': graphql_data['repositories']['totalCount'],
-                'pull_requests_merged': pr_merged_last_year if pr_merged_last_year < 100 else f"{100}+",
-                'issues_closed': issues_closed_last_year if issues_closed_last_year < 100 else f"{100}+",
-                'achievements': {
-                    'total_contributions': graphql_data['contributionsCollection']['contributionCalendar'][
-                        'totalContributions'],
-                    'repositories_contributed_to': graphql_data['repositoriesContributedTo']['totalCount'],
-                },
-                'social_accounts': GitHubProfileFetcher.social_accounts(username),
-                'readme_content': (graphql_data.get('repository', {}).get('object', {}).get('text', '')
-                                   if (graphql_data.get('repository') and graphql_data.get('repository', {}).get(
-                    'object')) else '')  # empty string if falsy values
-            }
+            graphql_data = GitHubProfileFetcher._profile_owner(graphql_response.json())
+            if graphql_data is None:
+                return GitHubProfileFetcher._not_found(username)
+
+            return GitHubProfileFetcher._build_profile(username, graphql_data)
 
         except requests.exceptions.HTTPError as e:
             return {"error": f"HTTP Error: {e.response.status_code} - {e.response.reason}"}
@@ -238,160 +279,155 @@ class GitHubProfileFetcher:
             return {"error": f"An unexpected error occurred: {str(e)}"}
 
     @staticmethod
-    def social_accounts(username):
+    async def fetch_user_profile_async(username, validate=True, client=None):
         """
-        Fetch social accounts of the user from GitHub API and README.md
+        Async variant of `fetch_user_profile`
 
         Args:
             username (str): GitHub username
+            validate (bool): Check the username pattern first. Existence and
+                account type are checked by the profile query itself.
+            client (httpx.AsyncClient): Shared GitHub API client, a new one is opened without it
 
         Returns:
-            dict: Social accounts of the user including LinkedIn and Medium
+            dict: Comprehensive user profile data, or an error with
+                `error_type` 'not_found' for missing accounts and organizations
         """
-        social_accounts = []
-
         try:
-            # First try the GitHub API
-            base_url = f"https://api.github.com/users/{username}/social_accounts"
+            if validate and not GitHubProfileFetcher._validate_username_pattern(username):
+                raise ValueError(f"Invalid GitHub username: '{username}'")
 
-            user_response = requests.get(
-                base_url,
-                headers={
-                    "Accept": "application/vnd.github.v3+json",
-                    "Authorization": f"token {Settings.get_github_token()}",
-                }
-            )
-            user_response.raise_for_status()
-            api_accounts = user_response.json()
-
-            # Extract accounts from API response
-            for account in api_accounts:
-                social_accounts.append(account)
-
-            # Check if we need to look for LinkedIn and Medium in README
-            has_linkedin = False
-            has_medium = False
-
-            # Check if LinkedIn or Medium is already in the results (accounting for provider variations)
-            for account in social_accounts:
-                provider = account.get('provider', '').lower()
-                url = account.get('url', '').lower()
-
-                if provider == 'linkedin' or 'linkedin.com' in url:
-                    has_linkedin = True
-                elif provider == 'medium' or 'medium.com' in url:
-                    has_medium = True
-
-            # If LinkedIn or Medium not found, check README.md
-            if not has_linkedin or not has_medium:
-                readme_accounts = GitHubProfileFetcher.get_social_from_readme(username)
-
-                # Add LinkedIn if not already present
-                if not has_linkedin and 'linkedin' in readme_accounts:
-                    social_accounts.append({
-                        'provider': 'linkedin',
-                        'url': readme_accounts['linkedin']
-                    })
-
-                # Add Medium if not already present
-                if not has_medium and 'medium' in readme_accounts:
-                    social_accounts.append({
-                        'provider': 'generic',
-                        'url': readme_accounts['medium']
-                    })
-
-            return social_accounts
+            async with use_client(
+                client,
+                timeout=GitHubProfileFetcher.TIMEOUT_SETTINGS,
+                auth=github_auth,
+                event_hooks=UPSTREAM_EVENT_HOOKS
+            ) as client:
+                graphql_response = await post_github_query_async(
+                    client,
+                    PROFILE_QUERY,
+                    GitHubProfileFetcher._profile_variables(username),
+                    headers={"Content-Type": "application/json"}
+                )
+            graphql_response.raise_for_status()
 
-        except requests.exceptions.HTTPError as e:
-            if e.response.status_code == 404:
-                # If API fails, try README approach
-                readme_accounts = GitHubProfileFetcher.get_social_from_readme(username)
-                return [{'provider': k, 'url': v} for k, v in readme_accounts.items()]
-            return {"error": f"HTTP Error: {e.response.status_code} - {e.response.reason}"}
-        except requests.exceptions.RequestException as e:
+            graphql_data = GitHubProfileFetcher._profile_owner(graphql_response.json())
+            if graphql_data is None:
+                return GitHubProfileFetcher._not_found(username)
+
+            return GitHubProfileFetcher._build_profile(username, graphql_data)
+
+        except httpx.HTTPStatusError as e:
+            return {"error": f"HTTP Error: {e.response.status_code} - {e.response.reason_phrase}"}
+        except httpx.RequestError as e:
             return {"error": f"Request failed: {str(e)}"}
         except Exception as e:
             return {"error": f"An unexpected error occurred: {str(e)}"}
 
     @staticmethod
-    def get_social_from_readme(username):
+    def _missing_social_providers(social_accounts):
         """
-        Extract social media links from a user's GitHub README.md file
+        Check which of LinkedIn and Medium are missing from the social accounts
+
+        Args:
+            social_accounts (list): Social accounts returned by the GitHub API
+
+        Returns:
+            tuple: (has_linkedin, has_medium)
+        """
+        has_linkedin = False
+        has_medium = False
+
+        # Check if LinkedIn or Medium is already in the results (accounting for provider variations)
+        for account in social_accounts:
+            provider = account.get('provider', '').lower()
+            url = account.get('url', '').lower()
+
+            if provider == 'linkedin' or 'linkedin.com' in url:
+                has_linkedin = True
+            elif provider == 'medium' or 'medium.com' in url:
+                has_medium = True
+
+        return has_linkedin, has_medium
+
+    @staticmethod
+    def _merge_readme_accounts(social_accounts, readme_accounts, has_linkedin, has_medium):
+        """
+        Append LinkedIn and Medium links found in the README to the social accounts
+
+        Args:
+            social_accounts (list): Social accounts returned by the GitHub API
+            readme_accounts (dict): Social accounts found in README
+            has_linkedin (bool): LinkedIn is already present
+            has_medium (bool): Medium is already present
+
+        Returns:
+            list: Social accounts of the user
+        """
+        # Add LinkedIn if not already present
+        if not has_linkedin and 'linkedin' in readme_accounts:
+            social_accounts.append({
+                'provider': 'linkedin',
+                'url': readme_accounts['linkedin']
+            })
+
+        # Add Medium if not already present
+        if not has_medium and 'medium' in readme_accounts:
+            social_accounts.append({
+                'provider': 'generic',
+                'url': readme_accounts['medium']
+            })
+
+        return social_accounts
+
+    @staticmethod
+    def _social_accounts_from_profile(username, social_accounts_data, readme_content):
+        """
+        Social accounts of the user from the profile GraphQL response, with
+        LinkedIn and Medium links found in the already fetched README
 
         Args:
             username (str): GitHub username
+            social_accounts_data (dict): `socialAccounts` connection of the GraphQL user
+            readme_content (str): Profile README text
 
         Returns:
-            dict: Social accounts found in README
+            list: Social accounts of the user including LinkedIn and Medium
         """
-        try:
-            # Get README content
-            readme_url = f"https://api.github.com/repos/{username}/{username}/readme"
-            readme_response = requests.get(
-                readme_url,
-                headers={
-                    "Accept": "application/vnd.github.v3+json",
-                    "Authorization": f"token {Settings.get_github_token()}",
-                }
+        # GraphQL providers are enum values (LINKEDIN), the REST API's are lowercase
+        social_accounts = [
+            {'provider': account['provider'].lower(), 'url': account['url']}
+            for account in (social_accounts_data or {}).get('nodes') or []
+            if account
+        ]
+
+        has_linkedin, has_medium = GitHubProfileFetcher._missing_social_providers(social_accounts)
+        if readme_content and (not has_linkedin or not has_medium):
+            readme_accounts = GitHubProfileFetcher.extract_social_links(readme_content, username)
+            GitHubProfileFetcher._merge_readme_accounts(
+                social_accounts, readme_accounts, has_linkedin, has_medium
             )
-            readme_response.raise_for_status()
-
-            # Decode the content (it's base64 encoded)
-            content_encoded = readme_response.json().get('content', '')
-            content = base64.b64decode(content_encoded).decode('utf-8')
-
-            # Find social links
-            social_links = {
-                'linkedin': GitHubProfileFetcher.find_best_match(content, username, [
-                    r'https?://(?:www\.)?linkedin\.com/in/([a-zA-Z0-9_-]+)/?',
-                    r'linkedin\.com/in/([a-zA-Z0-9_-]+)/?'
-                ]),
-                'medium': GitHubProfileFetcher.find_best_match(content, username, [
-                    r'https?://(?:www\.)?medium\.com/@?([a-zA-Z0-9_-]+)/?',
-                    r'medium\.com/@?([a-zA-Z0-9_-]+)/?',
-                    r'https?://([a-zA-Z0-9_-]+)\.medium\.com/?'  # Pattern for username.medium.com
-                ])
-            }
-
-            # Filter out None values
-            return {k: v for k, v in social_links.items() if v}
+        return social_accounts
 
-        except requests.exceptions.HTTPError as e:
-            # Try alternative README locations if first attempt fails
-            try:
-                # Some users have README in their main profile repository with different names
-                alt_readme_url = f"https://api.github.com/repos/{username}/{username}/contents/README.md"
-                alt_response = requests.get(
-                    alt_readme_url,
-                    headers={
-                        "Accept": "application/vnd.github.v3+json",
-                        "Authorization": f"token {Settings.get_github_token()}",
-                    }
-                )
-                alt_response.raise_for_status()
-
-                content_encoded = alt_response.json().get('content', '')
-                content = base64.b64decode(content_encoded).decode('utf-8')
-
-                # Process content same as above
-                social_links = {
-                    'linkedin': GitHubProfileFetcher.find_best_match(content, username, [
-                        r'https?://(?:www\.)?linkedin\.com/in/([a-zA-Z0-9_-]+)/?',
-                        r'linkedin\.com/in/([a-zA-Z0-9_-]+)/?'
-                    ]),
-                    'medium': GitHubProfileFetcher.find_best_match(content, username, [
-                        r'https?://(?:www\.)?medium\.com/@?([a-zA-Z0-9_-]+)/?',
-                        r'medium\.com/@?([a-zA-Z0-9_-]+)/?',
-                        r'https?://([a-zA-Z0-9_-]+)\.medium\.com/?'  # Pattern for username.medium.com
-                    ])
-                }
+    @staticmethod
+    def extract_social_links(content, username):
+        """
+        Extract LinkedIn and Medium links from README text
 
-                return {k: v for k, v in social_links.items() if v}
+        Args:
+            content (str): README content
+            username (str): GitHub username
 
-            except:
-                return {}
-        except Exception as e:
-            return {}
+        Returns:
+            dict: Social accounts found in README
+        """
+        social_links = {
+            provider: GitHubProfileFetcher.find_best_match(content, username, patterns)
+            for provider, patterns in GitHubProfileFetcher.SOCIAL_PATTERNS.items()
+        }
+
+        # Filter out None values
+        return {k: v for k, v in social_links.items() if v}
 
     @staticmethod
     def find_best_match(content, username, patterns):
@@ -446,3 +482,107 @@ class GitHubProfileFetcher:
         """
         # Simple implementation using difflib
         return difflib.SequenceMatcher(None, str1, str2).ratio()
+
+
+class GitHubProfileBatchFetcher:
+    """
+    Fetch the profiles of many users with one GraphQL request per batch, each
+    user under its own alias, for bulk refreshes and cache warming.
+
+    The batch size adapts to the cost GitHub reports for every request, so a
+    request costs about `max_cost` points, and is halved when GitHub fails a
+    request as too heavy. A missing or failing login only fails its own profile.
+    """
+
+    # Statuses and GraphQL errors of queries too heavy to finish in time
+    HEAVY_QUERY_STATUSES = (502, 504)
+    HEAVY_QUERY_ERRORS = ('RESOURCE_LIMITS_EXCEEDED', 'MAX_NODE_LIMIT_EXCEEDED')
+
+    def __init__(self, client=None, batch_size=None, max_batch_size=None, max_cost=None):
+        """
+        Args:
+            client (httpx.AsyncClient): Shared GitHub API client, a new one is opened per call without it
+            batch_size (int): Initial number of profiles per request
+            max_batch_size (int): Largest number of profiles per request
+            max_cost (int): Rate limit points a request aims for
+        """
+        self.client = client
+        self.max_batch_size = max_batch_size or Settings.GITHUB_BATCH_MAX_SIZE
+        self.batch_size = min(batch_size or Settings.GITHUB_BATCH_SIZE, self.max_batch_size)
+        self.max_cost = max_cost or Settings.GITHUB_BATCH_MAX_COST
+
+    async def fetch_profiles_async(self, usernames):
+        """
+        Fetch the profiles of any number of users, a batch at a time
+
+        Args:
+            usernames (list): GitHub usernames
+
+        Returns:
+            dict: Profile data or error result, as returned by
+                `GitHubProfileFetcher.fetch_user_profile_async`, per username
+        """
+        pending = list(dict.fromkeys(usernames))
+        results = {}
+        async with self._client() as client:
+            while pending:
+                batch, pending = pending[:self.batch_size], pending[self.batch_size:]
+                results.update(await self._fetch_batch(batch, client))
+        return results
+
+    def _client(self):
+        return use_client(
+            self.client,
+            timeout=GitHubProfileFetcher.TIMEOUT_SETTINGS,
+            auth=github_auth,
+            event_hooks=UPSTREAM_EVENT_HOOKS
+        )
+
+    async def _fetch_batch(self, usernames, client):
+        try:
+            response = await post_github_query_async(
+                client,
+                batch_profile_query(len(usernames)),
+                GitHubProfileFetcher._batch_profile_variables(usernames),
+                headers={"Content-Type": "application/json"}
+            )
+            if response.status_code in self.HEAVY_QUERY_STATUSES and len(usernames) > 1:
+                return await self._split(usernames, client)
+            response.raise_for_status()
+            response_data = response.json()
+        except httpx.TimeoutException:
+            if len(usernames) > 1:
+                return await self._split(usernames, client)
+            return {usernames[0]: {"error": "Request timed out"}}
+        except httpx.HTTPStatusError as e:
+            error = f"HTTP Error: {e.response.status_code} - {e.response.reason_phrase}"
+            return {username: {"error": error} for username in usernames}
+        except httpx.RequestError as e:
+            return {username: {"error": f"Request failed: {str(e)}"} for username in usernames}
+        except ValueError as e:
+            return {username: {"error": f"An unexpected error occurred: {str(e)}"} for username in usernames}
+
+        errors = response_data.get('errors') or []
+        if len(usernames) > 1 and any(error.get('type') in self.HEAVY_QUERY_ERRORS for error in errors):
+            return await self._split(usernames, client)
+
+        self._adapt(len(usernames), (response_data.get('data') or {}).get('rateLimit'))
+        return {
+            username: GitHubProfileFetcher._profile_result(username, response_data, f"u{i}")
+            for i, username in enumerate(usernames)
+        }
+
+    async def _split(self, usernames, client):
+        """Fetch a batch too heavy for one request in two halves, and use smaller batches from now on"""
+        half = len(usernames) // 2
+        self.batch_size = max(1, min(self.batch_size, half))
+        results = await self._fetch_batch(usernames[:half], client)
+        results.update(await self._fetch_batch(usernames[half:], client))
+        return results
+
+    def _adapt(self, count, rate_limit):
+        """Size the next batches so they cost about `max_cost` points, given what this one cost"""
+        if not rate_limit or not rate_limit.get('cost'):
+            return
+        cost_per_profile = rate_limit['cost'] / count
+        self.batch_size = max(1, min(self.max_batch_size, int(self.max_cost / cost_per_profile)))
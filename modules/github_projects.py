@@ -1,24 +1,51 @@
+import asyncio
 from collections import Counter
 from datetime import datetime
 
+import httpx
 import numpy as np
-import requests
 
 from config.settings import Settings
+from modules.github_queries import PINNED_REPOS_QUERY, post_github_query, post_github_query_async
+from utils import conditional_cache
+from utils.http_clients import use_client
+from utils.metrics import UPSTREAM_EVENT_HOOKS
+from utils.rate_limit import github_auth
 
 
 class GitHubProjectRanker:
-    def __init__(self):
+    TIMEOUT_SETTINGS = httpx.Timeout(
+        connect=10.0,
+        read=30.0,
+        write=10.0,
+        pool=10.0
+    )
+
+    def __init__(self, client=None):
         """
         Initialize the GitHub Project Ranker
 
+        :param client: Shared GitHub API client (httpx.AsyncClient) for the async
+            methods; without it each call opens a client of its own
         """
-        github_token = Settings.get_github_token()
-        self.headers = {
+        self.client = client
+        # Async requests are authenticated by `github_auth`, which picks the token
+        self.api_headers = {
             'Accept': 'application/vnd.github.v3+json'
         }
+
+    def _sync_headers(self, resource='core'):
+        """
+        Headers of one blocking request, with a token leased for it
+
+        :param resource: GitHub rate limit resource of the request
+        :return: Request headers
+        """
+        headers = dict(self.api_headers)
+        github_token = Settings.get_github_token(resource)
         if github_token:
-            self.headers['Authorization'] = f'token {github_token}'
+            headers['Authorization'] = f'token {github_token}'
+        return headers
 
     def fetch_user_repos(self, username):
         """
@@ -27,13 +54,13 @@ class GitHubProjectRanker:
         :param username: GitHub username
         :return: List of repository dictionaries
         """
-        url = f'https://api.github.com/users/{username}/repos'
+        url = f'{Settings.GITHUB_API_URL}/users/{username}/repos'
         repos = []
         page = 1
 
         while True:
             params = {'page': page, 'per_page': 100}
-            response = requests.get(url, headers=self.headers, params=params)
+            response = conditional_cache.get(url, headers=self._sync_headers(), params=params)
 
             if response.status_code != 200:
                 print(f"Error fetching repositories: {response.status_code}")
@@ -48,6 +75,36 @@ class GitHubProjectRanker:
 
         return repos
 
+    async def fetch_user_repos_async(self, username, client):
+        """
+        Async variant of `fetch_user_repos`.
+        Stops as soon as a page comes back short instead of requesting an empty page.
+        Unlike the sync variant, upstream failures raise, so a cached result
+        is served stale instead of being replaced by an empty one.
+
+        :param username: GitHub username
+        :param client: httpx.AsyncClient used for the requests
+        :return: List of repository dictionaries
+        :raises httpx.HTTPError: A page could not be fetched
+        """
+        url = f'{Settings.GITHUB_API_URL}/users/{username}/repos'
+        per_page = 100
+        repos = []
+        page = 1
+
+        while True:
+            params = {'page': page, 'per_page': per_page}
+            response = await client.get(url, headers=self.api_headers, params=params)
+            response.raise_for_status()
+
+            page_repos = response.json()
+            repos.extend(page_repos)
+            if len(page_repos) < per_page:
+                break
+            page += 1
+
+        return repos
+
     def fetch_pinned_repos(self, username):
         """
         Fetch pinned repositories for a user using the GraphQL API
@@ -55,34 +112,39 @@ class GitHubProjectRanker:
         :param username: GitHub username
         :return: List of pinned repository names
         """
-        url = 'https://api.github.com/graphql'
-        query = """
-        query($username: String!) {
-          user(login: $username) {
-            pinnedItems(first: 6, types: REPOSITORY) {
-              nodes {
-                ... on Repository {
-                  name
-                }
-              }
-            }
-          }
-        }
-        """
-
-        variables = {'username': username}
-
-        response = requests.post(
-            url,
-            headers=self.headers,
-            json={'query': query, 'variables': variables}
-        )
+        response = post_github_query(PINNED_REPOS_QUERY, {'login': username}, headers=self._sync_headers('graphql'))
 
         if response.status_code != 200:
             print(f"Error fetching pinned repos: {response.status_code}")
             return []
 
-        data = response.json()
+        return self._parse_pinned_repos(response.json())
+
+    async def fetch_pinned_repos_async(self, username, client):
+        """
+        Async variant of `fetch_pinned_repos`, raising on upstream failures
+        like `fetch_user_repos_async`
+
+        :param username: GitHub username
+        :param client: httpx.AsyncClient used for the request
+        :return: List of pinned repository names
+        :raises httpx.HTTPError: The query could not be fetched
+        """
+        response = await post_github_query_async(
+            client, PINNED_REPOS_QUERY, {'login': username}, headers=self.api_headers
+        )
+        response.raise_for_status()
+
+        return self._parse_pinned_repos(response.json())
+
+    @staticmethod
+    def _parse_pinned_repos(data):
+        """
+        Extract pinned repository names from the GraphQL response
+
+        :param data: Decoded GraphQL response
+        :return: List of pinned repository names
+        """
         try:
             pinned_items = data['data']['user']['pinnedItems']['nodes']
             return [item['name'] for item in pinned_items]
@@ -163,6 +225,38 @@ class GitHubProjectRanker:
         # Fetch repositories and pinned repos
         repos = self.fetch_user_repos(username)
         pinned_repos = self.fetch_pinned_repos(username)
+        return self._rank_featured(repos, pinned_repos, top_n)
+
+    async def get_featured_async(self, username, top_n=8):
+        """
+        Async variant of `get_featured`; the repository list and the pinned
+        repositories are fetched concurrently.
+
+        :param username: GitHub username
+        :param top_n: Number of top projects to return
+        :return: List of top projects with details
+        """
+        async with use_client(
+            self.client,
+            timeout=self.TIMEOUT_SETTINGS,
+            auth=github_auth,
+            event_hooks=UPSTREAM_EVENT_HOOKS
+        ) as client:
+            repos, pinned_repos = await asyncio.gather(
+                self.fetch_user_repos_async(username, client),
+                self.fetch_pinned_repos_async(username, client)
+            )
+        return self._rank_featured(repos, pinned_repos, top_n)
+
+    def _rank_featured(self, repos, pinned_repos, top_n):
+        """
+        Score repositories and select the featured ones
+
+        :param repos: List of repository dictionaries
+        :param pinned_repos: List of pinned repository names
+        :param top_n: Number of top projects to return
+        :return: Top projects and top languages
+        """
         top_languages = self.get_top_languages(repos)
 
         # Calculate scores
@@ -0,0 +1,243 @@
+"""
+GitHub GraphQL documents, built and normalized once at import. Request
+values go in the variables; the fragments are shared between queries and
+can be composed into one request with `user_query`.
+"""
+from functools import lru_cache
+
+from config.settings import Settings
+from utils.graphql import Fragment, Query, post_query, post_query_async, variable_definitions
+from utils.rate_limit import github_tokens
+
+GRAPHQL_URL = f"{Settings.GITHUB_API_URL}/graphql"
+
+PROFILE_FIELDS = Fragment("ProfileFields", "User", """
+    name
+    bio
+    location
+    avatarUrl
+    url
+    followers {
+      totalCount
+    }
+    following {
+      totalCount
+    }
+    socialAccounts(first: 20) {
+      nodes {
+        provider
+        url
+      }
+    }
+    repositoriesContributedTo(first: 100, contributionTypes: [COMMIT, ISSUE, PULL_REQUEST, REPOSITORY]) {
+      totalCount
+      nodes {
+        name
+      }
+    }
+""")
+
+RECENT_REPOSITORIES = Fragment("RecentRepositories", "User", """
+    repositories(first: 100, orderBy: {field: UPDATED_AT, direction: DESC}) {
+      totalCount
+      nodes {
+        name
+        description
+        stargazerCount
+        primaryLanguage {
+          name
+        }
+        url
+        updatedAt
+      }
+    }
+""")
+
+CONTRIBUTIONS = Fragment("Contributions", "User", """
+    contributionsCollection(from: $from) {
+      contributionCalendar {
+        totalContributions
+      }
+      pullRequestContributionsByRepository {
+        repository {
+          name
+        }
+        contributions(first: 100) {
+          totalCount
+        }
+      }
+      issueContributionsByRepository {
+        repository {
+          name
+        }
+        contributions(first: 100) {
+          totalCount
+        }
+      }
+    }
+""", variables=(("from", "DateTime!"),))
+
+# Of the profile repository, the one named after its owner
+PROFILE_README = Fragment("ProfileReadme", "Repository", """
+    object(expression: "HEAD:README.md") {
+      ... on Blob {
+        text
+      }
+    }
+    defaultBranchRef {
+      name
+    }
+""")
+
+PINNED_REPOSITORIES = Fragment("PinnedRepositories", "User", """
+    pinnedItems(first: 6, types: REPOSITORY) {
+      nodes {
+        ... on Repository {
+          name
+        }
+      }
+    }
+""")
+
+PROFILE_FRAGMENTS = (PROFILE_FIELDS, RECENT_REPOSITORIES, CONTRIBUTIONS, PROFILE_README)
+
+# Issue searches counted by GitHub for the profile, by field: exact counts
+# without downloading the pull requests and issues themselves
+PROFILE_COUNTS = {
+    "mergedPullRequests": "author:{login} is:pr is:merged created:>{since}",
+    "closedIssues": "author:{login} is:issue is:closed created:>{since}",
+}
+
+
+def profile_selection(login_variable):
+    """
+    Profile fields of the user whose login is in `login_variable`, see
+    `GitHubProfileFetcher._build_profile`. Organizations only select `__typename`.
+
+    Args:
+        login_variable (str): GraphQL variable holding the login, e.g. `$login`
+
+    Returns:
+        str: `repositoryOwner` field spreading `PROFILE_FRAGMENTS`
+    """
+    return f"""
+        repositoryOwner(login: {login_variable}) {{
+          __typename
+          ... on User {{
+            {PROFILE_FIELDS.spread}
+            {RECENT_REPOSITORIES.spread}
+            {CONTRIBUTIONS.spread}
+            repository(name: {login_variable}) {{
+              {PROFILE_README.spread}
+            }}
+          }}
+        }}
+    """
+
+
+def counts_selection(prefix=""):
+    """
+    `PROFILE_COUNTS` searches, each aliased and with its search query in the
+    variable of its field name, both prefixed with `prefix`
+
+    Args:
+        prefix (str): Prefix telling the users of a batch apart, e.g. `u0_`
+
+    Returns:
+        str: Root fields of a GraphQL query
+    """
+    return "".join(
+        f"{prefix}{name}: search(query: ${prefix}{name}, type: ISSUE) {{ issueCount }}\n"
+        for name in PROFILE_COUNTS
+    )
+
+
+def counts_variables(prefix=""):
+    """Variable definitions of `counts_selection`"""
+    return [(f"{prefix}{name}", "String!") for name in PROFILE_COUNTS]
+
+
+def counts_values(login, since, prefix=""):
+    """Values of the `counts_variables` of a user, counting what was created after `since`"""
+    return {f"{prefix}{name}": search.format(login=login, since=since) for name, search in PROFILE_COUNTS.items()}
+
+
+PROFILE_QUERY = Query(f"""
+    query{variable_definitions([("login", "String!"), *counts_variables()], PROFILE_FRAGMENTS)} {{
+      {profile_selection("$login")}
+      {counts_selection()}
+    }}
+""", PROFILE_FRAGMENTS)
+
+
+@lru_cache(maxsize=None)
+def batch_profile_query(count):
+    """
+    Query of `count` profiles, the user at index `i` under the alias `u{i}`
+    with its login in `$l{i}` and its counts prefixed with `u{i}_`, and the
+    cost of the query
+
+    Args:
+        count (int): Number of users
+
+    Returns:
+        Query: Built once per count
+    """
+    logins = [(f"l{i}", "String!") for i in range(count)]
+    logins += [variable for i in range(count) for variable in counts_variables(f"u{i}_")]
+    aliases = "".join(
+        f"u{i}: {profile_selection(f'$l{i}')} {counts_selection(f'u{i}_')}" for i in range(count)
+    )
+    return Query(f"""
+        query{variable_definitions(logins, PROFILE_FRAGMENTS)} {{
+          {aliases}
+          rateLimit {{
+            cost
+            remaining
+            resetAt
+          }}
+        }}
+    """, PROFILE_FRAGMENTS)
+
+
+@lru_cache(maxsize=None)
+def user_query(*fragments):
+    """
+    Query of the `user` with the login in `$login`, selecting the given User
+    fragments, so sub-queries are fetched together in one request
+
+    Args:
+        *fragments (Fragment): User fragments, e.g. RECENT_REPOSITORIES and PINNED_REPOSITORIES
+
+    Returns:
+        Query: Built once per combination of fragments
+    """
+    spreads = " ".join(fragment.spread for fragment in fragments)
+    return Query(f"""
+        query{variable_definitions([("login", "String!")], fragments)} {{
+          user(login: $login) {{
+            {spreads}
+          }}
+        }}
+    """, fragments)
+
+
+PINNED_REPOS_QUERY = user_query(PINNED_REPOSITORIES)
+
+
+def post_github_query(query, variables=None, **kwargs):
+    """
+    POST a query to the GitHub GraphQL API with requests, see
+    `utils.graphql.post_query`. The response's rate limit headers are
+    recorded against the token in the `Authorization` header.
+    """
+    response = post_query(GRAPHQL_URL, query, variables, persisted=Settings.GITHUB_PERSISTED_QUERIES, **kwargs)
+    github_tokens.record_authorized((kwargs.get("headers") or {}).get("Authorization"), "graphql", response)
+    return response
+
+
+async def post_github_query_async(client, query, variables=None, **kwargs):
+    """POST a query to the GitHub GraphQL API with an httpx client, see `utils.graphql.post_query_async`"""
+    return await post_query_async(
+        client, GRAPHQL_URL, query, variables, persisted=Settings.GITHUB_PERSISTED_QUERIES, **kwargs
+    )
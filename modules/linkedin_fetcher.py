@@ -1,12 +1,16 @@
 import httpx
 import re
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
+
+from config.settings import Settings
+from utils.http_clients import use_client
+from utils.metrics import UPSTREAM_EVENT_HOOKS
 
 
 class LinkedInProfileFetcher:
     """Fetch and process essential LinkedIn profile data"""
 
-    BASE_URL = "https://notes.cleve.ai/api/linkedin-unwrapped"
+    BASE_URL = Settings.LINKEDIN_API_URL
     TIMEOUT_SETTINGS = httpx.Timeout(
         connect=10.0,
         read=30.0,
@@ -14,12 +18,27 @@ class LinkedInProfileFetcher:
         pool=10.0
     )
 
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        """Shared client for `fetch_profile_async`, a new one is opened per call without it"""
+        self.client = client
+
     @staticmethod
     def _validate_linkedin_username(username: str) -> bool:
         """Validate LinkedIn username pattern"""
         pattern = r'^[\w\-]+$'
         return bool(re.match(pattern, username))
 
+    @staticmethod
+    def username_from_social_accounts(social_accounts: List[Dict[str, Any]]) -> Optional[str]:
+        """Extract the LinkedIn username from a GitHub profile's social accounts"""
+        for account in social_accounts or []:
+            if account.get('provider') != 'linkedin':
+                continue
+            username = account.get('url', '').split('in/')[-1].replace('/', '')
+            if username and LinkedInProfileFetcher._validate_linkedin_username(username):
+                return username
+        return None
+
     @staticmethod
     def _process_response(data: Dict[str, Any]) -> Dict[str, Any]:
         """Extract and structure essential profile data"""
@@ -94,7 +113,7 @@ class LinkedInProfileFetcher:
             "user": False
         }
 
-        async with httpx.AsyncClient(timeout=self.TIMEOUT_SETTINGS) as client:
+        async with use_client(self.client, timeout=self.TIMEOUT_SETTINGS, event_hooks=UPSTREAM_EVENT_HOOKS) as client:
             try:
                 response = await client.post(
                     self.BASE_URL,
@@ -0,0 +1,71 @@
+import asyncio
+import time
+
+import redis.asyncio as redis
+
+
+class FakeRedis:
+    """Minimal in-memory stand-in for the redis.asyncio commands used by the cache layer"""
+
+    def __init__(self):
+        self.store = {}
+        self.expiry = {}
+        self.published = []
+
+    def _expire_stale(self, key):
+        if key in self.expiry and self.expiry[key] <= time.time():
+            self.store.pop(key, None)
+            self.expiry.pop(key, None)
+
+    async def get(self, key):
+        self._expire_stale(key)
+        return self.store.get(key)
+
+    async def mget(self, keys):
+        self.mget_calls = getattr(self, "mget_calls", 0) + 1
+        return [await self.get(key) for key in keys]
+
+    async def set(self, key, value, nx=False, ex=None):
+        self._expire_stale(key)
+        if nx and key in self.store:
+            return None
+        self.store[key] = value
+        if ex is not None:
+            self.expiry[key] = time.time() + ex
+        return True
+
+    async def setex(self, name, time, value):
+        return await self.set(name, value, ex=time)
+
+    async def delete(self, key):
+        return 1 if self.store.pop(key, None) is not None else 0
+
+    async def lpush(self, key, value):
+        self.store.setdefault(key, []).insert(0, value)
+        return len(self.store[key])
+
+    async def brpop(self, keys, timeout=0):
+        for key in keys:
+            if self.store.get(key):
+                return key, self.store[key].pop()
+        await asyncio.sleep(min(timeout, 0.01))
+        return None
+
+    async def eval(self, script, numkeys, key, token):
+        if self.store.get(key) == token:
+            del self.store[key]
+            return 1
+        return 0
+
+    async def publish(self, channel, message):
+        self.published.append((channel, message))
+        return 0
+
+
+class UnreachableRedis:
+    """Redis client whose every command fails as if the server were down"""
+
+    def __getattr__(self, name):
+        async def command(*args, **kwargs):
+            raise redis.ConnectionError("Error connecting to redis:6379")
+        return command
@@ -0,0 +1,374 @@
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, suppress
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+import api.main as main
+from config.settings import Settings
+from modules.github_fetcher import GitHubProfileBatchFetcher, GitHubProfileFetcher
+from modules.github_projects import GitHubProjectRanker
+from modules.linkedin_fetcher import LinkedInProfileFetcher
+from modules.tests.fake_redis import FakeRedis
+from utils.cache import MemoryCache, ResponseCache
+from utils.job_queue import JobQueue
+from utils.single_flight import SingleFlight
+from utils.user import INVALID_USERNAME_DETAIL
+
+API_HEADERS = {"X-API-Key": Settings.API_KEYS[0]}
+USERS = ("octocat", "hubot")
+ORGANIZATIONS = ("github",)
+
+
+def github_result(username):
+    """What the profile fetchers return for a username"""
+    if username not in USERS:
+        return GitHubProfileFetcher._not_found(username)
+    return {
+        "username": username,
+        "name": username.title(),
+        "followers": 10,
+        "social_accounts": [{"provider": "linkedin", "url": f"https://www.linkedin.com/in/{username}"}],
+    }
+
+
+class Upstream:
+    """Stubbed GitHub, LinkedIn and Groq, recording the calls made to them"""
+
+    def __init__(self):
+        self.profile_calls = []
+        self.batch_calls = []
+        self.project_calls = []
+        self.linkedin_calls = []
+        self.ai_calls = []
+        self.batches_in_flight = 0
+        self.max_batches_in_flight = 0
+        self.ai_delay = 0.0
+        self.ai_error = None
+        self.profile_delay = 0.01
+
+    async def fetch_user_profile(self, username, validate=True, client=None):
+        self.profile_calls.append(username)
+        await asyncio.sleep(self.profile_delay)
+        return github_result(username)
+
+    async def fetch_profiles(self, usernames):
+        self.batch_calls.append(list(usernames))
+        self.batches_in_flight += 1
+        self.max_batches_in_flight = max(self.max_batches_in_flight, self.batches_in_flight)
+        try:
+            await asyncio.sleep(0.02)
+        finally:
+            self.batches_in_flight -= 1
+        return {username: github_result(username) for username in usernames}
+
+    async def fetch_account_type(self, username, client=None):
+        if username in USERS:
+            return "User"
+        return "Organization" if username in ORGANIZATIONS else None
+
+    async def get_featured(self, username):
+        self.project_calls.append(username)
+        return {"top_projects": [{"name": f"{username}-project"}], "top_languages": [["Python", 1]]}
+
+    async def fetch_linkedin(self, username):
+        self.linkedin_calls.append(username)
+        return {"basic_info": {"username": username}}
+
+    def ai_section(self, section):
+        async def generate(ai_generator, profile):
+            self.ai_calls.append((section, profile["username"]))
+            await asyncio.sleep(self.ai_delay)
+            if self.ai_error is not None:
+                raise self.ai_error
+            return f"{section} of {profile['username']}"
+        return generate
+
+
+@pytest.fixture
+def upstream():
+    return Upstream()
+
+
+@pytest.fixture
+def fake_redis():
+    return FakeRedis()
+
+
+@pytest.fixture
+def client(upstream, fake_redis):
+    """API client on a fake Redis, with every upstream call stubbed by `upstream`"""
+    single_flight = SingleFlight(fake_redis)
+    cache = ResponseCache(fake_redis, single_flight, soft_ttl=60, hard_ttl=600)
+    ai_jobs = JobQueue(None, "ai_jobs", main.enrich_github_profile, job_timeout=5)
+    patches = [
+        patch.object(main, "redis_client", None),
+        patch.object(main, "single_flight", single_flight),
+        patch.object(main, "response_cache", cache),
+        patch.object(main, "ai_jobs", ai_jobs),
+        patch.object(main, "AIDescriptionGenerator", lambda *args, **kwargs: None),
+        patch.dict(main.AI_SECTIONS, {section: upstream.ai_section(section) for section in main.AI_SECTIONS}),
+        patch.object(main.app.state, "response_cache", cache),
+        patch.object(GitHubProfileFetcher, "fetch_user_profile_async", staticmethod(upstream.fetch_user_profile)),
+        patch.object(GitHubProfileFetcher, "fetch_account_type", staticmethod(upstream.fetch_account_type)),
+        patch.object(GitHubProfileBatchFetcher, "fetch_profiles_async", lambda self, usernames: upstream.fetch_profiles(usernames)),
+        patch.object(GitHubProjectRanker, "get_featured_async", lambda self, username: upstream.get_featured(username)),
+        patch.object(LinkedInProfileFetcher, "fetch_profile_async", lambda self, username: upstream.fetch_linkedin(username)),
+    ]
+    with ExitStack() as stack:
+        for context in patches:
+            stack.enter_context(context)
+        with TestClient(main.app, headers=API_HEADERS) as test_client:
+            yield test_client
+
+
+def ndjson(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def wait_for_job(client, username, status):
+    for _ in range(200):
+        job = client.get(f"/user/{username}/profile/status").json()["job"]
+        if job is not None and job["status"] == status:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"the AI job of {username} never was {status}")
+
+
+def wait_for_ready(client, username):
+    for _ in range(200):
+        status = client.get(f"/user/{username}/profile/status").json()
+        if status["about_status"] == "ready":
+            return status
+        time.sleep(0.01)
+    raise AssertionError(f"the AI sections of {username} were never ready")
+
+
+class TestProfilesBatch:
+    def test_one_line_per_deduplicated_username(self, client, upstream):
+        response = client.post("/users/profiles", json={
+            "usernames": ["Octocat", "octocat ", "hubot", "ghost", "bad--name"]
+        })
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = {line["username"]: line for line in ndjson(response)}
+        assert len(ndjson(response)) == len(lines) == 4
+        assert lines["octocat"]["profile"]["name"] == "Octocat"
+        assert lines["hubot"]["profile"]["name"] == "Hubot"
+        assert lines["ghost"]["error"] == INVALID_USERNAME_DETAIL
+        assert lines["bad--name"]["error"] == "Invalid GitHub username."
+        # Misses are fetched together, invalid usernames never reach GitHub
+        assert sorted(username for batch in upstream.batch_calls for username in batch) == ["ghost", "hubot", "octocat"]
+
+    def test_cached_profiles_are_not_fetched(self, client, upstream):
+        client.get("/user/octocat/profile")
+
+        lines = ndjson(client.post("/users/profiles", json={"usernames": ["octocat"]}))
+
+        assert lines[0]["profile"]["username"] == "octocat"
+        assert upstream.batch_calls == []
+
+    def test_batches_run_with_bounded_concurrency(self, client, upstream):
+        usernames = [f"user{i}" for i in range(8)]
+        with patch.object(Settings, "PROFILE_BATCH_CONCURRENCY", 2), \
+                patch.object(main.upstream_clients.profile_batch_fetcher, "batch_size", 1):
+            lines = ndjson(client.post("/users/profiles", json={"usernames": usernames}))
+
+        assert sorted(line["username"] for line in lines) == usernames
+        assert len(upstream.batch_calls) == 8
+        assert upstream.max_batches_in_flight == 2
+
+    def test_usernames_are_required(self, client):
+        assert client.post("/users/profiles", json={"usernames": []}).status_code == 422
+
+
+class TestProfile:
+    def test_matching_etag_is_not_modified(self, client):
+        client.get("/user/octocat/profile")
+        # Settled, the AI job rewrites the pending profile
+        wait_for_ready(client, "octocat")
+        first = client.get("/user/octocat/profile")
+        assert first.status_code == 200
+        assert first.json()["username"] == "octocat"
+
+        second = client.get("/user/octocat/profile", headers={"If-None-Match": first.headers["etag"]})
+        assert second.status_code == 304
+        assert second.content == b""
+
+    def test_missing_user_is_rejected(self, client):
+        response = client.get("/user/ghost/profile")
+        assert response.status_code == 400
+        assert response.json()["detail"] == INVALID_USERNAME_DETAIL
+
+    def test_status_follows_the_ai_job(self, client, upstream):
+        assert client.get("/user/octocat/profile/status").json() == {
+            "username": "octocat", "about_status": None, "job": None
+        }
+        assert client.get("/user/octocat/profile").json()["about_status"] == "pending"
+
+        # The profile is stored as ready just before the job is marked done
+        wait_for_job(client, "octocat", "done")
+        assert client.get("/user/octocat/profile/status").json()["about_status"] == "ready"
+        profile = client.get("/user/octocat/profile").json()
+        assert profile["about"] == "about of octocat"
+        assert profile["seo"] == "seo of octocat"
+
+    def test_stale_pending_profile_only_requeues_the_ai_job(self, client, upstream):
+        upstream.ai_error = RuntimeError("Groq is down")
+        with patch.object(Settings, "AI_PENDING_PROFILE_TTL", 0):
+            client.get("/user/octocat/profile")
+            wait_for_job(client, "octocat", "failed")
+            upstream.ai_error = None
+
+            assert client.get("/user/octocat/profile").json()["about_status"] == "pending"
+            wait_for_ready(client, "octocat")
+
+        assert upstream.profile_calls == ["octocat"]
+        assert len(upstream.ai_calls) == 4
+
+    def test_ai_sections_are_merged_into_the_current_profile(self, client, upstream):
+        upstream.ai_delay = 0.2
+        profile = client.get("/user/octocat/profile").json()
+        # A GitHub refresh is stored while the AI job is generating
+        client.portal.call(main.response_cache.set, "github_profile_basic:octocat", {**profile, "followers": 11})
+
+        wait_for_ready(client, "octocat")
+        profile = client.get("/user/octocat/profile").json()
+        assert profile["followers"] == 11
+        assert profile["about"] == "about of octocat"
+
+    def test_stream_sends_the_profile_then_each_ai_section(self, client):
+        events = ndjson(client.get("/user/octocat/profile/stream"))
+
+        assert [event["event"] for event in events[:2]] == ["profile", "social_accounts"]
+        assert events[0]["data"]["username"] == "octocat"
+        assert events[-1] == {"event": "done", "data": None}
+        sections = {event["event"]: event["data"] for event in events[2:-1]}
+        assert sections == {"about": "about of octocat", "seo": "seo of octocat"}
+
+    def test_concurrent_stream_misses_are_coalesced(self, client, upstream):
+        upstream.profile_delay = 0.2
+        with ThreadPoolExecutor(3) as pool:
+            streams = list(pool.map(lambda _: ndjson(client.get("/user/octocat/profile/stream")), range(3)))
+
+        for events in streams:
+            assert events[0]["data"]["username"] == "octocat"
+            sections = {event["event"]: event["data"] for event in events[2:-1]}
+            assert sections == {"about": "about of octocat", "seo": "seo of octocat"}
+        assert upstream.profile_calls == ["octocat"]
+        assert sorted(upstream.ai_calls) == [("about", "octocat"), ("seo", "octocat")]
+
+
+@pytest.mark.asyncio
+async def test_closed_stream_stops_polling_the_ai_job():
+    polling_stopped = asyncio.Event()
+
+    async def wait_for_ai_job(username, cache_key):
+        try:
+            await asyncio.sleep(60)
+        finally:
+            polling_stopped.set()
+
+    with patch.object(main, "wait_for_ai_job", wait_for_ai_job):
+        sections = main.ai_sections_from_job("octocat", "github_profile_basic:octocat")
+        stream = main.stream_profile_sections(github_result("octocat"), sections)
+        assert [json.loads(await stream.__anext__())["event"] for _ in range(2)] == ["profile", "social_accounts"]
+
+        # The client disconnects while the stream waits for the AI sections
+        next_event = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0)
+        next_event.cancel()
+        with suppress(asyncio.CancelledError):
+            await next_event
+
+        await asyncio.wait_for(polling_stopped.wait(), 1)
+    assert all(task.cancelled() for task in sections.values())
+
+
+@pytest.mark.asyncio
+async def test_ai_job_merges_into_the_profile_in_redis(upstream, fake_redis):
+    cache = ResponseCache(fake_redis, SingleFlight(fake_redis), 60, 600, memory=MemoryCache(10, 100_000, 300))
+    cache_key = "github_profile_basic:octocat"
+    pending = {**github_result("octocat"), "about_status": "pending"}
+    await cache.set(cache_key, pending)
+    # An API process stores a GitHub refresh; its invalidation has not arrived
+    fake_redis.store[cache_key] = cache.codec.encode({**pending, "followers": 11}, time.time() + 60)
+
+    with patch.object(main, "response_cache", cache), \
+            patch.object(main, "AIDescriptionGenerator", lambda *args, **kwargs: None), \
+            patch.dict(main.AI_SECTIONS, {section: upstream.ai_section(section) for section in main.AI_SECTIONS}):
+        await main.enrich_github_profile("octocat")
+
+    profile = (await cache.get(cache_key, use_memory=False)).value
+    assert profile["followers"] == 11
+    assert profile["about"] == "about of octocat"
+    assert profile["about_status"] == "ready"
+
+
+@pytest.mark.asyncio
+async def test_ai_job_is_queued_before_the_profile_is_pending(upstream, fake_redis):
+    cache = ResponseCache(fake_redis, SingleFlight(fake_redis), 60, 600)
+    ai_jobs = JobQueue(None, "ai_jobs", main.enrich_github_profile)
+    cache_key = "github_profile_basic:octocat"
+    statuses = []
+    set_entry = cache.set
+
+    async def recording_set(key, value, **kwargs):
+        # What a stream reading the pending profile right now would poll
+        if isinstance(value, dict) and value.get("about_status") == "pending":
+            statuses.append((await ai_jobs.status("octocat"))["status"])
+        await set_entry(key, value, **kwargs)
+
+    with patch.object(main, "response_cache", cache), patch.object(main, "ai_jobs", ai_jobs), \
+            patch.object(cache, "set", recording_set), \
+            patch.object(GitHubProfileFetcher, "fetch_user_profile_async", staticmethod(upstream.fetch_user_profile)):
+        await main.generate_github_profile("octocat", cache_key)
+        # The previous run finished, but left the profile pending
+        ai_jobs._set_local_status("octocat", "failed")
+        ai_jobs._local_active.clear()
+        await main.requeue_ai_job("octocat", cache_key)
+
+    assert statuses == ["queued", "queued"]
+
+
+class TestBundle:
+    def test_composes_profile_projects_about_and_linkedin(self, client, upstream):
+        client.get("/user/octocat/profile")
+        wait_for_ready(client, "octocat")
+
+        response = client.get("/user/octocat/bundle")
+
+        assert response.status_code == 200
+        bundle = response.json()
+        assert set(bundle) == {"profile", "projects", "about", "linkedin"}
+        assert bundle["profile"]["username"] == "octocat"
+        assert bundle["about"] == "about of octocat"
+        assert bundle["projects"]["top_projects"] == [{"name": "octocat-project"}]
+        assert bundle["linkedin"] == {"basic_info": {"username": "octocat"}}
+        assert upstream.linkedin_calls == ["octocat"]
+
+        again = client.get("/user/octocat/bundle", headers={"If-None-Match": response.headers["etag"]})
+        assert again.status_code == 304
+
+    @pytest.mark.parametrize("username", ["ghost", "github"])
+    def test_missing_users_fetch_no_projects(self, client, upstream, fake_redis, username):
+        response = client.get(f"/user/{username}/bundle")
+
+        assert response.status_code == 400
+        assert response.json()["detail"] == INVALID_USERNAME_DETAIL
+        assert upstream.profile_calls == [username]
+        assert upstream.project_calls == []
+        assert not any(key.startswith("github_profile_projects:") for key in fake_redis.store)
+
+    def test_known_users_fetch_projects_alongside_the_profile(self, client, upstream):
+        client.get("/user/octocat/projects")
+        client.post("/users/profiles", json={"usernames": ["hubot"]})
+
+        for username in USERS:
+            assert client.get(f"/user/{username}/bundle").json()["projects"] is not None
+        assert upstream.project_calls == ["octocat", "hubot"]
@@ -0,0 +1,340 @@
+import asyncio
+import json
+import time
+
+import pytest
+from fastapi import BackgroundTasks
+
+from modules.tests.fake_redis import FakeRedis, UnreachableRedis
+from utils.cache import CacheEntry, MemoryCache, ResponseCache
+from utils.codec import CacheCodec
+from utils.single_flight import SingleFlight
+
+
+@pytest.fixture
+def fake_redis():
+    return FakeRedis()
+
+
+@pytest.fixture
+def cache(fake_redis):
+    return ResponseCache(fake_redis, SingleFlight(fake_redis), soft_ttl=60, hard_ttl=600)
+
+
+def make_compute(cache, key, value, calls):
+    async def compute():
+        calls.append(key)
+        await cache.set(key, value)
+        return value
+    return compute
+
+
+def store_entry(fake_redis, key, value, fresh_until):
+    fake_redis.store[key] = CacheCodec().encode(value, fresh_until)
+
+
+class TestMemoryCache:
+    def test_lru_eviction_by_entries(self):
+        memory = MemoryCache(max_entries=2, max_bytes=1000, ttl=60)
+        memory.set("a", CacheEntry(1, 0), 10)
+        memory.set("b", CacheEntry(2, 0), 10)
+        # Touch "a" so "b" becomes the least recently used
+        assert memory.get("a").value == 1
+        memory.set("c", CacheEntry(3, 0), 10)
+
+        assert memory.get("b") is None
+        assert memory.get("a").value == 1
+        assert memory.get("c").value == 3
+
+    def test_eviction_by_bytes(self):
+        memory = MemoryCache(max_entries=10, max_bytes=100, ttl=60)
+        memory.set("a", CacheEntry(1, 0), 60)
+        memory.set("b", CacheEntry(2, 0), 60)
+
+        assert memory.get("a") is None
+        assert memory.get("b").value == 2
+        assert memory.size == 60
+
+    def test_oversized_entry_is_not_stored(self):
+        memory = MemoryCache(max_entries=10, max_bytes=100, ttl=60)
+        memory.set("a", CacheEntry(1, 0), 101)
+        assert len(memory) == 0
+
+    def test_replacing_entry_updates_size(self):
+        memory = MemoryCache(max_entries=10, max_bytes=100, ttl=60)
+        memory.set("a", CacheEntry(1, 0), 60)
+        memory.set("a", CacheEntry(2, 0), 30)
+        assert memory.size == 30
+        memory.invalidate("a")
+        assert memory.size == 0
+
+    def test_ttl_expiry(self):
+        memory = MemoryCache(max_entries=10, max_bytes=100, ttl=0)
+        memory.set("a", CacheEntry(1, 0), 10)
+
+        assert memory.get("a") is None
+        assert memory.get("a", allow_expired=True).value == 1
+
+
+@pytest.mark.asyncio
+class TestResponseCache:
+    async def test_miss_computes_and_stores(self, cache, fake_redis):
+        calls = []
+        result = await cache.get_or_compute("key", make_compute(cache, "key", {"a": 1}, calls))
+
+        assert result == {"a": 1}
+        assert calls == ["key"]
+        entry = await cache.get("key")
+        assert entry.value == {"a": 1}
+        assert not entry.is_stale
+        # Kept in Redis for the hard TTL
+        assert fake_redis.expiry["key"] - time.time() > 500
+
+    async def test_fresh_hit_does_not_compute(self, cache, fake_redis):
+        store_entry(fake_redis, "key", {"a": 1}, time.time() + 60)
+        calls = []
+
+        assert await cache.get_or_compute("key", make_compute(cache, "key", {"a": 2}, calls)) == {"a": 1}
+        assert calls == []
+
+    async def test_stale_hit_is_served_and_refreshed_in_background(self, cache, fake_redis):
+        store_entry(fake_redis, "key", {"a": 1}, time.time() - 1)
+        calls = []
+
+        result = await cache.get_or_compute("key", make_compute(cache, "key", {"a": 2}, calls))
+        assert result == {"a": 1}
+
+        await asyncio.sleep(0.01)
+        assert calls == ["key"]
+        assert (await cache.get("key")).value == {"a": 2}
+
+    async def test_stale_refresh_uses_background_tasks(self, cache, fake_redis):
+        store_entry(fake_redis, "key", {"a": 1}, time.time() - 1)
+        background_tasks = BackgroundTasks()
+        calls = []
+
+        result = await cache.get_or_compute(
+            "key", make_compute(cache, "key", {"a": 2}, calls), background_tasks
+        )
+        assert result == {"a": 1}
+        assert calls == []
+
+        await background_tasks()
+        assert calls == ["key"]
+
+    async def test_failed_refresh_keeps_stale_value(self, cache, fake_redis):
+        store_entry(fake_redis, "key", {"a": 1}, time.time() - 1)
+
+        async def failing():
+            raise ValueError("GitHub is down")
+
+        await cache.refresh("key", failing)
+        assert (await cache.get("key")).value == {"a": 1}
+
+    async def test_stale_if_error_when_cache_read_is_skipped(self, cache, fake_redis):
+        store_entry(fake_redis, "key", {"a": 1}, time.time() - 1)
+
+        async def failing():
+            raise ValueError("GitHub is down")
+
+        assert await cache.get_or_compute("key", failing, use_cached=False) == {"a": 1}
+
+    async def test_error_without_cached_value_raises(self, cache):
+        async def failing():
+            raise ValueError("GitHub is down")
+
+        with pytest.raises(ValueError):
+            await cache.get_or_compute("key", failing)
+
+    async def test_entries_use_configured_codec(self, fake_redis):
+        codec = CacheCodec("msgpack", "zstd", compress_threshold=0)
+        cache = ResponseCache(fake_redis, SingleFlight(fake_redis), 60, 600, codec=codec)
+        await cache.set("key", {"readme_content": "hello " * 500})
+
+        stored = fake_redis.store["key"]
+        assert stored[0] == CacheCodec.MAGIC
+        assert len(stored) < 500
+        assert (await cache.get("key")).value == {"readme_content": "hello " * 500}
+
+    async def test_get_many_reads_redis_once(self, cache, fake_redis):
+        store_entry(fake_redis, "a", 1, time.time() + 60)
+        store_entry(fake_redis, "c", 3, time.time() - 1)
+
+        entries = await cache.get_many(["a", "b", "c"])
+
+        assert [entry and entry.value for entry in entries] == [1, None, 3]
+        assert entries[2].is_stale
+        assert fake_redis.mget_calls == 1
+
+    async def test_resolve_serves_prefetched_entry(self, cache, fake_redis):
+        store_entry(fake_redis, "key", {"a": 1}, time.time() + 60)
+        entry, = await cache.get_many(["key"])
+        del fake_redis.store["key"]
+        calls = []
+
+        assert await cache.resolve("key", entry, make_compute(cache, "key", {"a": 2}, calls)) == {"a": 1}
+        assert await cache.resolve("key", None, make_compute(cache, "key", {"a": 2}, calls)) == {"a": 2}
+        assert calls == ["key"]
+
+    async def test_redis_hit_exposes_etag_without_decoding(self, fake_redis):
+        codec = CacheCodec("msgpack", "zstd")
+        cache = ResponseCache(fake_redis, SingleFlight(fake_redis), 60, 600, codec=codec)
+        await cache.set("key", {"a": 1})
+
+        entry = await cache.get("key")
+        assert entry.etag == codec.etag({"a": 1})
+        assert entry._load is not None
+        assert entry.value == {"a": 1}
+
+    async def test_computed_entry_has_etag(self, cache):
+        calls = []
+        entry = await cache.get_or_compute_entry("key", make_compute(cache, "key", {"a": 1}, calls))
+
+        assert entry.value == {"a": 1}
+        assert entry.etag == (await cache.get("key")).etag
+        assert not entry.is_stale
+
+    @pytest.mark.parametrize("memory", [None, MemoryCache(max_entries=10, max_bytes=10_000, ttl=60)])
+    async def test_computed_entry_etag_is_the_stored_payloads(self, fake_redis, memory):
+        cache = ResponseCache(fake_redis, SingleFlight(fake_redis), 60, 600, memory=memory)
+
+        async def compute():
+            await cache.set("key", {"a": 1, "cached": True})
+            return {"a": 1, "cached": False}
+
+        entry = await cache.get_or_compute_entry("key", compute)
+        assert entry.value == {"a": 1, "cached": False}
+        assert entry.etag == (await cache.get("key")).etag == cache.codec.etag({"a": 1, "cached": True})
+
+    async def test_soft_ttl_override_keeps_entry_until_hard_ttl(self, cache, fake_redis):
+        await cache.set("key", {"a": 1}, soft_ttl=-1)
+
+        entry = await cache.get("key")
+        assert entry.is_stale
+        assert fake_redis.expiry["key"] > time.time() + 500
+
+    async def test_legacy_entry_is_fresh(self, cache, fake_redis):
+        fake_redis.store["key"] = json.dumps({"a": 1})
+
+        entry = await cache.get("key")
+        assert entry.value == {"a": 1}
+        assert not entry.is_stale
+
+    async def test_disabled_cache_always_computes(self):
+        cache = ResponseCache(None, SingleFlight(), soft_ttl=60, hard_ttl=600)
+        calls = []
+
+        await cache.get_or_compute("key", make_compute(cache, "key", 1, calls))
+        await cache.get_or_compute("key", make_compute(cache, "key", 1, calls))
+        assert calls == ["key", "key"]
+
+
+@pytest.mark.asyncio
+class TestResponseCacheMemoryTier:
+    @pytest.fixture
+    def memory(self):
+        return MemoryCache(max_entries=10, max_bytes=10_000, ttl=60)
+
+    async def test_hit_is_served_from_memory(self, fake_redis, memory):
+        cache = ResponseCache(fake_redis, SingleFlight(fake_redis), 60, 600, memory=memory)
+        store_entry(fake_redis, "key", {"a": 1}, time.time() + 60)
+
+        first = await cache.get("key")
+        del fake_redis.store["key"]
+        second = await cache.get("key")
+
+        # The decoded object itself is reused
+        assert second is first
+
+    async def test_get_many_only_fetches_memory_misses(self, fake_redis, memory):
+        cache = ResponseCache(fake_redis, SingleFlight(fake_redis), 60, 600, memory=memory)
+        await cache.set("a", 1)
+        store_entry(fake_redis, "b", 2, time.time() + 60)
+        fetched = []
+        mget = fake_redis.mget
+
+        async def recording_mget(keys):
+            fetched.extend(keys)
+            return await mget(keys)
+        fake_redis.mget = recording_mget
+
+        entries = await cache.get_many(["a", "b"])
+        assert [entry.value for entry in entries] == [1, 2]
+        assert fetched == ["b"]
+
+        # Both are now answered from memory
+        assert [entry.value for entry in await cache.get_many(["a", "b"])] == [1, 2]
+        assert fetched == ["b"]
+
+    async def test_memory_can_be_skipped(self, fake_redis, memory):
+        cache = ResponseCache(fake_redis, SingleFlight(fake_redis), 60, 600, memory=memory)
+        await cache.set("key", {"a": 1})
+        # Rewritten by another worker, whose invalidation has not arrived yet
+        store_entry(fake_redis, "key", {"a": 2}, time.time() + 60)
+
+        assert (await cache.get("key")).value == {"a": 1}
+        assert (await cache.get("key", use_memory=False)).value == {"a": 2}
+        assert (await cache.get("key")).value == {"a": 2}
+
+    async def test_set_publishes_invalidation(self, fake_redis, memory):
+        cache = ResponseCache(fake_redis, SingleFlight(fake_redis), 60, 600, memory=memory)
+        await cache.set("key", {"a": 1})
+
+        assert fake_redis.published == [(ResponseCache.INVALIDATION_CHANNEL, f"{cache.node_id}:key")]
+
+    async def test_invalidation_from_other_worker(self, fake_redis, memory):
+        cache = ResponseCache(fake_redis, SingleFlight(fake_redis), 60, 600, memory=memory)
+        await cache.set("profile:user", {"a": 1})
+
+        # Own messages are ignored
+        cache._handle_invalidation(f"{cache.node_id}:profile:user".encode())
+        assert memory.get("profile:user") is not None
+
+        cache._handle_invalidation(b"other-worker:profile:user")
+        assert memory.get("profile:user") is None
+
+    async def test_serves_memory_when_redis_unreachable(self, memory):
+        unreachable = UnreachableRedis()
+        cache = ResponseCache(unreachable, SingleFlight(unreachable), 60, 600, memory=memory)
+        memory.ttl = 0  # Even expired memory entries are used while Redis is down
+        memory.set("key", CacheEntry({"a": 1}, time.time() + 60), 10)
+
+        assert (await cache.get("key")).value == {"a": 1}
+        assert not cache.redis_available
+
+    async def test_computed_entry_keeps_stored_freshness(self, fake_redis, memory):
+        cache = ResponseCache(fake_redis, SingleFlight(fake_redis), 60, 600, memory=memory)
+
+        async def compute():
+            await cache.set("key", {"a": 1}, soft_ttl=5)
+            return {"a": 1}
+
+        entry = await cache.get_or_compute_entry("key", compute)
+        assert entry.fresh_until <= time.time() + 5
+
+    async def test_computes_when_redis_unreachable(self, memory):
+        unreachable = UnreachableRedis()
+        cache = ResponseCache(unreachable, SingleFlight(unreachable), 60, 600, memory=memory)
+        calls = []
+
+        result = await cache.get_or_compute("key", make_compute(cache, "key", {"a": 1}, calls))
+        assert result == {"a": 1}
+        # Later reads are answered from memory
+        assert (await cache.get("key")).value == {"a": 1}
+        assert calls == ["key"]
+
+    async def test_lease_is_skipped_while_redis_is_down(self, memory):
+        commands = []
+
+        class CountingRedis(UnreachableRedis):
+            def __getattr__(self, name):
+                commands.append(name)
+                return super().__getattr__(name)
+
+        unreachable = CountingRedis()
+        cache = ResponseCache(unreachable, SingleFlight(unreachable), 60, 600, memory=memory, redis_retry_interval=60)
+
+        assert await cache.get_or_compute("a", make_compute(cache, "a", 1, [])) == 1
+        assert await cache.get_or_compute("b", make_compute(cache, "b", 2, [])) == 2
+        # The first read failed; neither the lease nor later reads went to Redis
+        assert commands == ["mget"]
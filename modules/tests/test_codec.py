@@ -0,0 +1,94 @@
+import json
+import time
+
+import numpy as np
+import pytest
+
+from utils.codec import COMPRESSIONS, SERIALIZERS, CacheCodec, CodecError
+
+PROFILE = {
+    "username": "sunithvs",
+    "name": "Sunith VS",
+    "followers": 100,
+    "pull_requests_merged": "100+",
+    "social_accounts": [{"provider": "linkedin", "url": "https://linkedin.com/in/sunithvs"}],
+    "readme_content": "# Hi there\n" + "Building things with Python and Rust. " * 200,
+    "about": None,
+    "cached": True,
+}
+
+
+class TestCacheCodec:
+    @pytest.mark.parametrize("serializer", sorted(SERIALIZERS))
+    @pytest.mark.parametrize("compression", sorted(COMPRESSIONS))
+    def test_roundtrip(self, serializer, compression):
+        codec = CacheCodec(serializer, compression)
+        assert codec.decode(codec.encode(PROFILE)) == PROFILE
+
+    def test_compresses_above_threshold_only(self):
+        codec = CacheCodec("json", "zlib", compress_threshold=1024)
+
+        small = codec.encode({"about": "short"})
+        large = codec.encode(PROFILE)
+
+        assert small[3] == 0  # no compression id in the header
+        assert large[3] == COMPRESSIONS["zlib"].id
+        assert len(large) < len(json.dumps(PROFILE))
+
+    def test_raw_size_comes_from_header(self):
+        codec = CacheCodec("msgpack", "zstd")
+        encoded = codec.encode(PROFILE)
+        assert codec.raw_size(encoded) == len(SERIALIZERS["msgpack"].dumps(PROFILE))
+
+    def test_decodes_entries_from_other_configurations(self):
+        written = CacheCodec("orjson", "zlib", compress_threshold=0).encode(PROFILE)
+        assert CacheCodec("msgpack", "zstd").decode(written) == PROFILE
+
+    def test_decodes_legacy_json(self):
+        codec = CacheCodec("msgpack", "zstd")
+        legacy = json.dumps(PROFILE).encode()
+
+        assert codec.decode(legacy) == PROFILE
+        assert codec.decode(legacy.decode()) == PROFILE
+        assert codec.raw_size(legacy) == len(legacy)
+
+    @pytest.mark.parametrize("serializer", sorted(SERIALIZERS))
+    def test_numpy_scores_are_serialized(self, serializer):
+        codec = CacheCodec(serializer)
+        decoded = codec.decode(codec.encode({"score": np.float64(1.5), "count": np.int64(3)}))
+        assert decoded == {"score": 1.5, "count": 3}
+
+    def test_info_reads_header_only(self):
+        codec = CacheCodec("msgpack", "zstd", compress_threshold=0)
+        fresh_until = time.time() + 60
+        encoded = codec.encode(PROFILE, fresh_until)
+        # Corrupting the body does not matter to the header
+        info = codec.info(encoded[:CacheCodec.HEADER.size] + b"garbage")
+
+        assert info.fresh_until == fresh_until
+        assert info.etag == codec.etag(PROFILE)
+        assert info.raw_size == len(SERIALIZERS["msgpack"].dumps(PROFILE))
+
+    def test_etag_depends_on_content_only(self):
+        codec = CacheCodec("msgpack", "zstd")
+        first = codec.info(codec.encode(PROFILE, time.time())).etag
+        second = codec.info(codec.encode(dict(PROFILE), time.time() + 60)).etag
+        changed = codec.info(codec.encode({**PROFILE, "followers": 101})).etag
+
+        assert first == second
+        assert changed != first
+
+    def test_unknown_version_is_rejected(self):
+        codec = CacheCodec()
+        encoded = bytearray(codec.encode(PROFILE))
+        encoded[1] = 99
+        with pytest.raises(CodecError):
+            codec.decode(bytes(encoded))
+
+    def test_truncated_payload_is_rejected(self):
+        with pytest.raises(CodecError):
+            CacheCodec().decode(b"\xdb\x02")
+
+    def test_unknown_serializer_is_rejected(self):
+        with pytest.raises(ValueError):
+            CacheCodec("pickle")
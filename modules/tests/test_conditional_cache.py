@@ -0,0 +1,140 @@
+import json
+from unittest.mock import patch
+
+import httpx
+import pytest
+import requests
+
+from modules.tests.fake_redis import FakeRedis
+from utils import conditional_cache
+from utils.conditional_cache import ConditionalCacheTransport, DiskResponseStore, RedisResponseStore
+from utils.rate_limit import GitHubTokenAuth, GitHubTokenScheduler
+
+REPOS_URL = "https://api.github.com/users/octocat/repos?page=1&per_page=100"
+REPOS = [{"name": "hello-world"}]
+
+
+def github(calls):
+    """REST endpoint answering 304 to a matching If-None-Match, like GitHub"""
+    def handler(request):
+        calls.append(request.headers.get("if-none-match"))
+        rate_limit = {"x-ratelimit-remaining": str(5000 - len(calls))}
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304, headers=rate_limit)
+        return httpx.Response(200, json=REPOS, headers={"etag": '"v1"', **rate_limit})
+    return httpx.MockTransport(handler)
+
+
+@pytest.mark.asyncio
+class TestConditionalCacheTransport:
+    @pytest.mark.parametrize("store_factory", [
+        lambda tmp_path: DiskResponseStore(str(tmp_path), ttl=60),
+        lambda tmp_path: RedisResponseStore(FakeRedis(), ttl=60),
+    ], ids=["disk", "redis"])
+    async def test_not_modified_is_served_from_the_store(self, tmp_path, store_factory):
+        calls = []
+        transport = ConditionalCacheTransport(github(calls), store_factory(tmp_path))
+        async with httpx.AsyncClient(transport=transport, headers={"Authorization": "token a"}) as client:
+            first = await client.get(REPOS_URL)
+            second = await client.get(REPOS_URL)
+
+        assert calls == [None, '"v1"']
+        assert first.json() == second.json() == REPOS
+        assert second.status_code == 200
+        # Rate limit headers are the 304's, the body's headers the stored ones
+        assert second.headers["x-ratelimit-remaining"] == "4998"
+        assert second.headers["etag"] == '"v1"'
+
+    async def test_responses_are_stored_per_token(self, tmp_path):
+        calls = []
+        transport = ConditionalCacheTransport(github(calls), DiskResponseStore(str(tmp_path), ttl=60))
+        async with httpx.AsyncClient(transport=transport) as client:
+            await client.get(REPOS_URL, headers={"Authorization": "token a"})
+            await client.get(REPOS_URL, headers={"Authorization": "token b"})
+
+        assert calls == [None, None]
+
+    async def test_pooled_tokens_share_stored_responses(self, tmp_path):
+        calls, authorizations = [], []
+        endpoint = github(calls)
+
+        async def handler(request):
+            authorizations.append(request.headers["authorization"])
+            return await endpoint.handle_async_request(request)
+
+        scheduler = GitHubTokenScheduler(["a", "b"])
+        transport = ConditionalCacheTransport(httpx.MockTransport(handler), DiskResponseStore(str(tmp_path), ttl=60))
+        with patch.object(conditional_cache, "github_tokens", scheduler):
+            async with httpx.AsyncClient(transport=transport, auth=GitHubTokenAuth(scheduler)) as client:
+                first = await client.get(REPOS_URL)
+                second = await client.get(REPOS_URL)
+
+        # The scheduler spread the requests over both tokens, the second still revalidated
+        assert authorizations == ["token a", "token b"]
+        assert calls == [None, '"v1"']
+        assert first.json() == second.json() == REPOS
+
+    async def test_own_account_is_stored_per_token(self):
+        with patch.object(conditional_cache, "github_tokens", GitHubTokenScheduler(["a", "b"])):
+            shared = {conditional_cache.cache_key(REPOS_URL, f"token {token}") for token in "ab"}
+            own = {conditional_cache.cache_key("https://api.github.com/user/repos", f"token {token}") for token in "ab"}
+
+        assert len(shared) == 1
+        assert len(own) == 2
+
+    async def test_unavailable_redis_is_skipped(self):
+        class DownRedis(FakeRedis):
+            async def get(self, key):
+                raise ConnectionError("Connection refused")
+
+        calls = []
+        transport = ConditionalCacheTransport(github(calls), RedisResponseStore(DownRedis(), ttl=60))
+        async with httpx.AsyncClient(transport=transport) as client:
+            response = await client.get(REPOS_URL)
+
+        assert response.json() == REPOS
+
+
+def requests_response(status_code, body=None, headers=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    response._content = json.dumps(body).encode() if body is not None else b""
+    return response
+
+
+class TestBlockingGet:
+    def test_revalidates_with_the_disk_store(self, tmp_path):
+        responses = [
+            requests_response(200, REPOS, {"ETag": '"v1"', "Content-Type": "application/json"}),
+            requests_response(304, headers={"X-RateLimit-Remaining": "4998"}),
+        ]
+        with patch.object(conditional_cache, "_sync_store", DiskResponseStore(str(tmp_path), ttl=60)), \
+                patch("requests.get", side_effect=responses) as mock_get:
+            first = conditional_cache.get(REPOS_URL, headers={"Authorization": "token a"})
+            second = conditional_cache.get(REPOS_URL, headers={"Authorization": "token a"})
+
+        assert mock_get.call_args_list[1].kwargs["headers"]["If-None-Match"] == '"v1"'
+        assert first.json() == second.json() == REPOS
+        assert second.status_code == 200
+        assert second.headers["x-ratelimit-remaining"] == "4998"
+
+    def test_rate_limit_headers_are_recorded(self, tmp_path):
+        scheduler = GitHubTokenScheduler(["a"])
+        responses = [
+            requests_response(200, REPOS, {"ETag": '"v1"', "X-RateLimit-Remaining": "4999"}),
+            requests_response(304, headers={"X-RateLimit-Remaining": "4998"}),
+        ]
+        with patch.object(conditional_cache, "_sync_store", DiskResponseStore(str(tmp_path), ttl=60)), \
+                patch.object(conditional_cache, "github_tokens", scheduler), \
+                patch("requests.get", side_effect=responses):
+            conditional_cache.get(REPOS_URL, headers={"Authorization": "token a"})
+            assert scheduler.snapshot()[("a", "core")][1] == 4999
+            conditional_cache.get(REPOS_URL, headers={"Authorization": "token a"})
+            assert scheduler.snapshot()[("a", "core")][1] == 4998
+
+    def test_without_a_store_requests_are_unconditional(self):
+        with patch("requests.get", return_value=requests_response(200, REPOS)) as mock_get:
+            assert conditional_cache.get(REPOS_URL, headers={"Authorization": "token a"}).json() == REPOS
+
+        assert "If-None-Match" not in mock_get.call_args.kwargs["headers"]
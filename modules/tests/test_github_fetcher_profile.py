@@ -1,88 +1,79 @@
+import json
+from datetime import datetime, timedelta, timezone
+
 import pytest
+import httpx
 from unittest.mock import patch, MagicMock
-from datetime import datetime, timedelta
-from modules.github_fetcher import GitHubProfileFetcher
+from modules.github_fetcher import GitHubProfileBatchFetcher, GitHubProfileFetcher
 
-class TestFetchUserProfile:
-    @pytest.fixture
-    def mock_validate_username(self):
-        with patch.object(GitHubProfileFetcher, 'validate_github_username_sync', return_value=True):
-            yield
 
+def graphql_user_payload():
+    """GraphQL response for a typical user profile"""
+    return {
+        "data": {
+            "repositoryOwner": {
+                "__typename": "User",
+                "name": "Sunith VS",
+                "bio": "Backend Developer",
+                "location": "Kerala, India",
+                "avatarUrl": "https://example.com/avatar.jpg",
+                "url": "https://github.com/sunithvs",
+                "followers": {"totalCount": 100},
+                "following": {"totalCount": 50},
+                "socialAccounts": {
+                    "nodes": [{"provider": "LINKEDIN", "url": "https://linkedin.com/in/sunithvs"}]
+                },
+                "repositories": {
+                    "totalCount": 30,
+                    "nodes": [
+                        {
+                            "name": "project1",
+                            "description": "Test project",
+                            "stargazerCount": 10,
+                            "primaryLanguage": {"name": "Python"},
+                            "url": "https://github.com/sunithvs/project1",
+                            "updatedAt": "2024-01-01T00:00:00Z"
+                        }
+                    ]
+                },
+                "contributionsCollection": {
+                    "contributionCalendar": {
+                        "totalContributions": 500
+                    },
+                    "pullRequestContributionsByRepository": [],
+                    "issueContributionsByRepository": []
+                },
+                "repositoriesContributedTo": {
+                    "totalCount": 10,
+                    "nodes": [{"name": "contrib1"}]
+                },
+                "repository": {
+                    "object": {
+                        "text": "# README content"
+                    },
+                    "defaultBranchRef": {
+                        "name": "main"
+                    }
+                }
+            },
+            "mergedPullRequests": {"issueCount": 1},
+            "closedIssues": {"issueCount": 3}
+        }
+    }
+
+
+class TestFetchUserProfile:
     @pytest.fixture
     def mock_graphql_response(self):
         def create_mock_response():
             mock_response = MagicMock()
             mock_response.status_code = 200
-            mock_response.json.return_value = {
-                "data": {
-                    "user": {
-                        "name": "Sunith VS",
-                        "bio": "Backend Developer",
-                        "location": "Kerala, India",
-                        "avatarUrl": "https://example.com/avatar.jpg",
-                        "url": "https://github.com/sunithvs",
-                        "followers": {"totalCount": 100},
-                        "following": {"totalCount": 50},
-                        "repositories": {
-                            "totalCount": 30,
-                            "nodes": [
-                                {
-                                    "name": "project1",
-                                    "description": "Test project",
-                                    "stargazerCount": 10,
-                                    "primaryLanguage": {"name": "Python"},
-                                    "url": "https://github.com/sunithvs/project1",
-                                    "updatedAt": "2024-01-01T00:00:00Z"
-                                }
-                            ]
-                        },
-                        "contributionsCollection": {
-                            "contributionCalendar": {
-                                "totalContributions": 500
-                            },
-                            "pullRequestContributionsByRepository": [],
-                            "issueContributionsByRepository": []
-                        },
-                        "pullRequests": {
-                            "nodes": [
-                                {"createdAt": (datetime.now() - timedelta(days=10)).strftime("%Y-%m-%dT%H:%M:%SZ")}
-                            ],
-                            "totalCount": 20
-                        },
-                        "issues": {
-                            "totalCount": 15,
-                            "nodes": [
-                                {"createdAt": (datetime.now() - timedelta(days=10)).strftime("%Y-%m-%dT%H:%M:%SZ")}
-                            ]
-                        },
-                        "repositoriesContributedTo": {
-                            "totalCount": 10,
-                            "nodes": [{"name": "contrib1"}]
-                        },
-                        "repository": {
-                            "object": {
-                                "text": "# README content"
-                            },
-                            "defaultBranchRef": {
-                                "name": "main"
-                            }
-                        }
-                    }
-                }
-            }
+            mock_response.json.return_value = graphql_user_payload()
             return mock_response
         return create_mock_response
 
-    @pytest.fixture
-    def mock_social_accounts(self):
-        with patch.object(GitHubProfileFetcher, 'social_accounts', return_value=[
-            {"provider": "linkedin", "url": "https://linkedin.com/in/sunithvs"}
-        ]):
-            yield
-
-    def test_fetch_user_profile_success(self, mock_validate_username, mock_graphql_response, mock_social_accounts):
-        with patch('requests.post', return_value=mock_graphql_response()):
+    def test_fetch_user_profile_success(self, mock_graphql_response):
+        with patch('requests.post', return_value=mock_graphql_response()) as mock_post, patch('requests.get') as mock_get:
             result = GitHubProfileFetcher.fetch_user_profile("sunithvs")
             
             assert result["username"] == "sunithvs"
@@ -94,23 +85,27 @@ class TestFetchUserProfile:
             assert result["following"] == 50
             assert result["public_repos"] == 30
             assert result["achievements"]["total_contributions"] == 500
-            assert len(result["social_accounts"]) == 1
+            assert result["social_accounts"] == [{"provider": "linkedin", "url": "https://linkedin.com/in/sunithvs"}]
             assert result["readme_content"] == "# README content"
+            # Social accounts come with the profile query
+            assert mock_post.call_count == 1
+            mock_get.assert_not_called()
 
-    def test_fetch_user_profile_invalid_username(self, mock_validate_username):
-        with patch.object(GitHubProfileFetcher, 'validate_github_username_sync', return_value=False):
-            result = GitHubProfileFetcher.fetch_user_profile("invalid-user")
+    def test_fetch_user_profile_invalid_username(self):
+        with patch('requests.post') as mock_post:
+            result = GitHubProfileFetcher.fetch_user_profile("invalid--user")
             assert "error" in result
             assert "Invalid GitHub username" in result["error"]
+            mock_post.assert_not_called()
 
-    def test_fetch_user_profile_api_error(self, mock_validate_username, mock_graphql_response):
+    def test_fetch_user_profile_api_error(self, mock_graphql_response):
         with patch('requests.post') as mock_post:
             mock_post.side_effect = Exception("API Error")
             result = GitHubProfileFetcher.fetch_user_profile("sunithvs")
             assert "error" in result
             assert "An unexpected error occurred" in result["error"]
 
-    def test_fetch_user_profile_empty_response(self, mock_validate_username):
+    def test_fetch_user_profile_empty_response(self):
         with patch('requests.post') as mock_post:
             mock_response = MagicMock()
             mock_response.status_code = 200
@@ -121,7 +116,7 @@ class TestFetchUserProfile:
             assert "error" in result
             assert "User 'sunithvs' not found" in result["error"]
 
-    def test_fetch_user_profile_rate_limit(self, mock_validate_username):
+    def test_fetch_user_profile_rate_limit(self):
         with patch('requests.post') as mock_post:
             mock_response = MagicMock()
             mock_response.status_code = 403
@@ -132,15 +127,198 @@ class TestFetchUserProfile:
             assert "error" in result
             assert "An unexpected error occurred" in result["error"]
 
-    @pytest.mark.parametrize("pr_count,expected", [
-        (50, 50),
-        (150, "100+")
-    ])
-    def test_fetch_user_profile_pr_count_formatting(self, mock_validate_username, mock_graphql_response, pr_count, expected):
+    @pytest.mark.parametrize("pr_count", [50, 150])
+    def test_fetch_user_profile_counts_are_exact(self, mock_graphql_response, pr_count):
         mock_response = mock_graphql_response()
-        prs = [{"createdAt": (datetime.now() - timedelta(days=10)).strftime("%Y-%m-%dT%H:%M:%SZ")} for _ in range(pr_count)]
-        mock_response.json.return_value["data"]["user"]["pullRequests"]["nodes"] = prs
-        
+        mock_response.json.return_value["data"]["mergedPullRequests"]["issueCount"] = pr_count
+
         with patch('requests.post', return_value=mock_response):
             result = GitHubProfileFetcher.fetch_user_profile("sunithvs")
-            assert result["pull_requests_merged"] == expected
+            assert result["pull_requests_merged"] == pr_count
+            assert result["issues_closed"] == 3
+
+
+@pytest.mark.asyncio
+class TestFetchUserProfileAsync:
+    @staticmethod
+    def mock_transport(handler):
+        client_class = httpx.AsyncClient
+        return patch('httpx.AsyncClient', lambda **kwargs: client_class(transport=httpx.MockTransport(handler)))
+
+    async def test_fetch_user_profile_async_success(self):
+        paths = []
+
+        def handler(request):
+            paths.append(request.url.path)
+            return httpx.Response(200, json=graphql_user_payload())
+
+        with self.mock_transport(handler):
+            result = await GitHubProfileFetcher.fetch_user_profile_async("sunithvs")
+
+        assert paths == ["/graphql"]
+        assert result["username"] == "sunithvs"
+        assert result["name"] == "Sunith VS"
+        assert result["followers"] == 100
+        assert result["pull_requests_merged"] == 1
+        assert len(result["social_accounts"]) == 1
+        assert result["readme_content"] == "# README content"
+
+    async def test_fetch_user_profile_async_invalid_username(self):
+        result = await GitHubProfileFetcher.fetch_user_profile_async("invalid--user")
+        assert "Invalid GitHub username" in result["error"]
+
+    @pytest.mark.parametrize("payload", [
+        {"data": {"repositoryOwner": None}},
+        {"data": {"repositoryOwner": None}, "errors": [{"type": "NOT_FOUND", "message": "Could not resolve"}]},
+        {"data": {"repositoryOwner": {"__typename": "Organization"}}},
+    ], ids=["missing", "not_found_error", "organization"])
+    async def test_fetch_user_profile_async_not_found(self, payload):
+        with self.mock_transport(lambda request: httpx.Response(200, json=payload)):
+            result = await GitHubProfileFetcher.fetch_user_profile_async("github")
+
+        assert result["error_type"] == "not_found"
+        assert "User 'github' not found" in result["error"]
+
+    async def test_fetch_user_profile_async_graphql_error(self):
+        payload = {"data": None, "errors": [{"type": "RATE_LIMITED", "message": "API rate limit exceeded"}]}
+        with self.mock_transport(lambda request: httpx.Response(200, json=payload)):
+            result = await GitHubProfileFetcher.fetch_user_profile_async("sunithvs")
+
+        assert "API rate limit exceeded" in result["error"]
+        assert "error_type" not in result
+
+    async def test_fetch_user_profile_async_http_error(self):
+        with self.mock_transport(lambda request: httpx.Response(502)):
+            result = await GitHubProfileFetcher.fetch_user_profile_async("sunithvs")
+            assert result["error"] == "HTTP Error: 502 - Bad Gateway"
+
+    async def test_fetch_user_profile_async_empty_response(self):
+        with self.mock_transport(lambda request: httpx.Response(200, json={"data": {}})):
+            result = await GitHubProfileFetcher.fetch_user_profile_async("sunithvs")
+            assert "User 'sunithvs' not found" in result["error"]
+
+
+    async def test_fetch_user_profile_async_sends_login_as_variable(self):
+        bodies = []
+
+        def handler(request):
+            bodies.append(json.loads(request.content))
+            return httpx.Response(200, json=graphql_user_payload())
+
+        with self.mock_transport(handler):
+            await GitHubProfileFetcher.fetch_user_profile_async("sunithvs")
+
+        assert bodies[0]["variables"]["login"] == "sunithvs"
+        assert bodies[0]["variables"]["mergedPullRequests"].startswith("author:sunithvs is:pr is:merged created:>")
+        assert "sunithvs" not in bodies[0]["query"]
+
+    async def test_profile_window_is_in_utc(self):
+        class Clock(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                # Local time on a server in India, already the next day
+                now = datetime(2026, 3, 1, 23, 30, tzinfo=timezone.utc)
+                return now.astimezone(tz or timezone(timedelta(hours=5, minutes=30))).replace(tzinfo=tz)
+
+        with patch("modules.github_fetcher.datetime", Clock):
+            variables = GitHubProfileFetcher._profile_variables("sunithvs")
+
+        assert variables["from"] == "2025-03-01T23:30:00Z"
+        assert variables["mergedPullRequests"].endswith("created:>2025-03-01T23:30:00Z")
+
+
+def logins(variables):
+    return [login for name, login in variables.items() if name.startswith("l")]
+
+
+def batch_handler(requests, cost=None, status=None):
+    """GraphQL handler answering every alias of a batch query with the typical user"""
+    def handler(request):
+        variables = json.loads(request.content)["variables"]
+        requests.append(variables)
+        if status and len(logins(variables)) > 2:
+            return httpx.Response(status)
+        data, errors = {}, []
+        for name, login in variables.items():
+            if not name.startswith("l"):
+                continue
+            alias = f"u{name[1:]}"
+            if login.startswith("missing"):
+                data[alias] = None
+                errors.append({"type": "NOT_FOUND", "path": [alias], "message": f"Could not resolve {login}"})
+            else:
+                data[alias] = graphql_user_payload()["data"]["repositoryOwner"]
+                data[f"{alias}_mergedPullRequests"] = {"issueCount": len(login)}
+        if cost is not None:
+            data["rateLimit"] = {"cost": cost(len(logins(variables))), "remaining": 4000, "resetAt": "2030-01-01T00:00:00Z"}
+        return httpx.Response(200, json={"data": data, "errors": errors} if errors else {"data": data})
+    return handler
+
+
+@pytest.mark.asyncio
+class TestProfileBatchFetcher:
+    mock_transport = staticmethod(TestFetchUserProfileAsync.mock_transport)
+
+    async def test_aliases_are_demultiplexed_per_user(self):
+        requests = []
+        with self.mock_transport(batch_handler(requests)):
+            results = await GitHubProfileBatchFetcher(batch_size=5).fetch_profiles_async(
+                ["sunithvs", "missing-user", "octocat"]
+            )
+
+        assert len(requests) == 1
+        assert results["sunithvs"]["name"] == "Sunith VS"
+        assert results["octocat"]["username"] == "octocat"
+        assert results["octocat"]["pull_requests_merged"] == len("octocat")
+        # The missing login fails only its own profile
+        assert results["missing-user"]["error_type"] == "not_found"
+
+    async def test_batch_size_adapts_to_query_cost(self):
+        requests = []
+        fetcher = GitHubProfileBatchFetcher(batch_size=2, max_batch_size=8, max_cost=4)
+        # One point per two profiles: 8 profiles fit in 4 points
+        with self.mock_transport(batch_handler(requests, cost=lambda count: max(1, count // 2))):
+            results = await fetcher.fetch_profiles_async([f"user{i}" for i in range(12)])
+
+        assert fetcher.batch_size == 8
+        assert [len(logins(variables)) for variables in requests] == [2, 8, 2]
+        assert len(results) == 12
+
+    async def test_heavy_batches_are_split(self):
+        requests = []
+        fetcher = GitHubProfileBatchFetcher(batch_size=4)
+        with self.mock_transport(batch_handler(requests, status=502)):
+            results = await fetcher.fetch_profiles_async([f"user{i}" for i in range(4)])
+
+        assert fetcher.batch_size == 2
+        assert [len(logins(variables)) for variables in requests] == [4, 2, 2]
+        assert all("error" not in profile for profile in results.values())
+
+
+class TestSocialAccountsFromProfile:
+    def test_readme_links_fill_missing_providers(self):
+        readme = "Find me on https://linkedin.com/in/sunithvs and https://medium.com/@sunithvs"
+        social_accounts = GitHubProfileFetcher._social_accounts_from_profile(
+            "sunithvs",
+            {"nodes": [{"provider": "TWITTER", "url": "https://twitter.com/sunithvs"}]},
+            readme
+        )
+
+        assert social_accounts == [
+            {"provider": "twitter", "url": "https://twitter.com/sunithvs"},
+            {"provider": "linkedin", "url": "https://linkedin.com/in/sunithvs"},
+            {"provider": "generic", "url": "https://medium.com/@sunithvs"},
+        ]
+
+    def test_listed_accounts_take_precedence_over_readme(self):
+        social_accounts = GitHubProfileFetcher._social_accounts_from_profile(
+            "sunithvs",
+            {"nodes": [{"provider": "LINKEDIN", "url": "https://linkedin.com/in/sunith"}]},
+            "https://linkedin.com/in/someone-else"
+        )
+
+        assert social_accounts == [{"provider": "linkedin", "url": "https://linkedin.com/in/sunith"}]
+
+    @pytest.mark.parametrize("social_accounts_data, readme", [(None, None), ({"nodes": []}, "")])
+    def test_no_accounts(self, social_accounts_data, readme):
+        assert GitHubProfileFetcher._social_accounts_from_profile("sunithvs", social_accounts_data, readme) == []
@@ -1,4 +1,5 @@
 import pytest
+import httpx
 from unittest.mock import patch, Mock
 from datetime import datetime, timedelta
 from modules.github_projects import GitHubProjectRanker
@@ -37,6 +38,16 @@ def create_mock_repo(name, stars=0, forks=0, updated_at=None, created_at=None,
     }
 
 class TestGitHubProjectRanker:
+    def test_tokens_are_leased_per_blocking_request(self):
+        """The async path authenticates with `github_auth`, so construction leases nothing"""
+        with patch('config.settings.Settings.get_github_token', return_value=MOCK_TOKEN) as get_token:
+            ranker = GitHubProjectRanker()
+            assert get_token.call_count == 0
+
+            with patch('requests.post', return_value=Mock(status_code=404)):
+                ranker.fetch_pinned_repos(SAMPLE_USERNAME)
+            get_token.assert_called_once_with('graphql')
+
     def test_fetch_user_repos_success(self, ranker):
         """Test successful fetching of user repositories"""
         mock_repos = [
@@ -193,3 +204,60 @@ class TestGitHubProjectRanker:
             )
             pinned = ranker.fetch_pinned_repos(SAMPLE_USERNAME)
             assert pinned == []
+
+
+@pytest.mark.asyncio
+class TestGitHubProjectRankerAsync:
+    @staticmethod
+    def mock_transport(handler):
+        client_class = httpx.AsyncClient
+        return patch('httpx.AsyncClient', lambda **kwargs: client_class(transport=httpx.MockTransport(handler)))
+
+    async def test_get_featured_async(self, ranker):
+        """Repositories and pinned repos are fetched and ranked like the sync path"""
+        page1 = [create_mock_repo(f'repo{i}', stars=i) for i in range(100)]
+        page2 = [create_mock_repo('pinned-repo')]
+        requested_pages = []
+
+        def handler(request):
+            if request.url.path.endswith('/graphql'):
+                return httpx.Response(200, json={
+                    'data': {'user': {'pinnedItems': {'nodes': [{'name': 'pinned-repo'}]}}}
+                })
+            page = int(request.url.params['page'])
+            requested_pages.append(page)
+            return httpx.Response(200, json=page1 if page == 1 else page2)
+
+        with self.mock_transport(handler):
+            featured = await ranker.get_featured_async(SAMPLE_USERNAME, top_n=2)
+
+        # A short second page ends pagination without requesting an empty third page
+        assert requested_pages == [1, 2]
+        assert featured['top_projects'][0]['name'] == 'pinned-repo'
+        assert featured['top_projects'][0]['isPinned'] is True
+        assert len(featured['top_projects']) == 2
+
+    @pytest.mark.parametrize('failing_path', ['/repos', '/graphql'])
+    async def test_get_featured_async_errors(self, ranker, failing_path):
+        """Upstream failures raise, so the cache keeps serving the last good value"""
+        def handler(request):
+            if request.url.path.endswith(failing_path):
+                return httpx.Response(502)
+            if request.url.path.endswith('/graphql'):
+                return httpx.Response(200, json={'data': {'user': {'pinnedItems': {'nodes': []}}}})
+            return httpx.Response(200, json=[create_mock_repo('repo')])
+
+        with self.mock_transport(handler), pytest.raises(httpx.HTTPStatusError):
+            await ranker.get_featured_async(SAMPLE_USERNAME)
+
+    async def test_get_featured_async_without_pinned_items(self, ranker):
+        """A GraphQL response without a user, e.g. for an organization, has no pinned repos"""
+        def handler(request):
+            if request.url.path.endswith('/graphql'):
+                return httpx.Response(200, json={'data': {'user': None}})
+            return httpx.Response(200, json=[create_mock_repo('repo')])
+
+        with self.mock_transport(handler):
+            featured = await ranker.get_featured_async(SAMPLE_USERNAME)
+
+        assert [project['name'] for project in featured['top_projects']] == ['repo']
@@ -0,0 +1,89 @@
+import json
+
+import httpx
+import pytest
+
+from modules.github_queries import PINNED_REPOSITORIES, PROFILE_QUERY, RECENT_REPOSITORIES, batch_profile_query, user_query
+from utils.graphql import Fragment, Query, normalize_document, post_query_async
+
+NAME = Fragment("Name", "User", "name")
+OWNER = Fragment("Owner", "User", "owner { ...Name }", variables=(("from", "DateTime!"),), fragments=(NAME,))
+
+
+class TestNormalizeDocument:
+    def test_minifies_outside_strings(self):
+        document = """
+            # the readme
+            query($login: String!, $limit: Int) {
+              user(login: $login) {
+                object(expression: "HEAD: README.md") {
+                  ... on Blob { text }
+                }
+              }
+            }
+        """
+        assert normalize_document(document) == (
+            'query($login:String!$limit:Int){user(login:$login){'
+            'object(expression:"HEAD: README.md"){...on Blob{text}}}}'
+        )
+
+    def test_equivalent_documents_share_a_hash(self):
+        assert Query("query { viewer { login } }").sha256 == Query("query{viewer{\n  login\n}}").sha256
+
+
+class TestQuery:
+    def test_fragments_are_appended_once_with_their_dependencies(self):
+        query = Query("query { viewer { ...Owner ...Name } }", [OWNER, NAME])
+        assert query.document == (
+            "query{viewer{...Owner...Name}}fragment Name on User{name}fragment Owner on User{owner{...Name}}"
+        )
+
+    def test_payloads(self):
+        query = Query("query { viewer { login } }")
+        assert query.payload({"a": 1}) == {"query": query.document, "variables": {"a": 1}}
+        persisted = query.payload(persisted=True)
+        assert "query" not in persisted
+        assert persisted["extensions"]["persistedQuery"]["sha256Hash"] == query.sha256
+        assert query.payload(persisted=True, register=True)["query"] == query.document
+
+    def test_registry_queries_declare_their_variables(self):
+        assert PROFILE_QUERY.document.startswith(
+            "query($login:String!$mergedPullRequests:String!$closedIssues:String!$from:DateTime!)"
+        )
+        batch = batch_profile_query(2).document
+        assert batch.startswith("query($l0:String!$l1:String!$u0_mergedPullRequests:String!")
+        assert "u1_closedIssues:search(query:$u1_closedIssues type:ISSUE){issueCount}" in batch
+        assert batch_profile_query(2) is batch_profile_query(2)
+
+        composed = user_query(RECENT_REPOSITORIES, PINNED_REPOSITORIES).document
+        assert "...RecentRepositories...PinnedRepositories" in composed
+        assert "fragment PinnedRepositories on User" in composed
+
+
+@pytest.mark.asyncio
+class TestPersistedQueries:
+    @staticmethod
+    def server(documents, bodies):
+        """GraphQL server with automatic persisted queries"""
+        def handler(request):
+            payload = json.loads(request.content)
+            bodies.append(payload)
+            sha256 = payload["extensions"]["persistedQuery"]["sha256Hash"]
+            if "query" in payload:
+                documents[sha256] = payload["query"]
+            elif sha256 not in documents:
+                return httpx.Response(200, json={"errors": [{"message": "PersistedQueryNotFound"}]})
+            return httpx.Response(200, json={"data": {"viewer": {"login": "octocat"}}})
+        return httpx.MockTransport(handler)
+
+    async def test_unknown_hash_is_sent_again_with_its_document(self):
+        documents, bodies = {}, []
+        query = Query("query { viewer { login } }")
+        async with httpx.AsyncClient(transport=self.server(documents, bodies)) as client:
+            first = await post_query_async(client, "https://gateway/graphql", query, persisted=True)
+            second = await post_query_async(client, "https://gateway/graphql", query, persisted=True)
+
+        assert first.json() == second.json() == {"data": {"viewer": {"login": "octocat"}}}
+        # Miss, registration, then the hash alone
+        assert ["query" in body for body in bodies] == [False, True, False]
+        assert documents == {query.sha256: query.document}
@@ -0,0 +1,57 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from utils.cache import CacheEntry
+from utils.http_cache import cached_response, combine_etags, etag_matches
+
+
+def make_request(if_none_match=None):
+    headers = {"if-none-match": if_none_match} if if_none_match else {}
+    return SimpleNamespace(headers=headers)
+
+
+class TestEtagMatches:
+    @pytest.mark.parametrize("header", ['"abc"', 'W/"abc"', '"other", "abc"', "*"])
+    def test_matches(self, header):
+        assert etag_matches(header, "abc")
+
+    @pytest.mark.parametrize("header", [None, "", '"other"'])
+    def test_does_not_match(self, header):
+        assert not etag_matches(header, "abc")
+
+    def test_entry_without_etag_never_matches(self):
+        assert not etag_matches("*", None)
+
+
+class TestCachedResponse:
+    def test_full_response(self):
+        entry = CacheEntry({"a": 1}, time.time() + 60, "abc")
+        response = cached_response(make_request(), entry)
+
+        assert response.status_code == 200
+        assert response.body == b'{"a":1}'
+        assert response.headers["etag"] == 'W/"abc"'
+        assert 0 < int(response.headers["cache-control"].split("max-age=")[1]) <= 60
+
+    def test_not_modified_skips_decoding(self):
+        def load():
+            raise AssertionError("value must not be decoded")
+
+        entry = CacheEntry(fresh_until=time.time() + 60, etag="abc", load=load)
+        response = cached_response(make_request('W/"abc"'), entry)
+
+        assert response.status_code == 304
+        assert response.body == b""
+        assert response.headers["etag"] == 'W/"abc"'
+
+    def test_stale_entry_must_be_revalidated(self):
+        entry = CacheEntry({"a": 1}, time.time() - 1, "abc")
+        assert cached_response(make_request(), entry).headers["cache-control"] == "public, max-age=0"
+
+
+def test_combine_etags():
+    assert combine_etags(["a", "b"]) == combine_etags(["a", "b"])
+    assert combine_etags(["a", "b"]) != combine_etags(["a", "c"])
+    assert combine_etags(["a", None]) is None
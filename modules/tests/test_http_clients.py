@@ -0,0 +1,53 @@
+import httpx
+import pytest
+
+from modules.github_fetcher import GitHubProfileFetcher
+from modules.linkedin_fetcher import LinkedInProfileFetcher
+from utils.http_clients import UpstreamClients, use_client
+
+
+@pytest.mark.asyncio
+class TestUseClient:
+    async def test_shared_client_is_left_open(self):
+        shared = httpx.AsyncClient()
+        async with use_client(shared) as client:
+            assert client is shared
+        assert not shared.is_closed
+        await shared.aclose()
+
+    async def test_own_client_is_closed(self):
+        async with use_client(None, timeout=3) as client:
+            assert client.timeout.read == 3
+        assert client.is_closed
+
+    async def test_fetcher_reuses_shared_client(self):
+        calls = []
+
+        def handler(request):
+            calls.append(request.url.path)
+            return httpx.Response(200, json={"type": "User"})
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as shared:
+            assert await GitHubProfileFetcher.fetch_account_type("octocat", shared) == "User"
+            assert await GitHubProfileFetcher.validate_github_username("octocat", shared)
+            assert not shared.is_closed
+
+        assert calls == ["/users/octocat", "/users/octocat"]
+
+
+@pytest.mark.asyncio
+class TestUpstreamClients:
+    async def test_start_and_close(self):
+        clients = UpstreamClients()
+        await clients.start()
+
+        assert clients.project_ranker.client is clients.github
+        assert clients.linkedin_fetcher.client is clients.linkedin
+        assert clients.ai_generator.async_client._client is clients.groq
+        assert isinstance(clients.linkedin_fetcher, LinkedInProfileFetcher)
+
+        github = clients.github
+        await clients.close()
+
+        assert github.is_closed
+        assert clients.github is None and clients.ai_generator is None
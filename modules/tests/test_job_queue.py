@@ -0,0 +1,134 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from modules.tests.fake_redis import FakeRedis, UnreachableRedis
+from utils.job_queue import JobQueue
+
+
+@asynccontextmanager
+async def running(queue, concurrency=2):
+    workers = asyncio.create_task(queue.run(concurrency))
+    try:
+        yield
+    finally:
+        workers.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await workers
+
+
+async def wait_for_status(queue, job_id, *statuses):
+    for _ in range(200):
+        status = await queue.status(job_id)
+        if status is not None and status["status"] in statuses:
+            return status
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} never reached {statuses}")
+
+
+@pytest.mark.asyncio
+class TestJobQueue:
+    @pytest.mark.parametrize("redis_client", [FakeRedis(), None, UnreachableRedis()], ids=["redis", "local", "fallback"])
+    async def test_runs_queued_jobs(self, redis_client):
+        done = []
+
+        async def handler(job_id):
+            done.append(job_id)
+
+        queue = JobQueue(redis_client, "jobs", handler, poll_interval=0.01, redis_retry_interval=0.01)
+        assert await queue.enqueue("octocat")
+        assert (await queue.status("octocat"))["status"] == "queued"
+
+        async with running(queue):
+            await wait_for_status(queue, "octocat", "done")
+        assert done == ["octocat"]
+
+    async def test_job_is_queued_once_until_finished(self):
+        release = asyncio.Event()
+        calls = []
+
+        async def handler(job_id):
+            calls.append(job_id)
+            await release.wait()
+
+        queue = JobQueue(FakeRedis(), "jobs", handler, poll_interval=0.01)
+        assert await queue.enqueue("octocat")
+        assert not await queue.enqueue("octocat")
+
+        async with running(queue):
+            await wait_for_status(queue, "octocat", "running")
+            assert not await queue.enqueue("octocat")
+            release.set()
+            await wait_for_status(queue, "octocat", "done")
+            # Finished jobs can be queued again
+            assert await queue.enqueue("octocat")
+            await wait_for_status(queue, "octocat", "done")
+
+        assert calls == ["octocat", "octocat"]
+
+    async def test_mark_queued_replaces_only_finished_statuses(self):
+        release = asyncio.Event()
+
+        async def handler(job_id):
+            await release.wait()
+
+        queue = JobQueue(FakeRedis(), "jobs", handler, poll_interval=0.01)
+        await queue.mark_queued("octocat")
+        assert (await queue.status("octocat"))["status"] == "queued"
+        await queue.enqueue("octocat")
+
+        async with running(queue, concurrency=1):
+            await wait_for_status(queue, "octocat", "running")
+            await queue.mark_queued("octocat")
+            assert (await queue.status("octocat"))["status"] == "running"
+            release.set()
+            await wait_for_status(queue, "octocat", "done")
+
+        await queue.mark_queued("octocat")
+        assert (await queue.status("octocat"))["status"] == "queued"
+
+    async def test_failed_job_records_error(self):
+        async def handler(job_id):
+            raise ValueError("rate limited")
+
+        queue = JobQueue(FakeRedis(), "jobs", handler, poll_interval=0.01)
+        await queue.enqueue("octocat")
+
+        async with running(queue, concurrency=1):
+            status = await wait_for_status(queue, "octocat", "failed")
+
+        assert status["error"] == "rate limited"
+        assert await queue.enqueue("octocat")
+
+    async def test_job_timeout(self):
+        async def handler(job_id):
+            await asyncio.sleep(10)
+
+        queue = JobQueue(None, "jobs", handler, job_timeout=0.05)
+        await queue.enqueue("octocat")
+
+        async with running(queue, concurrency=1):
+            status = await wait_for_status(queue, "octocat", "failed")
+        assert status["error"] == "TimeoutError"
+
+    async def test_unavailable_redis_is_skipped_for_the_retry_interval(self):
+        class CountingRedis(UnreachableRedis):
+            calls = 0
+
+            def __getattr__(self, name):
+                CountingRedis.calls += 1
+                return super().__getattr__(name)
+
+        async def handler(job_id):
+            pass
+
+        queue = JobQueue(CountingRedis(), "jobs", handler, redis_retry_interval=60)
+        assert await queue.enqueue("octocat")
+        assert await queue.enqueue("hubot")
+        assert (await queue.status("hubot"))["status"] == "queued"
+        assert CountingRedis.calls == 1
+
+    async def test_unknown_job(self):
+        queue = JobQueue(FakeRedis(), "jobs", None)
+        assert await queue.status("nobody") is None
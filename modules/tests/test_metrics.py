@@ -0,0 +1,103 @@
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from utils.metrics import (
+    CACHE_REQUESTS,
+    REQUEST_DURATION,
+    UPSTREAM_DURATION,
+    UPSTREAM_EVENT_HOOKS,
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsMiddleware,
+    MetricsRegistry,
+    observe_cache,
+    upstream_target,
+)
+
+
+class TestMetrics:
+    def test_counter_exposition(self):
+        counter = Counter("hits_total", "Hits", ("family",))
+        counter.inc("github")
+        counter.inc("github", amount=2)
+
+        assert counter.samples() == ['hits_total{family="github"} 3']
+
+    def test_label_values_are_escaped(self):
+        gauge = Gauge("g", "G", ("name",))
+        gauge.set(1, 'a"b')
+
+        assert gauge.samples() == ['g{name="a\\"b"} 1']
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram("latency", "Latency", ("route",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.7, 5):
+            histogram.observe(value, "/user")
+
+        assert histogram.samples() == [
+            'latency_bucket{route="/user",le="0.1"} 1',
+            'latency_bucket{route="/user",le="1.0"} 3',
+            'latency_bucket{route="/user",le="+Inf"} 4',
+            'latency_sum{route="/user"} 6.25',
+            'latency_count{route="/user"} 4',
+        ]
+
+    def test_registry_runs_collectors_before_rendering(self):
+        registry = MetricsRegistry()
+        gauge = registry.register(Gauge("remaining", "Remaining"))
+        registry.on_collect(lambda: gauge.set(42))
+
+        assert registry.render() == "# HELP remaining Remaining\n# TYPE remaining gauge\nremaining 42\n"
+
+    def test_failing_collector_does_not_break_scrape(self):
+        registry = MetricsRegistry()
+        registry.register(Counter("c", "C"))
+        registry.on_collect(lambda: 1 / 0)
+
+        assert "# TYPE c counter" in registry.render()
+
+    @pytest.mark.parametrize("url, target", [
+        ("https://api.github.com/users/octocat", "github_rest"),
+        ("https://api.github.com/graphql", "github_graphql"),
+        ("https://api.groq.com/openai/v1/chat/completions", "groq"),
+        ("https://notes.cleve.ai/api/linkedin-unwrapped", "linkedin"),
+        ("https://example.com/x", "example.com"),
+    ])
+    def test_upstream_target(self, url, target):
+        assert upstream_target(httpx.URL(url)) == target
+
+    def test_observe_cache_uses_key_family(self):
+        before = CACHE_REQUESTS.value("metrics-test", "hit")
+        observe_cache("metrics-test:octocat", "hit")
+
+        assert CACHE_REQUESTS.value("metrics-test", "hit") == before + 1
+
+
+@pytest.mark.asyncio
+async def test_event_hooks_time_upstream_calls():
+    before = UPSTREAM_DURATION.count("github_rest", "404")
+    transport = httpx.MockTransport(lambda request: httpx.Response(404))
+
+    async with httpx.AsyncClient(transport=transport, event_hooks=UPSTREAM_EVENT_HOOKS) as client:
+        await client.get("https://api.github.com/users/missing")
+
+    assert UPSTREAM_DURATION.count("github_rest", "404") == before + 1
+
+
+def test_middleware_labels_requests_by_route_template():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/metrics-test/{username}")
+    async def endpoint(username: str):
+        return {}
+
+    before = REQUEST_DURATION.count("GET", "/metrics-test/{username}", "200")
+    client = TestClient(app)
+    client.get("/metrics-test/octocat")
+    client.get("/metrics-test/torvalds")
+
+    assert REQUEST_DURATION.count("GET", "/metrics-test/{username}", "200") == before + 2
@@ -0,0 +1,242 @@
+import time
+from unittest.mock import patch
+
+import httpx
+import pytest
+from groq import AsyncGroq
+
+from modules.ai_generator import AIDescriptionGenerator
+from utils.rate_limit import GitHubTokenAuth, GitHubTokenScheduler, GroqKeyPool, parse_reset_duration
+
+REST_URL = "https://api.github.com/users/octocat"
+GRAPHQL_URL = "https://api.github.com/graphql"
+
+
+def rate_limit_response(remaining, reset_in=60, resource="core", status_code=200, limit=5000, **headers):
+    return httpx.Response(status_code, headers={
+        "x-ratelimit-limit": str(limit),
+        "x-ratelimit-remaining": str(remaining),
+        "x-ratelimit-reset": str(int(time.time() + reset_in)),
+        "x-ratelimit-resource": resource,
+        **headers,
+    })
+
+
+class TestGitHubTokenScheduler:
+    def test_leases_token_with_most_headroom(self):
+        scheduler = GitHubTokenScheduler(["a", "b"])
+        scheduler.record("a", "core", rate_limit_response(10))
+        scheduler.record("b", "core", rate_limit_response(4000))
+
+        assert scheduler.try_lease("core") == "b"
+
+    def test_leases_spread_before_any_response(self):
+        scheduler = GitHubTokenScheduler(["a", "b"])
+        assert {scheduler.try_lease("core") for _ in range(2)} == {"a", "b"}
+
+    def test_resources_are_tracked_separately(self):
+        scheduler = GitHubTokenScheduler(["a", "b"])
+        scheduler.record("a", "core", rate_limit_response(0))
+        scheduler.record("b", "graphql", rate_limit_response(0, resource="graphql"))
+
+        assert scheduler.try_lease("core") == "b"
+        assert scheduler.try_lease("graphql") == "a"
+
+    def test_response_resource_header_wins(self):
+        scheduler = GitHubTokenScheduler(["a"])
+        scheduler.record("a", "core", rate_limit_response(0, resource="search", limit=30))
+
+        assert scheduler.try_lease("search") is None
+        assert scheduler.try_lease("core") == "a"
+
+    def test_drained_budget_refills_after_reset(self):
+        scheduler = GitHubTokenScheduler(["a"])
+        scheduler.record("a", "core", rate_limit_response(0, reset_in=-1))
+        assert scheduler.try_lease("core") == "a"
+
+    def test_retry_after_drains_token(self):
+        scheduler = GitHubTokenScheduler(["a", "b"])
+        scheduler.record("a", "core", httpx.Response(403, headers={"retry-after": "60"}))
+
+        assert scheduler.try_lease("core") == "b"
+        assert scheduler.next_reset("core") > time.time() + 50
+
+    def test_lease_nowait_falls_back_to_drained_token(self):
+        scheduler = GitHubTokenScheduler(["a"])
+        scheduler.record("a", "core", rate_limit_response(0))
+        assert scheduler.lease_nowait("core") == "a"
+
+    def test_blocking_responses_are_recorded_by_authorization_header(self):
+        scheduler = GitHubTokenScheduler(["a", "b"])
+        scheduler.record_authorized("Bearer a", "graphql", rate_limit_response(7, resource="graphql"))
+        scheduler.record_authorized("token unknown", "core", rate_limit_response(0))
+        scheduler.record_authorized(None, "core", rate_limit_response(0))
+
+        assert scheduler.snapshot() == {("a", "graphql"): (5000, 7, pytest.approx(time.time() + 60, abs=2))}
+
+    def test_resource_for(self):
+        assert GitHubTokenScheduler.resource_for(httpx.URL(GRAPHQL_URL)) == "graphql"
+        assert GitHubTokenScheduler.resource_for(httpx.URL("https://api.github.com/search/issues")) == "search"
+        assert GitHubTokenScheduler.resource_for(httpx.URL(REST_URL)) == "core"
+
+
+@pytest.mark.asyncio
+class TestGitHubTokenSchedulerAsync:
+    async def test_parks_until_reset(self):
+        scheduler = GitHubTokenScheduler(["a"], poll_interval=0.05)
+        scheduler.record("a", "core", rate_limit_response(0, reset_in=0))
+        # Reset timestamps have second resolution; move it just ahead
+        scheduler._budgets[("a", "core")].reset_at = time.time() + 0.2
+
+        start = time.monotonic()
+        assert await scheduler.lease("core") == "a"
+        assert time.monotonic() - start >= 0.15
+
+    async def test_wait_is_bounded(self):
+        scheduler = GitHubTokenScheduler(["a"], max_wait=0.1, poll_interval=0.05)
+        scheduler.record("a", "core", rate_limit_response(0, reset_in=3600))
+
+        start = time.monotonic()
+        assert await scheduler.lease("core") == "a"
+        assert time.monotonic() - start < 1
+
+    async def test_auth_sets_token_and_records_budget(self):
+        scheduler = GitHubTokenScheduler(["a", "b"])
+        seen = []
+
+        def handler(request):
+            seen.append(request.headers["Authorization"])
+            if request.url.path == "/graphql":
+                return rate_limit_response(100, resource="graphql")
+            return rate_limit_response(0 if request.headers["Authorization"] == "token a" else 10)
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler), auth=GitHubTokenAuth(scheduler)) as client:
+            await client.get(REST_URL)
+            await client.get(REST_URL)
+            await client.get(REST_URL)
+            await client.post(GRAPHQL_URL, json={})
+
+        assert seen[:2] == ["token a", "token b"]
+        # "a" reported an empty budget, so "b" keeps being used
+        assert seen[2] == "token b"
+        assert seen[3].startswith("Bearer ")
+        assert scheduler.snapshot()[("a", "core")][1] == 0
+
+
+def completion_response(content="summary", total_tokens=100, **headers):
+    return httpx.Response(200, headers=headers, json={
+        "id": "chatcmpl", "object": "chat.completion", "created": 0, "model": "m",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": total_tokens - 10, "completion_tokens": 10, "total_tokens": total_tokens},
+    })
+
+
+class TestGroqKeyPool:
+    def test_picks_key_with_most_tokens_left(self):
+        pool = GroqKeyPool(["a", "b"], rpm_limit=30, tpm_limit=1000)
+        pool.try_lease(600)
+
+        assert pool.try_lease(100).key == "b"
+
+    def test_cost_must_fit(self):
+        pool = GroqKeyPool(["a", "b"], rpm_limit=30, tpm_limit=1000)
+        pool.try_lease(600)
+        pool.try_lease(600)
+
+        assert pool.try_lease(500) is None
+        assert pool.try_lease(400) is not None
+
+    def test_requests_per_minute(self):
+        pool = GroqKeyPool(["a"], rpm_limit=2, tpm_limit=1000)
+        pool.try_lease(1)
+        pool.try_lease(1)
+        assert pool.try_lease(1) is None
+
+    def test_usage_corrects_reservation(self):
+        pool = GroqKeyPool(["a"], rpm_limit=30, tpm_limit=1000)
+        lease = pool.try_lease(900)
+        pool.record(lease, {}, total_tokens=100)
+
+        assert pool.try_lease(800) is not None
+
+    def test_headers_tighten_budget(self):
+        pool = GroqKeyPool(["a", "b"], rpm_limit=30, tpm_limit=1000)
+        lease = pool.try_lease(10)
+        pool.record(lease, {"x-ratelimit-remaining-tokens": "50", "x-ratelimit-reset-tokens": "7.66s"}, 10)
+
+        assert pool.try_lease(100).key == "b"
+        assert pool.try_lease(100).key == "b"
+
+    def test_request_headers_are_the_daily_budget(self):
+        pool = GroqKeyPool(["a", "b"], rpm_limit=30, tpm_limit=1000)
+        lease = pool.try_lease(10)
+        # A day's requests left do not cap the minute's
+        pool.record(lease, {"x-ratelimit-remaining-requests": "5", "x-ratelimit-reset-requests": "2m59.56s"}, 10)
+        assert pool.snapshot()["a"] == (29, 990, 5)
+
+        pool.record(lease, {"x-ratelimit-remaining-requests": "1", "x-ratelimit-reset-requests": "1h"}, 10)
+        assert pool.try_lease(10).key == "b"
+        assert pool.try_lease(10).key == "a"
+        assert {pool.try_lease(10).key for _ in range(3)} == {"b"}
+        assert pool.snapshot()["a"][2] == 0
+
+    def test_daily_budget_resets(self):
+        pool = GroqKeyPool(["a"], rpm_limit=30, tpm_limit=1000)
+        pool.record(pool.try_lease(10), {"x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": "1h"}, 10)
+        assert pool.try_lease(10) is None
+
+        pool._budgets["a"].daily_reset_at = time.time() - 1
+        assert pool.try_lease(10) is not None
+
+    def test_cooldown_after_rate_limit(self):
+        pool = GroqKeyPool(["a", "b"], rpm_limit=30, tpm_limit=1000)
+        pool.cooldown(pool.try_lease(10), {"retry-after": "30"})
+
+        assert {pool.try_lease(10).key for _ in range(3)} == {"b"}
+
+    def test_parse_reset_duration(self):
+        assert parse_reset_duration("1m26.4s") == pytest.approx(86.4)
+        assert parse_reset_duration("120ms") == pytest.approx(0.12)
+        assert parse_reset_duration("") == 0
+
+    def test_estimate_tokens(self):
+        messages = [{"role": "user", "content": "x" * 400}]
+        assert GroqKeyPool.estimate_tokens(messages, 50) == 100 + 4 + 50
+
+
+@pytest.mark.asyncio
+class TestGroqKeyPoolAsync:
+    async def test_waits_for_headroom(self):
+        pool = GroqKeyPool(["a"], rpm_limit=30, tpm_limit=1000, poll_interval=0.05)
+        pool.try_lease(1000)
+        pool._budgets["a"].window[0][0] = time.time() - GroqKeyPool.WINDOW + 0.2
+
+        start = time.monotonic()
+        assert (await pool.lease(500)).key == "a"
+        assert time.monotonic() - start >= 0.15
+
+    async def test_completion_moves_to_another_key_after_429(self):
+        pool = GroqKeyPool(["a", "b"], rpm_limit=30, tpm_limit=100_000)
+        seen = []
+
+        def handler(request):
+            key = request.headers["Authorization"].split()[1]
+            seen.append(key)
+            if key == "a":
+                return httpx.Response(429, headers={"retry-after": "30"}, json={"error": {"message": "rate limited"}})
+            return completion_response(total_tokens=123)
+
+        with patch("modules.ai_generator.groq_keys", pool):
+            generator = AIDescriptionGenerator()
+            generator.async_client = AsyncGroq(
+                api_key="unused", max_retries=0,
+                http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            )
+            summary = await generator.generate_profile_summary_async({
+                "name": "Octo", "followers": 1, "public_repos": 1, "bio": "", "readme_content": ""
+            })
+
+        assert summary == "summary"
+        assert seen == ["a", "b"]
+        assert pool._budgets["a"].cooldown_until > time.time()
+        assert pool._budgets["b"].window[-1][1] == 123
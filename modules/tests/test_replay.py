@@ -0,0 +1,74 @@
+import gzip
+
+import httpx
+import pytest
+
+from modules.github_fetcher import GitHubProfileFetcher
+from utils.http_clients import upstream_transport
+from utils.replay import RecordingTransport, ReplayMissError, ReplayTransport, load_exchanges, save_exchanges
+
+
+def upstream(request):
+    if request.url.path == "/users/octocat":
+        return httpx.Response(
+            200,
+            json={"login": "octocat", "type": "User"},
+            headers={"x-ratelimit-remaining": "4999", "set-cookie": "session=secret"}
+        )
+    if request.url.path == "/avatar.png":
+        return httpx.Response(200, content=b"\x89PNG\xff")
+    return httpx.Response(200, json={"data": {"query": request.content.decode()}})
+
+
+async def record(*requests):
+    recorder = RecordingTransport(httpx.MockTransport(upstream))
+    async with httpx.AsyncClient(transport=recorder, headers={"Authorization": "token secret"}) as client:
+        for method, url, kwargs in requests:
+            await client.request(method, url, **kwargs)
+    return recorder.exchanges
+
+
+@pytest.mark.asyncio
+class TestRecordReplay:
+    async def test_replays_recorded_responses_from_fixture(self, tmp_path):
+        exchanges = await record(
+            ("GET", "https://api.github.com/users/octocat", {}),
+            ("GET", "https://api.github.com/avatar.png", {}),
+        )
+        path = str(tmp_path / "fixture.jsonl.gz")
+        save_exchanges(path, exchanges)
+
+        fixture = gzip.open(path, "rt").read()
+        assert "secret" not in fixture
+
+        async with httpx.AsyncClient(transport=ReplayTransport(load_exchanges(path))) as client:
+            user = await client.get("http://localhost:8080/users/octocat")
+            avatar = await client.get("http://localhost:8080/avatar.png")
+
+        assert user.json() == {"login": "octocat", "type": "User"}
+        assert user.headers["x-ratelimit-remaining"] == "4999"
+        assert avatar.content == b"\x89PNG\xff"
+
+    async def test_request_bodies_match_across_timestamps(self):
+        exchanges = await record(
+            ("POST", "https://api.github.com/graphql", {"json": {"from": "2024-01-01T10:00:00.123456Z"}}),
+        )
+        async with httpx.AsyncClient(transport=ReplayTransport(exchanges)) as client:
+            response = await client.post("https://api.github.com/graphql", json={"from": "2025-06-30T08:00:00Z"})
+            assert response.status_code == 200
+
+            with pytest.raises(ReplayMissError):
+                await client.post("https://api.github.com/graphql", json={"other": "query"})
+
+    async def test_fetchers_run_on_replayed_traffic(self):
+        exchanges = await record(("GET", "https://api.github.com/users/octocat", {}))
+        transport = ReplayTransport(exchanges)
+
+        with upstream_transport(transport):
+            assert await GitHubProfileFetcher.validate_github_username("octocat")
+            assert await GitHubProfileFetcher.fetch_account_type("octocat") == "User"
+            # Unrecorded requests fail like an unreachable API
+            with pytest.raises(httpx.TransportError):
+                await GitHubProfileFetcher.fetch_account_type("torvalds")
+
+        assert transport.misses == 1
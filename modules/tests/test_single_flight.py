@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+
+from modules.tests.fake_redis import FakeRedis
+from utils.single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+class TestSingleFlight:
+    async def test_concurrent_callers_share_one_computation(self):
+        single_flight = SingleFlight()
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"value": calls}
+
+        results = await asyncio.gather(*[single_flight.do("key", compute) for _ in range(20)])
+
+        assert calls == 1
+        assert all(result == {"value": 1} for result in results)
+        assert not single_flight.in_flight("key")
+
+    async def test_different_keys_compute_independently(self):
+        single_flight = SingleFlight()
+
+        async def compute(key):
+            await asyncio.sleep(0.01)
+            return key
+
+        results = await asyncio.gather(
+            single_flight.do("a", lambda: compute("a")),
+            single_flight.do("b", lambda: compute("b"))
+        )
+        assert results == ["a", "b"]
+
+    async def test_exception_propagates_to_all_callers(self):
+        single_flight = SingleFlight()
+
+        async def compute():
+            await asyncio.sleep(0.01)
+            raise ValueError("upstream failed")
+
+        results = await asyncio.gather(
+            *[single_flight.do("key", compute) for _ in range(3)],
+            return_exceptions=True
+        )
+        assert all(isinstance(result, ValueError) for result in results)
+
+        # A failed computation is not remembered
+        async def recover():
+            return "ok"
+
+        assert await single_flight.do("key", recover) == "ok"
+
+    async def test_cancelled_caller_does_not_cancel_computation(self):
+        single_flight = SingleFlight()
+
+        async def compute():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        first = asyncio.ensure_future(single_flight.do("key", compute))
+        second = asyncio.ensure_future(single_flight.do("key", compute))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        assert await second == "done"
+
+    async def test_lease_is_released_after_computation(self):
+        fake_redis = FakeRedis()
+        single_flight = SingleFlight(fake_redis)
+
+        async def compute():
+            assert "single_flight:key" in fake_redis.store
+            return "value"
+
+        assert await single_flight.do("key", compute) == "value"
+        assert "single_flight:key" not in fake_redis.store
+
+    async def test_waits_for_result_of_other_replica(self):
+        fake_redis = FakeRedis()
+        # Another replica holds the lease for this key
+        fake_redis.store["single_flight:key"] = "other-replica"
+        single_flight = SingleFlight(fake_redis, poll_interval=0.01)
+
+        async def compute():
+            raise AssertionError("should not compute while another replica holds the lease")
+
+        async def lookup():
+            return fake_redis.store.get("key")
+
+        async def other_replica_finishes():
+            await asyncio.sleep(0.03)
+            fake_redis.store["key"] = "from-other-replica"
+
+        result, _ = await asyncio.gather(
+            single_flight.do("key", compute, lookup),
+            other_replica_finishes()
+        )
+        assert result == "from-other-replica"
+
+    async def test_computes_locally_after_wait_timeout(self):
+        fake_redis = FakeRedis()
+        fake_redis.store["single_flight:key"] = "stuck-replica"
+        single_flight = SingleFlight(fake_redis, wait_timeout=0.03, poll_interval=0.01)
+
+        async def compute():
+            return "local"
+
+        async def lookup():
+            return None
+
+        assert await single_flight.do("key", compute, lookup) == "local"
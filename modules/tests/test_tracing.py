@@ -0,0 +1,77 @@
+import json
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from utils.metrics import UPSTREAM_EVENT_HOOKS
+from utils.tracing import RequestTrace, ServerTimingMiddleware, current_trace, trace_stage
+
+
+def make_app(slow_threshold=0):
+    app = FastAPI()
+    app.add_middleware(ServerTimingMiddleware, slow_threshold=slow_threshold)
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, content=b"x" * 42))
+
+    @app.get("/user/{username}")
+    async def endpoint(username: str):
+        with trace_stage("github_profile"):
+            async with httpx.AsyncClient(transport=transport, event_hooks=UPSTREAM_EVENT_HOOKS) as client:
+                await client.post("https://api.github.com/graphql")
+        return {}
+
+    @app.get("/fail")
+    async def fail():
+        with trace_stage("validate_github_username"):
+            raise ValueError("boom")
+
+    return app
+
+
+class TestRequestTrace:
+    def test_server_timing_header_value(self):
+        trace = RequestTrace()
+        trace.add("github_profile.github_rest", trace.start, 200, 1024, "GET /users/octocat")
+        trace.add("ai_about", trace.start)
+
+        metrics = trace.server_timing().split(", ")
+
+        assert metrics[0].startswith("github_profile.github_rest;dur=")
+        assert metrics[0].endswith(';desc="GET /users/octocat 200 1024B"')
+        assert metrics[1].startswith("ai_about;dur=") and "desc" not in metrics[1]
+        assert metrics[2].startswith("total;dur=")
+
+    def test_stage_outside_request_is_noop(self):
+        with trace_stage("anything"):
+            assert current_trace() is None
+
+
+class TestServerTimingMiddleware:
+    def test_header_lists_stages_and_upstream_calls(self):
+        response = TestClient(make_app()).get("/user/octocat")
+        names = [metric.split(";")[0] for metric in response.headers["server-timing"].split(", ")]
+
+        assert names == ["github_profile.github_graphql", "github_profile", "total"]
+        assert 'desc="POST /graphql 200 42B"' in response.headers["server-timing"]
+
+    def test_failed_stage_records_exception(self, capsys):
+        client = TestClient(make_app(slow_threshold=1e-9), raise_server_exceptions=False)
+        client.get("/fail")
+
+        record = json.loads(capsys.readouterr().out.strip().splitlines()[-1])
+        assert record["event"] == "slow_request"
+        assert record["status"] == 500
+        assert record["stages"][0]["name"] == "validate_github_username"
+        assert record["stages"][0]["status"] == "ValueError"
+
+    @pytest.mark.parametrize("slow_threshold, logged", [(0, False), (1e-9, True), (60, False)])
+    def test_slow_request_log(self, capsys, slow_threshold, logged):
+        TestClient(make_app(slow_threshold)).get("/user/octocat")
+
+        output = capsys.readouterr().out
+        assert ('"event": "slow_request"' in output) == logged
+        if logged:
+            record = json.loads(output.strip().splitlines()[-1])
+            assert record["route"] == "/user/{username}"
+            assert [stage["name"] for stage in record["stages"]] == ["github_profile.github_graphql", "github_profile"]
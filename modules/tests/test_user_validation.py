@@ -0,0 +1,136 @@
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from config.settings import Settings
+from modules.github_fetcher import GitHubProfileFetcher
+from modules.tests.fake_redis import FakeRedis
+from utils.cache import MemoryCache, ResponseCache
+from utils.single_flight import SingleFlight
+from utils.user import is_valid_github_username, remember_github_username, verify_profile_username, verify_username
+
+
+@pytest.fixture
+def fake_redis():
+    return FakeRedis()
+
+
+@pytest.fixture
+def cache(fake_redis):
+    return ResponseCache(fake_redis, SingleFlight(fake_redis), soft_ttl=60, hard_ttl=600)
+
+
+def make_request(cache):
+    return SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace(response_cache=cache)))
+
+
+@pytest.mark.asyncio
+class TestUsernameValidationCache:
+    async def test_valid_user_is_cached(self, cache, fake_redis):
+        with patch.object(GitHubProfileFetcher, 'fetch_account_type', AsyncMock(return_value='User')) as lookup:
+            assert await is_valid_github_username("Octocat", cache) is True
+            assert await is_valid_github_username("octocat", cache) is True
+
+        lookup.assert_awaited_once()
+        assert fake_redis.expiry["github_username_valid:octocat"] > 0
+
+    @pytest.mark.parametrize("account_type", ['Organization', None])
+    async def test_organizations_and_missing_users_are_cached(self, cache, fake_redis, account_type):
+        with patch.object(GitHubProfileFetcher, 'fetch_account_type', AsyncMock(return_value=account_type)) as lookup:
+            assert await is_valid_github_username("github", cache) is False
+            assert await is_valid_github_username("github", cache) is False
+
+        lookup.assert_awaited_once()
+
+    async def test_negative_entries_expire_sooner(self, cache, fake_redis):
+        with patch.object(GitHubProfileFetcher, 'fetch_account_type', AsyncMock(side_effect=['User', None])):
+            await is_valid_github_username("valid", cache)
+            await is_valid_github_username("missing", cache)
+
+        valid_ttl = fake_redis.expiry["github_username_valid:valid"]
+        invalid_ttl = fake_redis.expiry["github_username_valid:missing"]
+        assert valid_ttl - invalid_ttl == pytest.approx(
+            Settings.VALID_USERNAME_CACHE_TTL - Settings.INVALID_USERNAME_CACHE_TTL, abs=5
+        )
+
+    async def test_api_errors_are_not_cached(self, cache, fake_redis):
+        error = httpx.ConnectError("connection refused")
+        with patch.object(GitHubProfileFetcher, 'fetch_account_type', AsyncMock(side_effect=error)):
+            assert await is_valid_github_username("octocat", cache) is True
+
+        assert "github_username_valid:octocat" not in fake_redis.store
+
+    @pytest.mark.parametrize("status_code", [403, 429, 502])
+    async def test_api_status_errors_are_not_missing_users(self, cache, fake_redis, status_code):
+        request = httpx.Request("GET", "https://api.github.com/users/octocat")
+        error = httpx.HTTPStatusError("error", request=request, response=httpx.Response(status_code, request=request))
+        with patch.object(GitHubProfileFetcher, 'fetch_account_type', AsyncMock(side_effect=error)):
+            assert await is_valid_github_username("octocat", cache) is True
+            assert await is_valid_github_username("octocat") is True
+            assert await verify_username("octocat", make_request(cache)) == "octocat"
+
+        assert "github_username_valid:octocat" not in fake_redis.store
+
+    async def test_invalid_pattern_skips_lookup(self, cache):
+        with patch.object(GitHubProfileFetcher, 'fetch_account_type', AsyncMock()) as lookup:
+            assert await is_valid_github_username("inv--alid", cache) is False
+
+        lookup.assert_not_awaited()
+
+    async def test_memory_hit_skips_redis(self, fake_redis):
+        memory = MemoryCache(max_entries=10, max_bytes=10_000, ttl=60)
+        cache = ResponseCache(fake_redis, SingleFlight(fake_redis), 60, 600, memory=memory)
+        with patch.object(GitHubProfileFetcher, 'fetch_account_type', AsyncMock(return_value='User')):
+            await is_valid_github_username("octocat", cache)
+
+        fake_redis.store.clear()
+        assert await is_valid_github_username("octocat", cache) is True
+
+
+@pytest.mark.asyncio
+class TestVerifyUsername:
+    async def test_blacklisted_user_is_rejected_before_lookup(self, cache):
+        with patch.object(Settings, 'BLACKLISTED_USERS', {'blocked-user'}), \
+                patch.object(GitHubProfileFetcher, 'fetch_account_type', AsyncMock()) as lookup:
+            with pytest.raises(HTTPException) as exc_info:
+                await verify_username("Blocked-User", make_request(cache))
+
+        assert exc_info.value.status_code == 403
+        lookup.assert_not_awaited()
+
+    async def test_invalid_user_is_rejected(self, cache):
+        with patch.object(GitHubProfileFetcher, 'fetch_account_type', AsyncMock(return_value=None)):
+            with pytest.raises(HTTPException) as exc_info:
+                await verify_username("missing", make_request(cache))
+
+        assert exc_info.value.status_code == 400
+
+    async def test_valid_user_passes(self, cache):
+        with patch.object(GitHubProfileFetcher, 'fetch_account_type', AsyncMock(return_value='User')):
+            assert await verify_username("octocat", make_request(cache)) == "octocat"
+
+
+@pytest.mark.asyncio
+class TestVerifyProfileUsername:
+    async def test_unknown_user_passes_without_lookup(self, cache):
+        with patch.object(GitHubProfileFetcher, 'fetch_account_type', AsyncMock()) as lookup:
+            assert await verify_profile_username("octocat", make_request(cache)) == "octocat"
+
+        lookup.assert_not_awaited()
+
+    async def test_user_known_to_be_invalid_is_rejected(self, cache):
+        await remember_github_username(cache, "Missing", False)
+
+        with pytest.raises(HTTPException) as exc_info:
+            await verify_profile_username("missing", make_request(cache))
+
+        assert exc_info.value.status_code == 400
+
+    async def test_invalid_pattern_is_rejected(self, cache):
+        with pytest.raises(HTTPException) as exc_info:
+            await verify_profile_username("inv--alid", make_request(cache))
+
+        assert exc_info.value.status_code == 400
@@ -0,0 +1,406 @@
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, List, Optional
+
+import redis.asyncio as redis
+from fastapi import BackgroundTasks
+
+from utils.codec import CacheCodec, CodecError
+from utils.metrics import observe_cache
+from utils.single_flight import SingleFlight
+
+
+class CacheEntry:
+    """
+    A cached value, the time after which it should be refreshed and the
+    content hash of the value. The value can be given as a `load` function,
+    called on first access, so entries can be checked against a client's
+    ETag without decoding them.
+    """
+
+    __slots__ = ("_value", "_load", "fresh_until", "etag")
+
+    def __init__(
+            self,
+            value: Any = None,
+            fresh_until: float = float("inf"),
+            etag: Optional[str] = None,
+            load: Optional[Callable[[], Any]] = None
+    ):
+        self._value = value
+        self._load = load
+        self.fresh_until = fresh_until
+        self.etag = etag
+
+    @property
+    def value(self) -> Any:
+        if self._load is not None:
+            self._value = self._load()
+            self._load = None
+        return self._value
+
+    @property
+    def is_stale(self) -> bool:
+        return time.time() >= self.fresh_until
+
+
+class MemoryCache:
+    """
+    Size-bounded in-process LRU cache holding decoded cache entries.
+
+    Entries expire after `ttl` seconds and the least recently used ones are
+    evicted once either the entry count or the accounted bytes exceed their
+    limit.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float):
+        """
+        Args:
+            max_entries (int): Maximum number of entries
+            max_bytes (int): Maximum total size of the entries' encoded form
+            ttl (float): Seconds an entry is served from memory
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        # key -> (entry, size, expires_at)
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: str, allow_expired: bool = False) -> Optional[CacheEntry]:
+        """
+        Read an entry and mark it as recently used
+
+        Args:
+            key (str): Cache key
+            allow_expired (bool): Return entries past the memory TTL that have
+                not been evicted yet, used while Redis is unreachable
+        """
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        entry, _, expires_at = item
+        if time.monotonic() >= expires_at and not allow_expired:
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: str, entry: CacheEntry, size: int):
+        """Store an entry accounted at `size` bytes, evicting as needed"""
+        self.invalidate(key)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (entry, size, time.monotonic() + self.ttl)
+        self.size += size
+        while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self.size -= evicted_size
+
+    def invalidate(self, key: str):
+        """Drop an entry"""
+        item = self._entries.pop(key, None)
+        if item is not None:
+            self.size -= item[1]
+
+    def clear(self):
+        self._entries.clear()
+        self.size = 0
+
+
+class ResponseCache:
+    """
+    Redis backed response cache with stale-while-revalidate and stale-if-error.
+
+    Every entry carries a soft TTL and is kept in Redis for a longer hard TTL.
+    Past the soft TTL the stale value is served immediately while a refresh
+    runs in the background. A refresh that fails leaves the last known good
+    value in place until the hard TTL.
+
+    An optional in-process `MemoryCache` sits in front of Redis, kept
+    coherent across workers through a pub/sub invalidation channel, and keeps
+    serving while Redis is unreachable.
+    """
+
+    INVALIDATION_CHANNEL = "cache_invalidation"
+
+    def __init__(
+            self,
+            redis_client: Optional[redis.Redis],
+            single_flight: SingleFlight,
+            soft_ttl: int,
+            hard_ttl: int,
+            memory: Optional[MemoryCache] = None,
+            redis_retry_interval: float = 5.0,
+            codec: Optional[CacheCodec] = None
+    ):
+        """
+        Args:
+            redis_client: Redis client, or None to disable the shared cache
+            single_flight: Coalesces concurrent computations of the same key
+            soft_ttl (int): Seconds an entry is served without a refresh
+            hard_ttl (int): Seconds an entry is kept in Redis
+            memory: In-process tier checked before Redis
+            redis_retry_interval (float): Seconds to skip Redis after an error
+            codec: Encodes entries stored in Redis, JSON by default
+        """
+        self.redis_client = redis_client
+        self.single_flight = single_flight
+        self.soft_ttl = soft_ttl
+        self.hard_ttl = max(hard_ttl, soft_ttl)
+        self.memory = memory
+        self.redis_retry_interval = redis_retry_interval
+        self.codec = codec or CacheCodec()
+        self.node_id = uuid.uuid4().hex
+        self._redis_down_until = 0.0
+        self._refreshes = set()
+
+    @property
+    def redis_available(self) -> bool:
+        return self.redis_client is not None and time.monotonic() >= self._redis_down_until
+
+    def _redis_failed(self, error: Exception):
+        print(f"Redis unavailable, serving from memory: {str(error)}")
+        self._redis_down_until = time.monotonic() + self.redis_retry_interval
+
+    def _memory_fallback(self, key: str) -> Optional[CacheEntry]:
+        if self.memory is None:
+            return None
+        return self.memory.get(key, allow_expired=True)
+
+    def _decode(self, cached_response) -> CacheEntry:
+        info = self.codec.info(cached_response)
+        if info.fresh_until is not None:
+            return CacheEntry(
+                fresh_until=info.fresh_until,
+                etag=info.etag,
+                load=lambda: self.codec.decode(cached_response)
+            )
+
+        # Entries written before soft TTLs existed hold the bare JSON value
+        # and are considered fresh until they expire
+        return CacheEntry(self.codec.decode(cached_response), float("inf"))
+
+    async def get(self, key: str, use_memory: bool = True) -> Optional[CacheEntry]:
+        """Read an entry regardless of its freshness, None on a miss. See `get_many` for `use_memory`."""
+        return (await self.get_many([key], use_memory))[0]
+
+    async def get_many(self, keys: List[str], use_memory: bool = True) -> List[Optional[CacheEntry]]:
+        """
+        Read several entries, answering what it can from memory and the rest
+        with a single Redis MGET
+
+        Args:
+            keys (list): Cache keys
+            use_memory (bool): Answer from memory. Read-modify-writes of
+                entries other processes rewrite pass False, as the memory
+                tier may lag behind Redis until its invalidation arrives.
+                Memory is still used while Redis is unavailable.
+
+        Returns:
+            list: Entries in the order of `keys`, None for misses
+        """
+        entries = [self.memory.get(key) if self.memory is not None and use_memory else None for key in keys]
+        missing = [i for i, entry in enumerate(entries) if entry is None]
+        if not missing:
+            return entries
+
+        if not self.redis_available:
+            for i in missing:
+                entries[i] = self._memory_fallback(keys[i])
+            return entries
+        try:
+            cached_responses = await self.redis_client.mget([keys[i] for i in missing])
+        except redis.RedisError as e:
+            self._redis_failed(e)
+            for i in missing:
+                entries[i] = self._memory_fallback(keys[i])
+            return entries
+
+        for i, cached_response in zip(missing, cached_responses):
+            if cached_response:
+                entries[i] = self._load(keys[i], cached_response)
+        return entries
+
+    def _load(self, key: str, cached_response) -> Optional[CacheEntry]:
+        """Decode a Redis payload and remember it in memory"""
+        try:
+            entry = self._decode(cached_response)
+        except (CodecError, ValueError) as e:
+            print(f"Ignoring undecodable cache entry {key}: {str(e)}")
+            return None
+        if self.memory is not None:
+            self.memory.set(key, entry, self.codec.info(cached_response).raw_size)
+        return entry
+
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None, soft_ttl: Optional[int] = None):
+        """
+        Store a value that stays fresh for the soft TTL
+
+        Args:
+            key (str): Cache key
+            value: JSON serializable value
+            ttl (int): Expire the entry after this many seconds instead of
+                using the soft and hard TTLs
+            soft_ttl (int): Refresh the entry after this many seconds instead
+                of the default soft TTL, keeping it until the hard TTL
+        """
+        if ttl is None and soft_ttl is not None:
+            fresh_until = time.time() + soft_ttl
+        else:
+            fresh_until = time.time() + (ttl if ttl is not None else self.soft_ttl)
+        encoded = self.codec.encode(value, fresh_until)
+        if self.memory is not None:
+            info = self.codec.info(encoded)
+            self.memory.set(key, CacheEntry(value, fresh_until, info.etag), info.raw_size)
+
+        if not self.redis_available:
+            return
+        try:
+            await self.redis_client.setex(name=key, value=encoded, time=ttl if ttl is not None else self.hard_ttl)
+            await self.redis_client.publish(self.INVALIDATION_CHANNEL, f"{self.node_id}:{key}")
+        except redis.RedisError as e:
+            self._redis_failed(e)
+
+    async def listen_for_invalidations(self):
+        """Drop memory entries that other workers rewrote; runs until cancelled"""
+        if self.redis_client is None or self.memory is None:
+            return
+        while True:
+            try:
+                async with self.redis_client.pubsub() as pubsub:
+                    await pubsub.subscribe(self.INVALIDATION_CHANNEL)
+                    while True:
+                        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                        if message is not None:
+                            self._handle_invalidation(message["data"])
+            except redis.RedisError as e:
+                print(f"Cache invalidation listener disconnected: {str(e)}")
+                # Entries may have changed while we were not listening
+                self.memory.clear()
+                await asyncio.sleep(self.redis_retry_interval)
+
+    def _handle_invalidation(self, data):
+        if isinstance(data, bytes):
+            data = data.decode()
+        origin, _, key = data.partition(":")
+        if origin != self.node_id:
+            self.memory.invalidate(key)
+
+    async def get_fresh(self, key: str) -> Any:
+        """Read a value only if it is within its soft TTL"""
+        entry = await self.get(key)
+        if entry is None or entry.is_stale:
+            return None
+        return entry.value
+
+    async def get_or_compute(
+            self,
+            key: str,
+            compute: Callable[[], Awaitable[Any]],
+            background_tasks: Optional[BackgroundTasks] = None,
+            use_cached: bool = True
+    ) -> Any:
+        """
+        Serve a value from the cache, computing it on a miss
+
+        Args:
+            key (str): Cache key
+            compute: Coroutine function producing the value and storing it
+                with `set`. It must raise on upstream failures so an error is
+                never cached over a good value.
+            background_tasks: Runs the refresh of a stale entry after the
+                response is sent. Without it the refresh is a detached task.
+            use_cached (bool): Skip the cache read and always compute
+
+        Returns:
+            The cached or computed value
+        """
+        return (await self.get_or_compute_entry(key, compute, background_tasks, use_cached)).value
+
+    async def get_or_compute_entry(
+            self,
+            key: str,
+            compute: Callable[[], Awaitable[Any]],
+            background_tasks: Optional[BackgroundTasks] = None,
+            use_cached: bool = True
+    ) -> CacheEntry:
+        """Like `get_or_compute`, but return the entry so its ETag can be checked"""
+        entry = await self.get(key) if use_cached else None
+        return await self.resolve_entry(key, entry, compute, background_tasks)
+
+    async def resolve(
+            self,
+            key: str,
+            entry: Optional[CacheEntry],
+            compute: Callable[[], Awaitable[Any]],
+            background_tasks: Optional[BackgroundTasks] = None
+    ) -> Any:
+        """
+        Serve an already read entry, or compute the value if there is none.
+        Takes the same arguments as `get_or_compute`, plus `entry` as
+        returned by `get` or `get_many`.
+        """
+        return (await self.resolve_entry(key, entry, compute, background_tasks)).value
+
+    async def resolve_entry(
+            self,
+            key: str,
+            entry: Optional[CacheEntry],
+            compute: Callable[[], Awaitable[Any]],
+            background_tasks: Optional[BackgroundTasks] = None
+    ) -> CacheEntry:
+        """Like `resolve`, but return the entry so its ETag can be checked"""
+        if entry is not None:
+            if entry.is_stale:
+                observe_cache(key, "stale")
+                self._schedule_refresh(key, compute, background_tasks)
+            else:
+                observe_cache(key, "hit")
+            return entry
+
+        observe_cache(key, "miss")
+        try:
+            value = await self._compute(key, compute)
+        except Exception as e:
+            # Serve the last known good value while upstream is failing
+            entry = await self.get(key)
+            if entry is None:
+                raise
+            print(f"Serving stale {key} after refresh failure: {str(e)}")
+            return entry
+        # The computation stored the value, possibly with a shorter soft TTL.
+        # The ETag is the stored payload's, which clients revalidate against
+        # later; it can differ from the returned value (e.g. its `cached` flag).
+        stored = self.memory.get(key) if self.memory is not None else None
+        if stored is None and self.redis_available:
+            stored = await self.get(key)
+        if stored is None:
+            return CacheEntry(value, time.time() + self.soft_ttl, self.codec.etag(value))
+        return CacheEntry(value, stored.fresh_until, stored.etag)
+
+    async def _compute(self, key, compute):
+        return await self.single_flight.do(
+            key, compute, lambda: self.get_fresh(key), use_lease=self.redis_available
+        )
+
+    def _schedule_refresh(self, key, compute, background_tasks):
+        if self.single_flight.in_flight(key):
+            return
+        if background_tasks is not None:
+            background_tasks.add_task(self.refresh, key, compute)
+        else:
+            task = asyncio.ensure_future(self.refresh(key, compute))
+            self._refreshes.add(task)
+            task.add_done_callback(self._refreshes.discard)
+
+    async def refresh(self, key: str, compute: Callable[[], Awaitable[Any]]):
+        """Recompute a stale entry, keeping the stale value if that fails"""
+        try:
+            await self._compute(key, compute)
+        except Exception as e:
+            print(f"Background refresh of {key} failed: {str(e)}")
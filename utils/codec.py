@@ -0,0 +1,249 @@
+import hashlib
+import json
+import math
+import struct
+import zlib
+from typing import Any, NamedTuple, Optional
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+
+class CodecError(ValueError):
+    """Raised when a cached payload cannot be decoded"""
+
+
+def _json_default(value):
+    """Serialize numpy scalars (e.g. project scores) as plain numbers"""
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class PayloadInfo(NamedTuple):
+    """Metadata read from a payload header without decoding the body"""
+    raw_size: int
+    fresh_until: Optional[float]
+    etag: Optional[str]
+
+
+class JsonSerializer:
+    id = 1
+    name = "json"
+
+    @staticmethod
+    def dumps(value: Any) -> bytes:
+        return json.dumps(value, separators=(",", ":"), default=_json_default).encode()
+
+    @staticmethod
+    def loads(data: bytes) -> Any:
+        return json.loads(data)
+
+
+class OrjsonSerializer:
+    id = 2
+    name = "orjson"
+
+    @staticmethod
+    def dumps(value: Any) -> bytes:
+        return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY)
+
+    @staticmethod
+    def loads(data: bytes) -> Any:
+        return orjson.loads(data)
+
+
+class MsgpackSerializer:
+    id = 3
+    name = "msgpack"
+
+    @staticmethod
+    def dumps(value: Any) -> bytes:
+        return msgpack.packb(value, default=_json_default)
+
+    @staticmethod
+    def loads(data: bytes) -> Any:
+        return msgpack.unpackb(data)
+
+
+class NoCompression:
+    id = 0
+    name = "none"
+
+    @staticmethod
+    def compress(data: bytes) -> bytes:
+        return data
+
+    @staticmethod
+    def decompress(data: bytes) -> bytes:
+        return data
+
+
+class ZlibCompression:
+    id = 1
+    name = "zlib"
+
+    @staticmethod
+    def compress(data: bytes) -> bytes:
+        return zlib.compress(data, 6)
+
+    @staticmethod
+    def decompress(data: bytes) -> bytes:
+        return zlib.decompress(data)
+
+
+class ZstdCompression:
+    id = 2
+    name = "zstd"
+    # Contexts are reused; the event loop never uses them concurrently
+    _compressor = zstandard.ZstdCompressor(level=3) if zstandard else None
+    _decompressor = zstandard.ZstdDecompressor() if zstandard else None
+
+    @classmethod
+    def compress(cls, data: bytes) -> bytes:
+        return cls._compressor.compress(data)
+
+    @classmethod
+    def decompress(cls, data: bytes) -> bytes:
+        return cls._decompressor.decompress(data)
+
+
+SERIALIZERS = {
+    serializer.name: serializer
+    for serializer, module in (
+        (JsonSerializer, json),
+        (OrjsonSerializer, orjson),
+        (MsgpackSerializer, msgpack),
+    )
+    if module is not None
+}
+COMPRESSIONS = {
+    compression.name: compression
+    for compression, module in (
+        (NoCompression, zlib),
+        (ZlibCompression, zlib),
+        (ZstdCompression, zstandard),
+    )
+    if module is not None
+}
+_SERIALIZERS_BY_ID = {serializer.id: serializer for serializer in SERIALIZERS.values()}
+_COMPRESSIONS_BY_ID = {compression.id: compression for compression in COMPRESSIONS.values()}
+
+
+class CacheCodec:
+    """
+    Encode cache values into compact, self-describing bytes.
+
+    Every payload starts with a 32 byte header: a magic byte, the format
+    version, the serializer and compression ids, the uncompressed length, the
+    time until which the value is fresh and a content hash of the serialized
+    value. Decoding dispatches on the header, so entries written with a
+    different codec configuration (or plain JSON from before the header
+    existed) stay readable. The freshness and content hash are available
+    through `info` without decoding the body.
+    """
+
+    MAGIC = 0xDB
+    VERSION = 2
+    HEADER = struct.Struct(">BBBBId16s")
+
+    def __init__(self, serializer: str = "json", compression: str = "none", compress_threshold: int = 1024):
+        """
+        Args:
+            serializer (str): One of `SERIALIZERS`
+            compression (str): One of `COMPRESSIONS`
+            compress_threshold (int): Only compress payloads of at least this many bytes
+        """
+        if serializer not in SERIALIZERS:
+            raise ValueError(f"Unknown or unavailable cache serializer: '{serializer}'")
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown or unavailable cache compression: '{compression}'")
+        self.serializer = SERIALIZERS[serializer]
+        self.compression = COMPRESSIONS[compression]
+        self.compress_threshold = compress_threshold
+
+    @property
+    def name(self) -> str:
+        return f"{self.serializer.name}+{self.compression.name}"
+
+    @staticmethod
+    def _digest(raw: bytes) -> bytes:
+        return hashlib.blake2b(raw, digest_size=16).digest()
+
+    def etag(self, value: Any) -> str:
+        """Content hash of a value, as stored in the header of its payload"""
+        return self._digest(self.serializer.dumps(value)).hex()
+
+    def encode(self, value: Any, fresh_until: float = math.inf) -> bytes:
+        """
+        Serialize and, above the threshold, compress a value
+
+        Args:
+            value: Value to encode
+            fresh_until (float): Timestamp stored in the header, see `info`
+        """
+        raw = self.serializer.dumps(value)
+        compression = self.compression if len(raw) >= self.compress_threshold else NoCompression
+        header = self.HEADER.pack(
+            self.MAGIC, self.VERSION, self.serializer.id, compression.id, len(raw), fresh_until, self._digest(raw)
+        )
+        return header + compression.compress(raw)
+
+    def decode(self, data: bytes) -> Any:
+        """Decode a payload written by any codec configuration"""
+        if isinstance(data, str):
+            data = data.encode()
+        if not data or data[0] != self.MAGIC:
+            # Plain JSON written before payloads carried a header
+            return json.loads(data)
+
+        _, _, serializer_id, compression_id, *_ = self._read_header(data)
+        serializer, compression = self._lookup(serializer_id, compression_id)
+        return serializer.loads(compression.decompress(data[self.HEADER.size:]))
+
+    def info(self, data: bytes) -> PayloadInfo:
+        """
+        Read a payload's metadata from its header only. Plain JSON payloads
+        have no freshness or hash.
+        """
+        if not data or data[0] != self.MAGIC:
+            return PayloadInfo(len(data), None, None)
+        fields = self._read_header(data)
+        self._lookup(fields[2], fields[3])
+        return PayloadInfo(fields[4], fields[5], fields[6].hex())
+
+    def raw_size(self, data: bytes) -> int:
+        """Uncompressed size of a payload, read from its header"""
+        return self.info(data).raw_size
+
+    def _read_header(self, data: bytes):
+        if len(data) < 2:
+            raise CodecError("Truncated cache payload")
+        if data[1] != self.VERSION:
+            raise CodecError(f"Unsupported cache payload version: {data[1]}")
+        if len(data) < self.HEADER.size:
+            raise CodecError("Truncated cache payload")
+        return self.HEADER.unpack_from(data)
+
+    @staticmethod
+    def _lookup(serializer_id: int, compression_id: int):
+        try:
+            return _SERIALIZERS_BY_ID[serializer_id], _COMPRESSIONS_BY_ID[compression_id]
+        except KeyError:
+            raise CodecError(
+                f"Cache payload needs unavailable serializer {serializer_id} or compression {compression_id}"
+            )
@@ -0,0 +1,275 @@
+import base64
+import hashlib
+import json
+import os
+import time
+from typing import List, NamedTuple, Optional, Tuple
+
+import httpx
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from config.settings import Settings
+from utils.metrics import observe_cache
+from utils.rate_limit import github_tokens
+
+# Response headers stored with a body; the rate limit headers come from the 304
+STORED_HEADERS = ("content-type", "etag", "last-modified", "link")
+KEY_PREFIX = "github_rest:"
+
+
+class StoredResponse(NamedTuple):
+    """A GET response body and the validators to revalidate it with"""
+    etag: Optional[str]
+    last_modified: Optional[str]
+    headers: List[Tuple[str, str]]
+    body: bytes
+
+    def dumps(self) -> bytes:
+        record = self._asdict()
+        record["body"] = base64.b64encode(self.body).decode("ascii")
+        return json.dumps(record, separators=(",", ":")).encode()
+
+    @classmethod
+    def loads(cls, data: bytes) -> "StoredResponse":
+        record = json.loads(data)
+        record["body"] = base64.b64decode(record["body"])
+        record["headers"] = [tuple(header) for header in record["headers"]]
+        return cls(**record)
+
+
+def cache_key(url: str, authorization: Optional[str]) -> str:
+    """
+    Key of a GET response, per URL and credential scope.
+
+    GitHub's responses vary with the token (`Vary: Authorization`), but a
+    public resource reads the same with any token of `github_tokens`, so
+    those share one entry whichever token the request was leased. Other
+    tokens, and the `/user` resources of a token's own account, are keyed
+    per token.
+    """
+    path = httpx.URL(url).path
+    if not authorization:
+        scope = "anonymous"
+    elif github_tokens.token_of(authorization) is not None and not (path.endswith("/user") or "/user/" in path):
+        scope = "authenticated"
+    else:
+        scope = hashlib.sha256(authorization.encode()).hexdigest()[:16]
+    return KEY_PREFIX + hashlib.sha256(f"{scope} {url}".encode()).hexdigest()
+
+
+def conditional_headers(stored: StoredResponse) -> dict:
+    """If-None-Match and If-Modified-Since headers revalidating a stored response"""
+    headers = {}
+    if stored.etag:
+        headers["If-None-Match"] = stored.etag
+    if stored.last_modified:
+        headers["If-Modified-Since"] = stored.last_modified
+    return headers
+
+
+def stored_response(headers, body: bytes) -> Optional[StoredResponse]:
+    """The response to store, None when it has no validators to revalidate it with"""
+    etag, last_modified = headers.get("etag"), headers.get("last-modified")
+    if not isinstance(etag, str) and not isinstance(last_modified, str):
+        return None
+    kept = [(name.lower(), value) for name, value in headers.items() if name.lower() in STORED_HEADERS]
+    return StoredResponse(
+        etag if isinstance(etag, str) else None,
+        last_modified if isinstance(last_modified, str) else None,
+        kept,
+        body
+    )
+
+
+def revalidated_headers(stored: StoredResponse, not_modified_headers) -> List[Tuple[str, str]]:
+    """Headers of a stored response served after a 304, with the 304's rate limit headers"""
+    fresh = [(name.lower(), value) for name, value in not_modified_headers.items()
+             if name.lower().startswith("x-ratelimit-")]
+    return stored.headers + fresh
+
+
+class DiskResponseStore:
+    """Stored responses as files of a local directory, e.g. kept between scheduled runs"""
+
+    def __init__(self, directory: str, ttl: int):
+        self.directory = directory
+        self.ttl = ttl
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key.replace(":", "-"))
+
+    def load(self, key: str) -> Optional[StoredResponse]:
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                return None
+            with open(path, "rb") as f:
+                return StoredResponse.loads(f.read())
+        except (OSError, ValueError) as e:
+            if not isinstance(e, FileNotFoundError):
+                print(f"Failed to read stored response {path}: {str(e)}")
+            return None
+
+    def save(self, key: str, stored: StoredResponse):
+        path = self._path(key)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # Written aside and renamed, so concurrent readers never see a partial file
+            temporary = f"{path}.{os.getpid()}.tmp"
+            with open(temporary, "wb") as f:
+                f.write(stored.dumps())
+            os.replace(temporary, path)
+        except OSError as e:
+            print(f"Failed to store response {path}: {str(e)}")
+
+    async def get(self, key: str) -> Optional[StoredResponse]:
+        return self.load(key)
+
+    async def set(self, key: str, stored: StoredResponse):
+        self.save(key, stored)
+
+
+class RedisResponseStore:
+    """Stored responses in Redis, shared by every worker. Unavailable Redis is skipped for a while."""
+
+    def __init__(self, redis_client, ttl: int):
+        self.redis = redis_client
+        self.ttl = ttl
+        self._retry_at = 0.0
+
+    async def get(self, key: str) -> Optional[StoredResponse]:
+        if time.monotonic() < self._retry_at:
+            return None
+        try:
+            data = await self.redis.get(key)
+            return StoredResponse.loads(data) if data is not None else None
+        except Exception as e:
+            self._unavailable(e)
+            return None
+
+    async def set(self, key: str, stored: StoredResponse):
+        if time.monotonic() < self._retry_at:
+            return
+        try:
+            await self.redis.set(key, stored.dumps(), ex=self.ttl)
+        except Exception as e:
+            self._unavailable(e)
+
+    def _unavailable(self, error: Exception):
+        print(f"GitHub response store unavailable: {str(error)}")
+        self._retry_at = time.monotonic() + Settings.REDIS_RETRY_INTERVAL
+
+
+def response_store(redis_client=None):
+    """
+    Store of the `GITHUB_REST_CACHE` backend: "redis" (needs `redis_client`),
+    "disk" or "off"
+
+    Returns:
+        Store, None when conditional requests are off
+    """
+    if Settings.GITHUB_REST_CACHE == "redis" and redis_client is not None:
+        return RedisResponseStore(redis_client, Settings.GITHUB_REST_CACHE_TTL)
+    if Settings.GITHUB_REST_CACHE == "disk":
+        return DiskResponseStore(Settings.GITHUB_REST_CACHE_DIR, Settings.GITHUB_REST_CACHE_TTL)
+    return None
+
+
+class ConditionalCacheTransport(httpx.AsyncBaseTransport):
+    """
+    Transport revalidating stored GET responses with If-None-Match and
+    If-Modified-Since. A 304 is served as the stored 200; GitHub does not
+    count 304s against the REST rate limit.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, store):
+        """
+        Args:
+            transport (httpx.AsyncBaseTransport): Transport doing the requests
+            store: `RedisResponseStore` or `DiskResponseStore`
+        """
+        self.transport = transport
+        self.store = store
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method != "GET" or "if-none-match" in request.headers:
+            return await self.transport.handle_async_request(request)
+
+        key = cache_key(str(request.url), request.headers.get("authorization"))
+        stored = await self.store.get(key)
+        if stored is not None:
+            request.headers.update(conditional_headers(stored))
+        response = await self.transport.handle_async_request(request)
+
+        if response.status_code == 304 and stored is not None:
+            await response.aclose()
+            observe_cache(key, "hit")
+            return httpx.Response(200, headers=revalidated_headers(stored, response.headers), content=stored.body)
+        observe_cache(key, "miss")
+        if response.status_code != 200:
+            return response
+        try:
+            body = await response.aread()
+        finally:
+            await response.aclose()
+        fresh = stored_response(response.headers, body)
+        if fresh is not None:
+            await self.store.set(key, fresh)
+        # Decoded body, so the encoding headers no longer apply
+        headers = [(name, value) for name, value in response.headers.multi_items()
+                   if name.lower() not in ("content-encoding", "content-length", "transfer-encoding")]
+        return httpx.Response(200, headers=headers, content=body)
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+_sync_store = None
+
+
+def sync_response_store():
+    """Store of the blocking `get`, only the disk backend has one"""
+    global _sync_store
+    if _sync_store is None and Settings.GITHUB_REST_CACHE == "disk":
+        _sync_store = response_store()
+    return _sync_store
+
+
+def get(url: str, headers: Optional[dict] = None, **kwargs) -> requests.Response:
+    """
+    `requests.get` revalidating stored responses, see `ConditionalCacheTransport`.
+    Only the disk backend stores responses of blocking requests. The rate
+    limit headers of every response are recorded against the request's token.
+    """
+    headers = dict(headers or {})
+    authorization = headers.get("Authorization")
+    store = sync_response_store()
+    if store is None:
+        response = requests.get(url, headers=headers, **kwargs)
+        github_tokens.record_authorized(authorization, github_tokens.resource_for(httpx.URL(url)), response)
+        return response
+
+    key = cache_key(requests.Request("GET", url, params=kwargs.get("params")).prepare().url, authorization)
+    stored = store.load(key)
+    if stored is not None:
+        headers.update(conditional_headers(stored))
+    response = requests.get(url, headers=headers, **kwargs)
+    github_tokens.record_authorized(authorization, github_tokens.resource_for(httpx.URL(url)), response)
+
+    if response.status_code == 304 and stored is not None:
+        observe_cache(key, "hit")
+        cached = requests.Response()
+        cached.status_code = 200
+        cached.reason = "OK"
+        cached.url = response.url
+        cached.headers = CaseInsensitiveDict(revalidated_headers(stored, response.headers))
+        cached._content = stored.body
+        cached.encoding = "utf-8"
+        return cached
+    observe_cache(key, "miss")
+    if response.status_code == 200:
+        fresh = stored_response(response.headers, response.content)
+        if fresh is not None:
+            store.save(key, fresh)
+    return response
@@ -0,0 +1,143 @@
+import hashlib
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import requests
+
+# String literals are kept as they are, everything between them is minified
+STRING_PATTERN = re.compile(r'"(?:[^"\\]|\\.)*"')
+COMMENT_PATTERN = re.compile(r"#[^\n]*")
+# Commas are insignificant in GraphQL, like whitespace
+SEPARATOR_PATTERN = re.compile(r"[\s,]+")
+PUNCTUATOR_PATTERN = re.compile(r" ?(\.\.\.|[{}()\[\]:!$=@]) ?")
+PERSISTED_QUERY_MISSES = (b"PersistedQueryNotFound", b"PERSISTED_QUERY_NOT_FOUND")
+
+
+def normalize_document(document: str) -> str:
+    """
+    Minify a GraphQL document: drop comments, commas and every space that
+    does not separate two names. Equivalent documents normalize alike, so
+    they share a persisted query hash.
+    """
+    parts = []
+    position = 0
+    for string in STRING_PATTERN.finditer(document):
+        parts += [_minify(document[position:string.start()]), string.group()]
+        position = string.end()
+    parts.append(_minify(document[position:]))
+    return "".join(parts).strip()
+
+
+def _minify(text: str) -> str:
+    text = SEPARATOR_PATTERN.sub(" ", COMMENT_PATTERN.sub("", text))
+    return PUNCTUATOR_PATTERN.sub(r"\1", text)
+
+
+class Fragment(NamedTuple):
+    """A named GraphQL fragment, and the operation variables its selection uses"""
+    name: str
+    type_condition: str
+    selection: str
+    variables: Tuple[Tuple[str, str], ...] = ()  # (name, type), e.g. ("from", "DateTime!")
+    fragments: Tuple["Fragment", ...] = ()  # fragments spread in the selection
+
+    @property
+    def spread(self) -> str:
+        return f"...{self.name}"
+
+    @property
+    def definition(self) -> str:
+        return f"fragment {self.name} on {self.type_condition} {{{self.selection}}}"
+
+
+def collect_fragments(fragments: Iterable[Fragment]) -> List[Fragment]:
+    """The fragments and every fragment they spread, each once"""
+    collected = {}
+    pending = list(fragments)
+    while pending:
+        fragment = pending.pop()
+        if fragment.name not in collected:
+            collected[fragment.name] = fragment
+            pending += fragment.fragments
+    return sorted(collected.values(), key=lambda fragment: fragment.name)
+
+
+def variable_definitions(variables: Iterable[Tuple[str, str]], fragments: Iterable[Fragment] = ()) -> str:
+    """`($name: Type, ...)` of an operation, with the variables its fragments use"""
+    definitions = dict(variables)
+    for fragment in collect_fragments(fragments):
+        definitions.update(fragment.variables)
+    if not definitions:
+        return ""
+    return "(" + ", ".join(f"${name}: {type_}" for name, type_ in definitions.items()) + ")"
+
+
+class Query:
+    """
+    A GraphQL operation, normalized once with the fragments it uses. Values
+    are passed as variables, so one document serves every request.
+    """
+
+    def __init__(self, document: str, fragments: Iterable[Fragment] = ()):
+        """
+        Args:
+            document (str): The operation
+            fragments: Fragments spread in the operation, the ones they
+                spread themselves are added
+        """
+        definitions = [fragment.definition for fragment in collect_fragments(fragments)]
+        self.document = normalize_document(" ".join([document, *definitions]))
+        self.sha256 = hashlib.sha256(self.document.encode()).hexdigest()
+
+    def payload(self, variables: Optional[Dict] = None, persisted: bool = False, register: bool = False) -> Dict:
+        """
+        Request body of the query
+
+        Args:
+            variables (dict): Values of the operation variables
+            persisted (bool): Send the document's hash instead of the document,
+                the automatic persisted queries protocol
+            register (bool): Send both, so the server stores the document
+                under its hash after a persisted query miss
+        """
+        payload = {"variables": variables or {}}
+        if not persisted or register:
+            payload["query"] = self.document
+        if persisted:
+            payload["extensions"] = {"persistedQuery": {"version": 1, "sha256Hash": self.sha256}}
+        return payload
+
+
+def is_persisted_query_miss(status_code: int, content: bytes) -> bool:
+    """Whether the server does not know a persisted query's hash yet"""
+    return status_code in (200, 400) and any(miss in content for miss in PERSISTED_QUERY_MISSES)
+
+
+async def post_query_async(client, url: str, query: Query, variables: Optional[Dict] = None,
+                           persisted: bool = False, **kwargs):
+    """
+    POST a query with an httpx.AsyncClient, by hash when `persisted`. A hash
+    the server does not know is sent again with its document.
+
+    Returns:
+        httpx.Response: Response of the last request
+    """
+    if persisted:
+        response = await client.post(url, json=query.payload(variables, persisted=True), **kwargs)
+        if not is_persisted_query_miss(response.status_code, response.content):
+            return response
+    return await client.post(url, json=query.payload(variables, persisted, register=persisted), **kwargs)
+
+
+def post_query(url: str, query: Query, variables: Optional[Dict] = None, persisted: bool = False, **kwargs):
+    """
+    Blocking variant of `post_query_async`, with requests
+
+    Returns:
+        requests.Response: Response of the last request
+    """
+    if persisted:
+        response = requests.post(url, json=query.payload(variables, persisted=True), **kwargs)
+        if not is_persisted_query_miss(response.status_code, response.content):
+            return response
+    return requests.post(url, json=query.payload(variables, persisted, register=persisted), **kwargs)
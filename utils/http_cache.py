@@ -0,0 +1,75 @@
+import hashlib
+import time
+from typing import Iterable, Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from config.settings import Settings
+from utils.cache import CacheEntry
+from utils.codec import JsonSerializer
+
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    """
+    Check an If-None-Match header against an ETag, using the weak comparison
+    RFC 9110 prescribes for it
+
+    Args:
+        if_none_match (str): Header value, a list of ETags or `*`
+        etag (str): Unquoted ETag of the current representation
+
+    Returns:
+        bool: Whether the client's copy is current
+    """
+    if not if_none_match or not etag:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate.strip('"') == etag:
+            return True
+    return False
+
+
+def combine_etags(etags: Iterable[Optional[str]]) -> Optional[str]:
+    """ETag of a document assembled from parts, None if any part has none"""
+    etags = list(etags)
+    if any(etag is None for etag in etags):
+        return None
+    return hashlib.blake2b(",".join(etags).encode(), digest_size=16).hexdigest()
+
+
+def cache_headers(etag: Optional[str], fresh_until: float) -> dict:
+    """
+    ETag and Cache-Control headers; clients revalidate once the entry goes stale.
+
+    The ETag is weak: it is the stored payload's, while the response that
+    computed the entry differs from it in its `cached` flag.
+    """
+    max_age = max(0, min(Settings.HTTP_CACHE_MAX_AGE, int(fresh_until - time.time())))
+    headers = {"Cache-Control": f"public, max-age={max_age}"}
+    if etag is not None:
+        headers["ETag"] = f'W/"{etag}"'
+    return headers
+
+
+def cached_response(request: Request, entry: CacheEntry) -> Response:
+    """
+    Render a cache entry as JSON, or as 304 Not Modified when the client
+    already holds it. The 304 path neither decodes nor serializes the value.
+
+    Args:
+        request (Request): Incoming request
+        entry (CacheEntry): Entry served for the request
+
+    Returns:
+        Response: 200 with the JSON body, or an empty 304
+    """
+    headers = cache_headers(entry.etag, entry.fresh_until)
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(JsonSerializer.dumps(entry.value), media_type="application/json", headers=headers)
@@ -0,0 +1,156 @@
+import importlib.util
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Iterator, Optional
+
+import httpx
+from groq import DefaultAsyncHttpxClient
+
+from config.settings import Settings
+from utils.conditional_cache import ConditionalCacheTransport
+from utils.metrics import UPSTREAM_EVENT_HOOKS
+from utils.rate_limit import github_auth
+
+# HTTP/2 needs the optional h2 package (httpx[http2]); without it GitHub is reached over HTTP/1.1
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+UPSTREAM_TIMEOUT = httpx.Timeout(
+    connect=10.0,
+    read=30.0,
+    write=10.0,
+    pool=10.0
+)
+
+# Transport under every upstream client when set, see `upstream_transport`
+_transport: Optional[httpx.AsyncBaseTransport] = None
+
+
+def upstream_limits() -> httpx.Limits:
+    """Connection pool limits of each shared upstream client"""
+    return httpx.Limits(
+        max_connections=Settings.UPSTREAM_MAX_CONNECTIONS,
+        max_keepalive_connections=Settings.UPSTREAM_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=Settings.UPSTREAM_KEEPALIVE_EXPIRY
+    )
+
+
+@contextmanager
+def upstream_transport(transport: httpx.AsyncBaseTransport) -> Iterator[httpx.AsyncBaseTransport]:
+    """
+    Send the upstream traffic of clients created in this block through `transport`,
+    e.g. a `utils.replay.ReplayTransport` to run the fetchers without network access
+
+    Covers the shared clients, the clients fetchers open without them and
+    the AI generator's default client. The sync `requests` paths are not covered.
+    """
+    global _transport
+    previous, _transport = _transport, transport
+    try:
+        yield transport
+    finally:
+        _transport = previous
+
+
+def transport_kwargs() -> dict:
+    """httpx client arguments routing the client through the `upstream_transport`, if any"""
+    return {"transport": _transport} if _transport is not None else {}
+
+
+class UpstreamClients:
+    """
+    Pooled keep-alive HTTP clients to the upstream APIs, created once per
+    worker by the API lifespan so requests reuse open connections instead
+    of paying for a TLS handshake on every call. Fetchers take one of these
+    clients as an optional argument and open a client of their own without it.
+    """
+
+    def __init__(self):
+        self.github: Optional[httpx.AsyncClient] = None
+        self.linkedin: Optional[httpx.AsyncClient] = None
+        self.groq: Optional[httpx.AsyncClient] = None
+        # Fetchers built on the shared clients
+        self.ai_generator = None
+        self.project_ranker = None
+        self.linkedin_fetcher = None
+        self.profile_batch_fetcher = None
+
+    async def start(self, github_store=None):
+        """
+        Open the clients; connections are established lazily on first use
+
+        Args:
+            github_store: Store of GitHub REST responses to revalidate, see
+                `utils.conditional_cache.response_store`
+        """
+        # Imported here, the fetchers import `use_client` from this module
+        from modules.ai_generator import AIDescriptionGenerator
+        from modules.github_fetcher import GitHubProfileBatchFetcher
+        from modules.github_projects import GitHubProjectRanker
+        from modules.linkedin_fetcher import LinkedInProfileFetcher
+
+        # Concurrent GraphQL and REST calls share one multiplexed connection
+        http2 = Settings.GITHUB_HTTP2 and HTTP2_AVAILABLE
+        github_transport = transport_kwargs()
+        if github_store is not None:
+            # The client's pool settings only apply to the transport it creates itself
+            github_transport = {"transport": ConditionalCacheTransport(
+                github_transport.get("transport") or httpx.AsyncHTTPTransport(http2=http2, limits=upstream_limits()),
+                github_store
+            )}
+        self.github = httpx.AsyncClient(
+            auth=github_auth,
+            timeout=UPSTREAM_TIMEOUT,
+            limits=upstream_limits(),
+            http2=http2,
+            event_hooks=UPSTREAM_EVENT_HOOKS,
+            **github_transport
+        )
+        self.linkedin = httpx.AsyncClient(
+            timeout=UPSTREAM_TIMEOUT,
+            limits=upstream_limits(),
+            event_hooks=UPSTREAM_EVENT_HOOKS,
+            **transport_kwargs()
+        )
+        # Groq's own client defaults (timeouts, redirects) with the shared pool limits
+        self.groq = DefaultAsyncHttpxClient(
+            limits=upstream_limits(),
+            event_hooks=UPSTREAM_EVENT_HOOKS,
+            **transport_kwargs()
+        )
+
+        self.project_ranker = GitHubProjectRanker(self.github)
+        # Shared so every bulk refresh benefits from the batch size it adapted to
+        self.profile_batch_fetcher = GitHubProfileBatchFetcher(self.github)
+        self.linkedin_fetcher = LinkedInProfileFetcher(self.linkedin)
+        try:
+            self.ai_generator = AIDescriptionGenerator(self.groq)
+        except Exception as e:
+            # Retried per AI job, see `api.main.enrich_github_profile`
+            print(f"Failed to create the AI description generator: {str(e)}")
+
+    async def close(self):
+        """Close every open client and its idle connections"""
+        self.ai_generator = self.project_ranker = self.linkedin_fetcher = self.profile_batch_fetcher = None
+        for name in ("github", "linkedin", "groq"):
+            client = getattr(self, name)
+            setattr(self, name, None)
+            if client is not None:
+                try:
+                    await client.aclose()
+                except Exception as e:
+                    print(f"Failed to close {name} client: {str(e)}")
+
+
+@asynccontextmanager
+async def use_client(client: Optional[httpx.AsyncClient], **kwargs) -> AsyncIterator[httpx.AsyncClient]:
+    """
+    Yield the shared `client`, or a client created from `kwargs` for this block only
+
+    Args:
+        client (httpx.AsyncClient): Shared client, None outside of the API
+        **kwargs: httpx.AsyncClient arguments of the fallback client
+    """
+    if client is not None:
+        yield client
+        return
+    async with httpx.AsyncClient(**transport_kwargs(), **kwargs) as own_client:
+        yield own_client
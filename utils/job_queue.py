@@ -0,0 +1,216 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import redis.asyncio as redis
+
+from utils.metrics import JOBS
+
+
+class JobQueue:
+    """
+    Queue of background jobs backed by a Redis list and drained by a pool of
+    async workers, which can run in the API process or in separate worker
+    processes (`python -m api.worker`).
+
+    A job is identified by a string, e.g. a username, and is queued at most
+    once until it finishes: an `active` key acts as its lock. It expires
+    after twice `job_timeout`, so a job lost with a crashed worker can be
+    queued again. Each job's last status is kept for `status_ttl` seconds.
+
+    Without Redis, or while it is unreachable, jobs run on an in-process
+    queue instead. After a Redis error, Redis is skipped for
+    `redis_retry_interval` seconds like in `ResponseCache`.
+    """
+
+    MAX_LOCAL_STATUSES = 10000
+
+    def __init__(
+            self,
+            redis_client: Optional[redis.Redis],
+            name: str,
+            handler: Callable[[str], Awaitable[Any]],
+            job_timeout: float = 300,
+            status_ttl: int = 3600,
+            poll_interval: float = 0.5,
+            redis_retry_interval: float = 5.0
+    ):
+        """
+        Args:
+            redis_client: Redis client, or None to queue jobs in process only
+            name (str): Redis key of the queue, and prefix of its job keys
+            handler: Coroutine function running a job given its id; it fails by raising
+            job_timeout (float): Seconds a job may run before it is cancelled
+            status_ttl (int): Seconds the status of a finished job is kept
+            poll_interval (float): Seconds a worker blocks on an empty queue. Must
+                stay below the Redis client's socket timeout.
+            redis_retry_interval (float): Seconds to skip Redis after an error
+        """
+        self.redis_client = redis_client
+        self.name = name
+        self.handler = handler
+        self.job_timeout = job_timeout
+        self.status_ttl = status_ttl
+        self.poll_interval = poll_interval
+        self.redis_retry_interval = redis_retry_interval
+        self._redis_down_until = 0.0
+        self._local_queue: asyncio.Queue = asyncio.Queue()
+        self._local_active = set()
+        self._local_statuses: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    @property
+    def redis_available(self) -> bool:
+        return self.redis_client is not None and time.monotonic() >= self._redis_down_until
+
+    def _redis_failed(self, error: Exception):
+        print(f"Job queue {self.name} running in process, Redis is unavailable: {str(error)}")
+        self._redis_down_until = time.monotonic() + self.redis_retry_interval
+
+    def _active_key(self, job_id: str) -> str:
+        return f"{self.name}:active:{job_id}"
+
+    def _status_key(self, job_id: str) -> str:
+        return f"{self.name}:status:{job_id}"
+
+    async def enqueue(self, job_id: str) -> bool:
+        """
+        Queue a job unless it is already queued or running
+
+        Args:
+            job_id (str): Job identifier passed to the handler
+
+        Returns:
+            bool: Whether the job was queued
+        """
+        if self.redis_available:
+            try:
+                if not await self.redis_client.set(self._active_key(job_id), "1", nx=True, ex=int(self.job_timeout) * 2):
+                    return False
+                await self._set_status(job_id, "queued")
+                await self.redis_client.lpush(self.name, job_id)
+                return True
+            except redis.RedisError as e:
+                self._redis_failed(e)
+
+        if job_id in self._local_active:
+            return False
+        self._local_active.add(job_id)
+        self._set_local_status(job_id, "queued")
+        self._local_queue.put_nowait(job_id)
+        return True
+
+    async def mark_queued(self, job_id: str):
+        """
+        Mark a job queued ahead of `enqueue`, unless it is already queued or
+        running, for callers publishing state the job's pollers react to in
+        between: the pollers then never take the previous run's status for
+        this one's.
+        """
+        status = await self.status(job_id)
+        if status is None or status["status"] in ("done", "failed"):
+            await self._set_status(job_id, "queued")
+
+    async def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Last known status of a job
+
+        Returns:
+            dict: `status` (queued, running, done or failed), `updated_at`
+                and, for failed jobs, `error`. None for unknown jobs.
+        """
+        if self.redis_available:
+            try:
+                data = await self.redis_client.get(self._status_key(job_id))
+                if data is not None:
+                    return json.loads(data)
+            except redis.RedisError as e:
+                self._redis_failed(e)
+        return self._local_statuses.get(job_id)
+
+    async def run(self, concurrency: int):
+        """Run `concurrency` workers until cancelled"""
+        await asyncio.gather(*(self._work() for _ in range(concurrency)))
+
+    async def _work(self):
+        while True:
+            job = await self._next_job()
+            if job is not None:
+                await self._run_job(*job)
+
+    async def _next_job(self) -> Optional[Tuple[str, bool]]:
+        """Next (job id, is local) to run, None after waiting without finding one"""
+        if not self._local_queue.empty():
+            return self._local_queue.get_nowait(), True
+        if self.redis_client is None:
+            return await self._local_queue.get(), True
+        if not self.redis_available:
+            return await self._next_local_job()
+
+        try:
+            item = await self.redis_client.brpop([self.name], timeout=self.poll_interval)
+        except redis.RedisError as e:
+            self._redis_failed(e)
+            return await self._next_local_job()
+        if item is None:
+            return None
+        job_id = item[1]
+        return (job_id.decode() if isinstance(job_id, bytes) else job_id), False
+
+    async def _next_local_job(self) -> Optional[Tuple[str, bool]]:
+        """Next in-process job, waiting at most until Redis is tried again"""
+        try:
+            timeout = max(self._redis_down_until - time.monotonic(), 0)
+            return await asyncio.wait_for(self._local_queue.get(), timeout), True
+        except asyncio.TimeoutError:
+            return None
+
+    async def _run_job(self, job_id: str, local: bool):
+        try:
+            await self._set_status(job_id, "running", local)
+            try:
+                await asyncio.wait_for(self.handler(job_id), self.job_timeout)
+            except Exception as e:
+                print(f"Job {self.name} {job_id} failed: {str(e)}")
+                JOBS.inc(self.name, "failed")
+                await self._set_status(job_id, "failed", local, error=str(e) or e.__class__.__name__)
+            else:
+                JOBS.inc(self.name, "done")
+                await self._set_status(job_id, "done", local)
+        finally:
+            await self._release(job_id, local)
+
+    async def _set_status(self, job_id: str, status: str, local: bool = False, error: Optional[str] = None):
+        if not local and self.redis_available:
+            try:
+                await self.redis_client.set(
+                    self._status_key(job_id), json.dumps(self._status(status, error)), ex=self.status_ttl
+                )
+                return
+            except redis.RedisError as e:
+                self._redis_failed(e)
+        self._set_local_status(job_id, status, error)
+
+    def _set_local_status(self, job_id: str, status: str, error: Optional[str] = None):
+        self._local_statuses.pop(job_id, None)
+        self._local_statuses[job_id] = self._status(status, error)
+        while len(self._local_statuses) > self.MAX_LOCAL_STATUSES:
+            self._local_statuses.popitem(last=False)
+
+    @staticmethod
+    def _status(status: str, error: Optional[str]) -> Dict[str, Any]:
+        data = {"status": status, "updated_at": time.time()}
+        if error is not None:
+            data["error"] = error
+        return data
+
+    async def _release(self, job_id: str, local: bool):
+        if local:
+            self._local_active.discard(job_id)
+            return
+        try:
+            await self.redis_client.delete(self._active_key(job_id))
+        except redis.RedisError as e:
+            # The lock expires on its own
+            print(f"Failed to release job {job_id}: {str(e)}")
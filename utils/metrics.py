@@ -0,0 +1,260 @@
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import httpx
+
+from config.settings import Settings
+from utils.tracing import current_stage, current_trace
+
+# Updates are plain dict and list operations without locks. The API runs
+# them on the event loop thread; the sync code paths only ever lose an
+# increment to a thread race, which is acceptable for monitoring.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames: Sequence[str], labelvalues: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Monotonic counter, one series per combination of label values"""
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, *labelvalues, amount: float = 1):
+        self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues) -> float:
+        return self._values.get(labelvalues, 0)
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labelvalues)} {value}"
+            for labelvalues, value in list(self._values.items())
+        ]
+
+
+class Gauge(Counter):
+    """Value that can go up and down, usually set at scrape time"""
+
+    type = "gauge"
+
+    def set(self, value: float, *labelvalues):
+        self._values[labelvalues] = value
+
+    def clear(self):
+        self._values = {}
+
+
+class Histogram:
+    """
+    Distribution of observed values over fixed buckets. Observing is one
+    bisect and three in-place updates; buckets are accumulated at scrape time.
+    """
+
+    type = "histogram"
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            labelnames: Sequence[str] = (),
+            buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (last is +Inf), sum, count]
+        self._series: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, *labelvalues):
+        series = self._series.get(labelvalues)
+        if series is None:
+            series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def count(self, *labelvalues) -> int:
+        series = self._series.get(labelvalues)
+        return series[2] if series else 0
+
+    def samples(self) -> List[str]:
+        lines = []
+        for labelvalues, (counts, total, count) in list(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, labelvalues, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, labelvalues)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Metrics rendered in the Prometheus text exposition format"""
+
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def on_collect(self, collector: Callable[[], None]):
+        """Run `collector` before every scrape, to set gauges read from elsewhere"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception as e:
+                print(f"Metrics collector failed: {str(e)}")
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+REQUEST_DURATION = REGISTRY.register(Histogram(
+    "devb_http_request_duration_seconds",
+    "Time to serve API requests, including streamed bodies",
+    ("method", "route", "status")
+))
+CACHE_REQUESTS = REGISTRY.register(Counter(
+    "devb_cache_requests_total",
+    "Response cache lookups by key family and result (hit, stale, miss)",
+    ("family", "result")
+))
+UPSTREAM_DURATION = REGISTRY.register(Histogram(
+    "devb_upstream_request_duration_seconds",
+    "Time to response headers of calls to upstream APIs",
+    ("target", "status")
+))
+JOBS = REGISTRY.register(Counter(
+    "devb_jobs_total",
+    "Background jobs run, by queue and result (done, failed)",
+    ("queue", "result")
+))
+RATE_LIMIT_REMAINING = REGISTRY.register(Gauge(
+    "devb_rate_limit_remaining",
+    "Requests or tokens left for each upstream credential, identified by position",
+    ("service", "credential", "resource")
+))
+
+# Host (and port) of the upstream APIs, anything else is labelled with its host
+UPSTREAM_TARGETS = {
+    httpx.URL(Settings.GITHUB_API_URL).netloc: "github",
+    httpx.URL(Settings.GROQ_BASE_URL or "https://api.groq.com").netloc: "groq",
+    httpx.URL(Settings.LINKEDIN_API_URL).netloc: "linkedin",
+}
+
+
+def upstream_target(url: httpx.URL) -> str:
+    """Metrics label of the upstream API a URL belongs to"""
+    target = UPSTREAM_TARGETS.get(url.netloc, url.host)
+    if target == "github":
+        return "github_graphql" if url.path.endswith("/graphql") else "github_rest"
+    return target
+
+
+def observe_cache(key: str, result: str):
+    """Count a cache lookup under the family of its key, the part before the first colon"""
+    CACHE_REQUESTS.inc(key.partition(":")[0], result)
+
+
+async def _start_upstream_timer(request: httpx.Request):
+    request.extensions["metrics_start"] = time.perf_counter()
+
+
+async def _observe_upstream_response(response: httpx.Response):
+    request = response.request
+    start = request.extensions.get("metrics_start")
+    if start is None:
+        return
+    target = upstream_target(request.url)
+    UPSTREAM_DURATION.observe(time.perf_counter() - start, target, str(response.status_code))
+
+    trace = current_trace()
+    if trace is not None:
+        # Callers read the whole body anyway; reading it here includes it in the stage
+        await response.aread()
+        stage = current_stage()
+        trace.add(
+            f"{stage}.{target}" if stage else target,
+            start,
+            response.status_code,
+            len(response.content),
+            f"{request.method} {request.url.path}"
+        )
+
+
+# Event hooks timing every call of an httpx.AsyncClient, and adding it to
+# the timeline of the request being served
+UPSTREAM_EVENT_HOOKS = {
+    "request": [_start_upstream_timer],
+    "response": [_observe_upstream_response],
+}
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording the latency of every request by route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUEST_DURATION.observe(
+                time.perf_counter() - start, scope["method"], self.route_label(scope), str(status[0])
+            )
+
+    @staticmethod
+    def route_label(scope) -> str:
+        """Path template of the matched route, keeping usernames out of the label values"""
+        route = scope.get("route")
+        if route is not None:
+            return route.path
+        # Plain Starlette routes (docs, openapi.json) have no path parameters
+        if "endpoint" in scope:
+            return scope["path"]
+        return "unmatched"
@@ -0,0 +1,465 @@
+import asyncio
+import re
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from config.settings import Settings
+from utils.metrics import RATE_LIMIT_REMAINING, REGISTRY
+
+
+class RateLimitBudget:
+    """What is left of one token's quota for one rate limit resource"""
+
+    __slots__ = ("limit", "remaining", "reset_at")
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.remaining = limit
+        self.reset_at = 0.0
+
+
+class GitHubTokenScheduler:
+    """
+    Lease GitHub API tokens by rate limit headroom.
+
+    GitHub meters the REST API (`core`), the search API and the GraphQL
+    point budget separately, so a budget is tracked per token and resource.
+    Every lease reserves one request against the leased budget and every
+    response overwrites it with the `X-RateLimit-*` headers GitHub sent, so
+    concurrent callers spread over the tokens and never pick one that is
+    known to be drained. When all of them are, `lease` parks the caller
+    until the earliest reset.
+    """
+
+    # Budgets assumed for tokens no response has been seen for yet
+    DEFAULT_LIMITS = {"core": 5000, "graphql": 5000, "search": 30}
+
+    def __init__(self, tokens: List[str], max_wait: float = 60.0, poll_interval: float = 1.0):
+        """
+        Args:
+            tokens (list): GitHub API tokens
+            max_wait (float): Longest time `lease` parks a caller; the
+                request is then sent with the least drained token
+            poll_interval (float): Seconds between budget checks while parked
+        """
+        self.tokens = tokens
+        self.max_wait = max_wait
+        self.poll_interval = poll_interval
+        self._budgets: Dict[Tuple[str, str], RateLimitBudget] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def resource_for(url: httpx.URL) -> str:
+        """Rate limit resource a GitHub API request is metered against"""
+        # Suffix and infix checks, so GitHub Enterprise's /api/v3 prefix works too
+        if url.path.endswith("/graphql"):
+            return "graphql"
+        if "/search/" in url.path:
+            return "search"
+        return "core"
+
+    def _budget(self, token: str, resource: str) -> RateLimitBudget:
+        budget = self._budgets.get((token, resource))
+        if budget is None:
+            budget = RateLimitBudget(self.DEFAULT_LIMITS.get(resource, self.DEFAULT_LIMITS["core"]))
+            self._budgets[(token, resource)] = budget
+        elif budget.reset_at and time.time() >= budget.reset_at:
+            budget.remaining = budget.limit
+            budget.reset_at = 0.0
+        return budget
+
+    def _best(self, resource: str) -> Tuple[str, RateLimitBudget]:
+        if not self.tokens:
+            raise ValueError("No GitHub API tokens configured")
+        return max(
+            ((token, self._budget(token, resource)) for token in self.tokens),
+            key=lambda item: item[1].remaining
+        )
+
+    def try_lease(self, resource: str = "core") -> Optional[str]:
+        """Lease the token with the most headroom, None if all are drained"""
+        with self._lock:
+            token, budget = self._best(resource)
+            if budget.remaining <= 0:
+                return None
+            budget.remaining -= 1
+            return token
+
+    def lease_nowait(self, resource: str = "core") -> str:
+        """Lease the token with the most headroom, even if all are drained"""
+        token = self.try_lease(resource)
+        if token is None:
+            with self._lock:
+                token, _ = self._best(resource)
+        return token
+
+    async def lease(self, resource: str = "core") -> str:
+        """
+        Lease the token with the most headroom, waiting for a reset while
+        all tokens are drained
+
+        Args:
+            resource (str): Rate limit resource, see `resource_for`
+
+        Returns:
+            str: GitHub API token
+        """
+        deadline = time.monotonic() + self.max_wait
+        parked = False
+        while True:
+            token = self.try_lease(resource)
+            if token is not None:
+                return token
+
+            wait = min(self.next_reset(resource) - time.time(), deadline - time.monotonic())
+            if wait <= 0:
+                return self.lease_nowait(resource)
+            if not parked:
+                print(f"All GitHub tokens are rate limited for {resource}, waiting up to {wait:.0f}s")
+                parked = True
+            await asyncio.sleep(min(wait, self.poll_interval))
+
+    def next_reset(self, resource: str = "core") -> float:
+        """Earliest time a drained token's budget for `resource` resets"""
+        with self._lock:
+            resets = [self._budget(token, resource).reset_at for token in self.tokens]
+        return min((reset_at for reset_at in resets if reset_at), default=time.time())
+
+    def record(self, token: str, resource: str, response):
+        """
+        Update a token's budget from the rate limit headers of a response
+
+        Args:
+            token (str): Token the request was sent with
+            resource (str): Resource the request was leased for, used when
+                the response does not name one
+            response: GitHub API response, `httpx.Response` or `requests.Response`
+        """
+        headers = response.headers
+        resource = headers.get("x-ratelimit-resource", resource)
+        with self._lock:
+            budget = self._budget(token, resource)
+            try:
+                if "x-ratelimit-limit" in headers:
+                    budget.limit = int(headers["x-ratelimit-limit"])
+                if "x-ratelimit-remaining" in headers:
+                    budget.remaining = int(headers["x-ratelimit-remaining"])
+                    budget.reset_at = float(headers.get("x-ratelimit-reset", budget.reset_at))
+                if response.status_code in (403, 429) and "retry-after" in headers:
+                    # Secondary rate limits only say how long to back off
+                    budget.remaining = 0
+                    budget.reset_at = time.time() + float(headers["retry-after"])
+            except ValueError:
+                print(f"Ignoring malformed GitHub rate limit headers: {dict(headers)}")
+
+    def record_authorized(self, authorization: Optional[str], resource: str, response):
+        """
+        `record` for a blocking request authorized with a leased token, given
+        its `Authorization` header value (e.g. "token ..." or "Bearer ...").
+        Requests without one of the scheduler's tokens are ignored.
+
+        Args:
+            authorization (str): Authorization header the request was sent with
+            resource (str): Resource the token was leased for
+            response: GitHub API response, `requests.Response` or `httpx.Response`
+        """
+        token = self.token_of(authorization)
+        if token is not None:
+            self.record(token, resource, response)
+
+    def token_of(self, authorization: Optional[str]) -> Optional[str]:
+        """The scheduler's token an `Authorization` header value carries, None for any other"""
+        token = (authorization or "").partition(" ")[2]
+        return token if token and token in self.tokens else None
+
+    def snapshot(self) -> Dict[Tuple[str, str], Tuple[int, int, float]]:
+        """(limit, remaining, reset_at) of every tracked budget, by (token, resource)"""
+        with self._lock:
+            return {
+                key: (budget.limit, budget.remaining, budget.reset_at)
+                for key, budget in self._budgets.items()
+            }
+
+
+class GitHubTokenAuth(httpx.Auth):
+    """httpx authentication that leases tokens from a `GitHubTokenScheduler`"""
+
+    def __init__(self, scheduler: GitHubTokenScheduler):
+        self.scheduler = scheduler
+
+    @staticmethod
+    def _authorize(request: httpx.Request, token: str, resource: str):
+        if token:
+            scheme = "Bearer" if resource == "graphql" else "token"
+            request.headers["Authorization"] = f"{scheme} {token}"
+
+    def sync_auth_flow(self, request: httpx.Request):
+        resource = self.scheduler.resource_for(request.url)
+        token = self.scheduler.lease_nowait(resource)
+        self._authorize(request, token, resource)
+        response = yield request
+        self.scheduler.record(token, resource, response)
+
+    async def async_auth_flow(self, request: httpx.Request):
+        resource = self.scheduler.resource_for(request.url)
+        token = await self.scheduler.lease(resource)
+        self._authorize(request, token, resource)
+        response = yield request
+        self.scheduler.record(token, resource, response)
+
+
+github_tokens = GitHubTokenScheduler(Settings._GITHUB_API_TOKENS, max_wait=Settings.GITHUB_TOKEN_MAX_WAIT)
+github_auth = GitHubTokenAuth(github_tokens)
+
+
+def parse_reset_duration(value: str) -> float:
+    """Parse a Groq reset duration such as '1m26.4s', '7.66s' or '120ms' into seconds"""
+    seconds = 0.0
+    for amount, unit in re.findall(r"([\d.]+)(ms|h|m|s)", value):
+        seconds += float(amount) * {"ms": 0.001, "s": 1, "m": 60, "h": 3600}[unit]
+    return seconds
+
+
+class GroqKeyLease:
+    """A key leased for one completion and the usage reserved against it"""
+
+    __slots__ = ("key", "usage")
+
+    def __init__(self, key: str, usage: list):
+        self.key = key
+        # [timestamp, tokens] entry of the key's usage window
+        self.usage = usage
+
+
+class GroqKeyBudget:
+    """Usage of one Groq key over the last minute, and what Groq last reported"""
+
+    __slots__ = (
+        "window", "remaining_tokens", "tokens_reset_at", "remaining_daily_requests", "daily_reset_at",
+        "cooldown_until"
+    )
+
+    def __init__(self):
+        self.window = deque()
+        # Tokens per minute left, until `tokens_reset_at`
+        self.remaining_tokens = None
+        self.tokens_reset_at = 0.0
+        # Requests per day left, until `daily_reset_at`
+        self.remaining_daily_requests = None
+        self.daily_reset_at = 0.0
+        self.cooldown_until = 0.0
+
+
+class GroqKeyPool:
+    """
+    Lease Groq API keys by requests-per-minute and tokens-per-minute headroom.
+
+    Each lease reserves one request and the estimated tokens of the prompt
+    in a one minute window of the key. The reservation is corrected with
+    the `usage` of the completion, and `x-ratelimit-remaining-tokens`
+    tightens the token budget until `x-ratelimit-reset-tokens`. Groq's
+    request headers are the per-day budget (RPD): they are tracked apart
+    from the minute window until `x-ratelimit-reset-requests`, and a key
+    with no requests left today is skipped. A key that answers 429 is
+    cooled down for its `retry-after`. `lease` picks the key with the most
+    tokens left among those that can absorb the request, waiting while none
+    can.
+    """
+
+    WINDOW = 60.0
+
+    def __init__(
+            self,
+            keys: List[str],
+            rpm_limit: int,
+            tpm_limit: int,
+            max_wait: float = 30.0,
+            poll_interval: float = 0.5
+    ):
+        """
+        Args:
+            keys (list): Groq API keys
+            rpm_limit (int): Requests per minute allowed per key
+            tpm_limit (int): Tokens per minute allowed per key
+            max_wait (float): Longest time `lease` waits for headroom; the
+                key with the most tokens left is used after that
+            poll_interval (float): Seconds between budget checks while waiting
+        """
+        self.keys = keys
+        self.rpm_limit = rpm_limit
+        self.tpm_limit = tpm_limit
+        self.max_wait = max_wait
+        self.poll_interval = poll_interval
+        self._budgets = {key: GroqKeyBudget() for key in keys}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def estimate_tokens(messages: List[dict], completion_tokens: int = 0) -> int:
+        """Rough token cost of a chat completion, about four characters per token"""
+        prompt_chars = sum(len(message.get("content") or "") for message in messages)
+        return prompt_chars // 4 + len(messages) * 4 + completion_tokens
+
+    def _headroom(self, budget: GroqKeyBudget, now: float) -> Tuple[int, int]:
+        """(requests, tokens) a key can still take this minute"""
+        while budget.window and budget.window[0][0] <= now - self.WINDOW:
+            budget.window.popleft()
+        if now < budget.cooldown_until:
+            return 0, 0
+        requests = self.rpm_limit - len(budget.window)
+        tokens = self.tpm_limit - sum(tokens for _, tokens in budget.window)
+        if now < budget.tokens_reset_at and budget.remaining_tokens is not None:
+            tokens = min(tokens, budget.remaining_tokens)
+        return requests, tokens
+
+    @staticmethod
+    def _daily_requests(budget: GroqKeyBudget, now: float) -> Optional[int]:
+        """Requests a key can still take today, None until Groq reported it or once it reset"""
+        if now >= budget.daily_reset_at:
+            budget.remaining_daily_requests = None
+        return budget.remaining_daily_requests
+
+    def _reserve(self, key: str, cost: int, now: float) -> GroqKeyLease:
+        usage = [now, cost]
+        budget = self._budgets[key]
+        budget.window.append(usage)
+        if self._daily_requests(budget, now) is not None:
+            budget.remaining_daily_requests -= 1
+        return GroqKeyLease(key, usage)
+
+    def try_lease(self, cost: int) -> Optional[GroqKeyLease]:
+        """Lease the key with the most tokens left that can absorb `cost`, None if none can"""
+        now = time.time()
+        with self._lock:
+            candidates = []
+            for key in self.keys:
+                requests, tokens = self._headroom(self._budgets[key], now)
+                daily_requests = self._daily_requests(self._budgets[key], now)
+                if requests >= 1 and tokens >= cost and (daily_requests is None or daily_requests >= 1):
+                    candidates.append((tokens, key))
+            if not candidates:
+                return None
+            return self._reserve(max(candidates, key=lambda candidate: candidate[0])[1], cost, now)
+
+    def lease_nowait(self, cost: int) -> GroqKeyLease:
+        """Lease a key that can absorb `cost`, else the one with the most tokens left"""
+        if not self.keys:
+            raise ValueError("No Groq API keys configured")
+        lease = self.try_lease(cost)
+        if lease is not None:
+            return lease
+        now = time.time()
+        with self._lock:
+            key = max(self.keys, key=lambda k: self._headroom(self._budgets[k], now)[1])
+            return self._reserve(key, cost, now)
+
+    async def lease(self, cost: int) -> GroqKeyLease:
+        """
+        Lease a key that can absorb `cost`, waiting up to `max_wait` for one
+
+        Args:
+            cost (int): Estimated tokens of the completion
+
+        Returns:
+            GroqKeyLease: Leased key, to be passed to `record` or `cooldown`
+        """
+        if not self.keys:
+            raise ValueError("No Groq API keys configured")
+        deadline = time.monotonic() + self.max_wait
+        while time.monotonic() < deadline:
+            lease = self.try_lease(cost)
+            if lease is not None:
+                return lease
+            await asyncio.sleep(self.poll_interval)
+        print(f"No Groq key can absorb {cost} tokens, using the least loaded one")
+        return self.lease_nowait(cost)
+
+    def record(self, lease: GroqKeyLease, headers, total_tokens: Optional[int]):
+        """
+        Correct a lease with the completion's usage and rate limit headers
+
+        Args:
+            lease (GroqKeyLease): Lease the completion ran on
+            headers: Response headers
+            total_tokens (int): `usage.total_tokens` of the completion, if known
+        """
+        with self._lock:
+            if total_tokens is not None:
+                lease.usage[1] = total_tokens
+            budget = self._budgets[lease.key]
+            try:
+                if "x-ratelimit-remaining-requests" in headers:
+                    budget.remaining_daily_requests = int(headers["x-ratelimit-remaining-requests"])
+                    budget.daily_reset_at = time.time() + parse_reset_duration(
+                        headers.get("x-ratelimit-reset-requests", "")
+                    )
+                if "x-ratelimit-remaining-tokens" in headers:
+                    budget.remaining_tokens = int(headers["x-ratelimit-remaining-tokens"])
+                    budget.tokens_reset_at = time.time() + parse_reset_duration(
+                        headers.get("x-ratelimit-reset-tokens", "")
+                    )
+            except ValueError:
+                print(f"Ignoring malformed Groq rate limit headers: {dict(headers)}")
+
+    def release(self, lease: GroqKeyLease):
+        """Give back the tokens and the daily request of a lease whose completion did not run"""
+        with self._lock:
+            lease.usage[1] = 0
+            budget = self._budgets[lease.key]
+            if self._daily_requests(budget, time.time()) is not None:
+                budget.remaining_daily_requests += 1
+
+    def cooldown(self, lease: GroqKeyLease, headers):
+        """Take a key out of rotation after a 429, for its `retry-after` or a minute"""
+        try:
+            retry_after = float(headers.get("retry-after", self.WINDOW))
+        except ValueError:
+            retry_after = self.WINDOW
+        print(f"Groq key rate limited, cooling down for {retry_after:.0f}s")
+        with self._lock:
+            lease.usage[1] = 0
+            self._budgets[lease.key].cooldown_until = time.time() + retry_after
+
+    def snapshot(self) -> Dict[str, Tuple[int, int, Optional[int]]]:
+        """(requests, tokens) each key can still take this minute, and its requests left today if known"""
+        now = time.time()
+        with self._lock:
+            return {
+                key: (*self._headroom(self._budgets[key], now), self._daily_requests(self._budgets[key], now))
+                for key in self.keys
+            }
+
+    def best_key(self) -> str:
+        """Key with the most tokens left, without reserving anything"""
+        if not self.keys:
+            raise ValueError("No Groq API keys configured")
+        now = time.time()
+        with self._lock:
+            return max(self.keys, key=lambda k: self._headroom(self._budgets[k], now)[1])
+
+
+groq_keys = GroqKeyPool(
+    Settings._GROQ_API_KEYS,
+    rpm_limit=Settings.GROQ_RPM_LIMIT,
+    tpm_limit=Settings.GROQ_TPM_LIMIT,
+    max_wait=Settings.GROQ_KEY_MAX_WAIT
+)
+
+
+def export_rate_limits():
+    """Publish the remaining budgets as metrics, credentials identified by position only"""
+    RATE_LIMIT_REMAINING.clear()
+    positions = {token: str(position) for position, token in enumerate(github_tokens.tokens)}
+    for (token, resource), (_, remaining, _) in github_tokens.snapshot().items():
+        RATE_LIMIT_REMAINING.set(remaining, "github", positions.get(token, "unknown"), resource)
+    for position, (requests, tokens, daily_requests) in enumerate(groq_keys.snapshot().values()):
+        RATE_LIMIT_REMAINING.set(requests, "groq", str(position), "requests")
+        RATE_LIMIT_REMAINING.set(tokens, "groq", str(position), "tokens")
+        if daily_requests is not None:
+            RATE_LIMIT_REMAINING.set(daily_requests, "groq", str(position), "daily_requests")
+
+
+REGISTRY.on_collect(export_rate_limits)
@@ -0,0 +1,154 @@
+import asyncio
+import base64
+import gzip
+import hashlib
+import json
+import re
+import time
+from collections import defaultdict, deque
+from typing import Deque, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import httpx
+
+# Response headers worth replaying: rate limits drive the token and key pools
+KEPT_HEADERS = ("content-type", "etag", "last-modified", "retry-after", "x-ratelimit-")
+# Timestamps in request bodies, e.g. the `from` of the contributions query, differ on every run
+TIMESTAMP_PATTERN = re.compile(rb"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d+)?Z?")
+
+
+class Exchange(NamedTuple):
+    """One recorded upstream request and its response"""
+    method: str
+    url: str  # path and query, upstreams are told apart by path
+    body_hash: str
+    status: int
+    headers: List[Tuple[str, str]]
+    body: bytes
+    elapsed: float  # seconds from sending the request to reading the whole response
+
+    @property
+    def key(self) -> Tuple[str, str, str]:
+        return self.method, self.url, self.body_hash
+
+
+class ReplayMissError(httpx.TransportError):
+    """A request with no recorded exchange, failing like an unreachable upstream"""
+
+
+def request_key(request: httpx.Request) -> Tuple[str, str, str]:
+    """
+    Key matching a request to its recorded exchanges
+
+    The host is left out so fixtures recorded against one base URL (see
+    `Settings.GITHUB_API_URL`) replay under another, and credentials are
+    left out so they never end up in a fixture.
+    """
+    body = TIMESTAMP_PATTERN.sub(b"<timestamp>", request.content)
+    return request.method, request.url.raw_path.decode("ascii"), hashlib.sha1(body).hexdigest()
+
+
+def _kept_headers(headers: httpx.Headers) -> List[Tuple[str, str]]:
+    return [(name, value) for name, value in headers.items() if name.lower().startswith(KEPT_HEADERS)]
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Transport passing requests to a real one and recording every exchange"""
+
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None):
+        """
+        Args:
+            transport (httpx.AsyncBaseTransport): Transport doing the requests,
+                a default HTTP transport without it
+        """
+        self.transport = transport or httpx.AsyncHTTPTransport()
+        self.exchanges: List[Exchange] = []
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        start = time.perf_counter()
+        response = await self.transport.handle_async_request(request)
+        try:
+            # Decoded here; the replayed response carries no content-encoding
+            body = await response.aread()
+        finally:
+            await response.aclose()
+        exchange = Exchange(
+            *request_key(request),
+            response.status_code,
+            _kept_headers(response.headers),
+            body,
+            time.perf_counter() - start
+        )
+        self.exchanges.append(exchange)
+        return _response(exchange)
+
+    async def aclose(self):
+        # Clients created over this transport close it when they close, while
+        # later clients still record through it; see `close`
+        pass
+
+    async def close(self):
+        """Close the underlying transport once recording is over"""
+        await self.transport.aclose()
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """
+    Transport answering requests from recorded exchanges, without network access
+
+    Requests with the same key get the recorded responses in order, and the
+    last one once they run out. Requests that were never recorded raise
+    `ReplayMissError`.
+    """
+
+    def __init__(self, exchanges: Iterable[Exchange], original_timing: bool = False):
+        """
+        Args:
+            exchanges: Recorded exchanges, see `load_exchanges`
+            original_timing (bool): Delay each response by its recorded
+                duration instead of answering immediately
+        """
+        self.original_timing = original_timing
+        self._exchanges: Dict[Tuple[str, str, str], Deque[Exchange]] = defaultdict(deque)
+        for exchange in exchanges:
+            self._exchanges[exchange.key].append(exchange)
+        self.misses = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        queue = self._exchanges.get(request_key(request))
+        if not queue:
+            self.misses += 1
+            raise ReplayMissError(f"No recorded exchange for {request.method} {request.url}", request=request)
+        exchange = queue.popleft() if len(queue) > 1 else queue[0]
+        if self.original_timing:
+            await asyncio.sleep(exchange.elapsed)
+        return _response(exchange)
+
+
+def _response(exchange: Exchange) -> httpx.Response:
+    return httpx.Response(exchange.status, headers=exchange.headers, content=exchange.body)
+
+
+def save_exchanges(path: str, exchanges: Iterable[Exchange]):
+    """Write exchanges to a gzipped JSON lines fixture, bodies as text where possible"""
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        for exchange in exchanges:
+            record = exchange._asdict()
+            try:
+                record["body"] = exchange.body.decode("utf-8")
+            except UnicodeDecodeError:
+                record["body"] = None
+                record["body_base64"] = base64.b64encode(exchange.body).decode("ascii")
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+
+def load_exchanges(path: str) -> List[Exchange]:
+    """Read the exchanges of a fixture written by `save_exchanges`"""
+    exchanges = []
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            body_base64 = record.pop("body_base64", None)
+            record["body"] = base64.b64decode(body_base64) if body_base64 else record["body"].encode("utf-8")
+            record["headers"] = [tuple(header) for header in record["headers"]]
+            exchanges.append(Exchange(**record))
+    return exchanges
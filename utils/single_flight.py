@@ -0,0 +1,131 @@
+import asyncio
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import redis.asyncio as redis
+
+# Delete the lease only if it is still held by the caller
+RELEASE_LEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent computations of the same cache key.
+
+    Within a worker, callers asking for a key that is already being computed
+    await the in-flight task instead of starting a new one. Across replicas, a
+    Redis `SET NX` lease elects one computation per key; the others poll the
+    cache until the result lands there.
+    """
+
+    LEASE_PREFIX = "single_flight:"
+
+    def __init__(
+            self,
+            redis_client: Optional[redis.Redis] = None,
+            lease_ttl: int = 60,
+            wait_timeout: float = 30.0,
+            poll_interval: float = 0.1
+    ):
+        """
+        Args:
+            redis_client: Redis client used for the cross-replica lease, or None
+                to coalesce within this process only
+            lease_ttl (int): Seconds before an abandoned lease expires
+            wait_timeout (float): Seconds to wait on another replica before
+                computing locally
+            poll_interval (float): Seconds between cache polls while waiting
+        """
+        self.redis_client = redis_client
+        self.lease_ttl = lease_ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self._in_flight: Dict[str, asyncio.Task] = {}
+
+    def in_flight(self, key: str) -> bool:
+        """Whether a computation for `key` is running in this process"""
+        return key in self._in_flight
+
+    async def do(
+            self,
+            key: str,
+            compute: Callable[[], Awaitable[Any]],
+            lookup: Optional[Callable[[], Awaitable[Any]]] = None,
+            use_lease: bool = True
+    ) -> Any:
+        """
+        Run `compute` once for `key` and share its result with every concurrent caller
+
+        Args:
+            key (str): Cache key identifying the computation
+            compute: Coroutine function producing the value. It is expected to
+                write the value to the cache before returning.
+            lookup: Coroutine function reading the value from the cache,
+                returning None on a miss
+            use_lease (bool): Take the cross-replica lease. Callers pass False
+                while they know Redis is unreachable, so the computation does
+                not wait out a connection timeout first.
+
+        Returns:
+            The computed (or concurrently cached) value
+        """
+        task = self._in_flight.get(key)
+        if task is None:
+            # The computation runs as its own task so a disconnecting caller
+            # does not cancel it for everyone else
+            task = asyncio.ensure_future(self._run(key, compute, lookup, use_lease))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        return await asyncio.shield(task)
+
+    def _done(self, key: str, task: asyncio.Task):
+        """Forget the finished task and mark its exception as retrieved"""
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            task.exception()
+
+    async def _run(self, key, compute, lookup, use_lease):
+        if self.redis_client is None or not use_lease:
+            return await compute()
+
+        lease_key = f"{self.LEASE_PREFIX}{key}"
+        token = uuid.uuid4().hex
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.wait_timeout
+
+        while True:
+            try:
+                acquired = await self.redis_client.set(lease_key, token, nx=True, ex=self.lease_ttl)
+            except redis.RedisError:
+                return await compute()
+
+            if acquired:
+                try:
+                    # The previous holder may have finished between our cache miss and the lease
+                    if lookup is not None:
+                        cached = await lookup()
+                        if cached is not None:
+                            return cached
+                    return await compute()
+                finally:
+                    await self._release(lease_key, token)
+
+            await asyncio.sleep(self.poll_interval)
+            if lookup is not None:
+                cached = await lookup()
+                if cached is not None:
+                    return cached
+            if loop.time() >= deadline:
+                return await compute()
+
+    async def _release(self, lease_key: str, token: str):
+        try:
+            await self.redis_client.eval(RELEASE_LEASE_SCRIPT, 1, lease_key, token)
+        except redis.RedisError:
+            pass  # The lease expires on its own
@@ -0,0 +1,145 @@
+import json
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, NamedTuple, Optional
+
+
+class Stage(NamedTuple):
+    """One timed step of a request, times in milliseconds from the request start"""
+    name: str
+    start: float
+    duration: float
+    status: Optional[str] = None
+    size: Optional[int] = None
+    detail: Optional[str] = None
+
+
+class RequestTrace:
+    """Timeline of the stages of one request, filled in by whatever code runs on its behalf"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages: List[Stage] = []
+
+    def elapsed(self, since: Optional[float] = None) -> float:
+        """Milliseconds since `since` (a perf_counter value), or since the request start"""
+        return (time.perf_counter() - (self.start if since is None else since)) * 1000
+
+    def add(self, name: str, started: float, status=None, size: Optional[int] = None, detail: Optional[str] = None):
+        """Record a stage that started at perf_counter value `started` and ends now"""
+        self.stages.append(Stage(
+            name,
+            round((started - self.start) * 1000, 1),
+            round(self.elapsed(started), 1),
+            None if status is None else str(status),
+            size,
+            detail
+        ))
+
+    def server_timing(self) -> str:
+        """The stages recorded so far as a Server-Timing header value, ending with the total"""
+        metrics = []
+        for stage in self.stages:
+            metric = f"{stage.name};dur={stage.duration}"
+            description = " ".join(
+                str(part) for part in (stage.detail, stage.status, stage.size and f"{stage.size}B") if part
+            )
+            if description:
+                metric += ';desc="' + description.replace("\\", "\\\\").replace('"', '\\"') + '"'
+            metrics.append(metric)
+        metrics.append(f"total;dur={round(self.elapsed(), 1)}")
+        return ", ".join(metrics)
+
+    def log_record(self, **fields) -> str:
+        """JSON log line with the request fields and its full timeline"""
+        return json.dumps({
+            **fields,
+            "duration_ms": round(self.elapsed(), 1),
+            "stages": [stage._asdict() for stage in self.stages],
+        })
+
+
+_current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("request_trace", default=None)
+_current_stage: ContextVar[Optional[str]] = ContextVar("request_stage", default=None)
+
+
+def current_trace() -> Optional[RequestTrace]:
+    """Trace of the request being served, None outside of requests"""
+    return _current_trace.get()
+
+
+def current_stage() -> Optional[str]:
+    """Name of the innermost `trace_stage` being run"""
+    return _current_stage.get()
+
+
+@contextmanager
+def trace_stage(name: str) -> Iterator[None]:
+    """
+    Time the enclosed block as a stage of the current request. Upstream
+    calls made inside it are named after it. A no-op outside of requests.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    token = _current_stage.set(name)
+    status = "ok"
+    try:
+        yield
+    except BaseException as e:
+        status = e.__class__.__name__
+        raise
+    finally:
+        _current_stage.reset(token)
+        trace.add(name, started, status)
+
+
+class ServerTimingMiddleware:
+    """
+    ASGI middleware tracing every request: stages recorded before the response
+    starts are sent in a Server-Timing header, and requests slower than
+    `slow_threshold` seconds are logged as JSON with their whole timeline.
+    """
+
+    def __init__(self, app, slow_threshold: float = 0):
+        """
+        Args:
+            app: ASGI application
+            slow_threshold (float): Seconds above which a request is logged, 0 disables logging
+        """
+        self.app = app
+        self.slow_threshold = slow_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        trace = RequestTrace()
+        token = _current_trace.set(trace)
+        status = [500]
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", trace.server_timing().encode("latin-1", "replace")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_trace.reset(token)
+            if self.slow_threshold and trace.elapsed() >= self.slow_threshold * 1000:
+                route = scope.get("route")
+                print(trace.log_record(
+                    event="slow_request",
+                    method=scope["method"],
+                    path=scope["path"],
+                    route=route.path if route is not None else None,
+                    status=status[0],
+                ))
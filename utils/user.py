@@ -1,12 +1,83 @@
+import httpx
 import requests
-from typing import Annotated
+from typing import Annotated, Optional
 from fastapi import Path, HTTPException
+from starlette.requests import Request
 
 from config.settings import Settings
 from modules.ai_generator import AIDescriptionGenerator
 from modules.contributions_fetcher import GitHubContributionsFetcher
 from modules.github_fetcher import GitHubProfileFetcher
 from modules.linkedin_fetcher import LinkedInProfileFetcher
+from utils.cache import ResponseCache
+from utils.tracing import trace_stage
+
+INVALID_USERNAME_DETAIL = (
+    "Invalid GitHub username. Usernames must be 1-39 characters long and can only contain "
+    "alphanumeric characters and single hyphens."
+)
+
+
+def username_cache_key(username: str) -> str:
+    return f"github_username_valid:{username.lower()}"
+
+
+async def remember_github_username(cache: ResponseCache, username: str, is_valid: bool):
+    """Cache whether a username belongs to a GitHub user, see `is_valid_github_username`"""
+    await cache.set(
+        username_cache_key(username),
+        is_valid,
+        ttl=Settings.VALID_USERNAME_CACHE_TTL if is_valid else Settings.INVALID_USERNAME_CACHE_TTL
+    )
+
+
+async def cached_github_username(cache: ResponseCache, username: str) -> Optional[bool]:
+    """Whether a username belongs to a GitHub user, as last remembered and still fresh, None if unknown"""
+    entry = await cache.get(username_cache_key(username))
+    if entry is None or entry.is_stale:
+        return None
+    return entry.value
+
+
+async def is_valid_github_username(
+    username: str,
+    cache: Optional[ResponseCache] = None,
+    client: Optional[httpx.AsyncClient] = None
+) -> bool:
+    """
+    Check that a username belongs to an existing GitHub user (not an organization).
+
+    Both outcomes are cached, with a shorter TTL for rejected usernames so new
+    accounts are picked up quickly. Failed lookups are not cached.
+
+    Args:
+        username (str): GitHub username
+        cache (ResponseCache): Cache for the lookup results
+        client (httpx.AsyncClient): Shared GitHub API client
+
+    Returns:
+        bool: Whether the username is a valid GitHub user
+    """
+    if not GitHubProfileFetcher._validate_username_pattern(username):
+        return False
+    if cache is None:
+        with trace_stage("validate_github_username"):
+            return await GitHubProfileFetcher.validate_github_username(username, client)
+
+    is_valid = await cached_github_username(cache, username)
+    if is_valid is not None:
+        return is_valid
+
+    try:
+        with trace_stage("validate_github_username"):
+            is_valid = await GitHubProfileFetcher.fetch_account_type(username, client) == 'User'
+    except httpx.HTTPError:
+        # Missing accounts are not errors, see `fetch_account_type`: GitHub is
+        # unreachable, rate limiting or failing, so fall back to pattern validation
+        return True
+
+    await remember_github_username(cache, username, is_valid)
+    return is_valid
 
 
 async def verify_username(
@@ -17,19 +88,55 @@ async def verify_username(
             max_length=39,
             pattern=r'^[a-zA-Z0-9][-a-zA-Z0-9]*[a-zA-Z0-9]$'
         )
-    ]
+    ],
+    request: Request
 ) -> str:
     """
     Validate GitHub username format and existence
     """
-    if not await GitHubProfileFetcher.validate_github_username(username):
-        raise HTTPException(
-            status_code=400,
-            detail="Invalid GitHub username. Usernames must be 1-39 characters long and can only contain alphanumeric characters and single hyphens."
+    check_username_available(username)
+    cache = getattr(request.app.state, "response_cache", None)
+    clients = getattr(request.app.state, "upstream_clients", None)
+    if not await is_valid_github_username(username, cache, clients.github if clients is not None else None):
+        raise HTTPException(status_code=400, detail=INVALID_USERNAME_DETAIL)
+    return username
+
+
+async def verify_profile_username(
+    username: Annotated[
+        str,
+        Path(
+            min_length=1,
+            max_length=39,
+            pattern=r'^[a-zA-Z0-9][-a-zA-Z0-9]*[a-zA-Z0-9]$'
         )
+    ],
+    request: Request
+) -> str:
+    """
+    Validate GitHub username format for endpoints built on the profile.
+    Existence and account type are checked by the profile query itself, which
+    caches the outcome, so only usernames already known to be invalid are
+    rejected here.
+    """
+    check_username_available(username)
+    if not GitHubProfileFetcher._validate_username_pattern(username):
+        raise HTTPException(status_code=400, detail=INVALID_USERNAME_DETAIL)
+    cache = getattr(request.app.state, "response_cache", None)
+    if cache is not None and await cached_github_username(cache, username) is False:
+        raise HTTPException(status_code=400, detail=INVALID_USERNAME_DETAIL)
     return username
 
 
+def check_username_available(username: str):
+    """Reject blacklisted usernames"""
+    if username.lower() in Settings.BLACKLISTED_USERS:
+        raise HTTPException(
+            status_code=403,
+            detail=f"User {username} is not available."
+        )
+
+
 async def verify_linkedin_username(
     username: Annotated[
         str,
@@ -34,10 +34,15 @@ const fetchResource = async <T>(
         Accept: "application/json",
         "X-Api-Key": API_KEY || "",
       },
-      next: {
-        revalidate: 3600, // Revalidate every hour
-        ...options.next,
-      },
+      // Uncached reads skip the data cache, so they take no revalidate period
+      ...(options.cache
+        ? { cache: options.cache }
+        : {
+            next: {
+              revalidate: 3600, // Revalidate every hour
+              ...options.next,
+            },
+          }),
     });
 
     if (!response.ok) {
@@ -56,6 +61,19 @@ const fetchResource = async <T>(
   }
 };
 
+/**
+ * Fetch a profile, cached for an hour once its AI sections are ready.
+ * A pending profile has no about or SEO contents yet, so it is read again
+ * uncached until the backend's AI job has generated them.
+ */
+const fetchProfile = async (username: string): Promise<Profile | null> => {
+  const profile = await fetchResource<Profile>(`/user/${username}/profile`);
+  if (profile?.about_status !== "pending") return profile;
+  return fetchResource<Profile>(`/user/${username}/profile`, {
+    cache: "no-store",
+  });
+};
+
 /**
  * Get user profile data
  */
@@ -63,7 +81,7 @@ export const getUserProfile = async (
   username: string,
 ): Promise<Profile | null> => {
   if (!username) return null;
-  return fetchResource<Profile>(`/user/${username}/profile`);
+  return fetchProfile(username);
 };
 
 /**
@@ -213,7 +231,7 @@ export const getProfileData = async (
   username: string,
 ): Promise<Profile | null> => {
   if (!username) return null;
-  return fetchResource<Profile>(`/user/${username}/profile`);
+  return fetchProfile(username);
 };
 
 /**
@@ -26,6 +26,8 @@ export type Profile = {
   about: string;
   seo: SEOContent;
   cached: boolean;
+  // "pending" while the AI sections are being generated, see fetchProfile in lib/api.ts
+  about_status?: "pending" | "ready";
 };
 
 export type Project = {